@@ -9,12 +9,34 @@ from routes.users import bp as users_bp
 from routes.times import bp as times_bp
 from routes.locais import bp as locais_bp
 from routes.partidas import bp as partidas_bp
+from routes.classificacao import bp as classificacao_bp
+
+from migrations.cli import db_cli
+from seed import seed_command
+from resumos import resumos_cli
+from outbox_worker import outbox_cli
+
+from config import SQL_TIMING_ENABLED, SLOW_QUERY_MS, METRICS_ENABLED
+from db import pools
+from query_timing import QueryTimer
+import metrics
+import replicas
+from json_provider import ORJSONProvider
 
 
 app = Flask(__name__)
 
+# Serializa Row/RowMapping, datas e timedelta direto do banco
+app.json = ORJSONProvider(app)
+
 # Durante desenvolvimento permita a origem do Vite (ex: http://localhost:5173)
-CORS(app, resources={r"/*": {"origins": ["http://localhost:8080", "https://5afefbfb-1d0f-4bb0-b284-829687bfeec9.lovableproject.com"]}}, supports_credentials=True)
+CORS(
+    app,
+    resources={r"/*": {"origins": ["http://localhost:8080", "https://5afefbfb-1d0f-4bb0-b284-829687bfeec9.lovableproject.com"]}},
+    supports_credentials=True,
+    # Cursores de paginação das listagens
+    expose_headers=["X-Next-Cursor", "X-Prev-Cursor", "Link", "Server-Timing", "ETag"],
+)
 
 # Register blueprints
 app.register_blueprint(auth_bp)
@@ -22,6 +44,28 @@ app.register_blueprint(users_bp)
 app.register_blueprint(times_bp)
 app.register_blueprint(locais_bp)
 app.register_blueprint(partidas_bp)
+app.register_blueprint(classificacao_bp)
+
+# Comandos `flask db ...` (migrações e EXPLAIN)
+app.cli.add_command(db_cli)
+# `flask seed`: dados sintéticos em volume de produção
+app.cli.add_command(seed_command)
+# `flask resumos ...`: recálculo das tabelas de resumo
+app.cli.add_command(resumos_cli)
+# `flask outbox ...`: worker que entrega os eventos do outbox transacional
+app.cli.add_command(outbox_cli)
+
+# Métricas Prometheus em /metrics (registradas antes dos demais hooks)
+if METRICS_ENABLED:
+    metrics.install(app)
+
+# Leituras em réplicas, com leitura das próprias escritas após um POST/PUT/DELETE
+replicas.install(app)
+
+# Contagem/tempo de SQL por requisição (primário e réplicas); desligado não
+# registra nenhum listener
+if SQL_TIMING_ENABLED:
+    QueryTimer([pool.engine for pool in pools.values()], SLOW_QUERY_MS).install(app)
 
 
 @app.route('/')
@@ -1,10 +1,49 @@
 from functools import wraps
-from flask import request, jsonify
+from flask import request, jsonify, g
 import jwt
 from datetime import datetime, timedelta, timezone
 from db import get_connection
-from sqlalchemy import text
-from config import JWT_SECRET_KEY
+from repository import usuarios
+from config import (
+    JWT_SECRET_KEY,
+    USER_CACHE_MAXSIZE,
+    USER_CACHE_TTL,
+    JWT_STATELESS,
+    ACCESS_TOKEN_MINUTES,
+    REFRESH_TOKEN_HOURS,
+    REVOCATION_REFRESH_SECONDS,
+)
+from cache import TTLCache
+from revocation import RevocationList
+
+# Linhas de `usuario` já carregadas, indexadas por id_usuario
+user_cache = TTLCache(maxsize=USER_CACHE_MAXSIZE, ttl=USER_CACHE_TTL)
+
+# Revogações consultadas no modo sem estado (JWT_STATELESS)
+revocation_list = RevocationList(
+    refresh_seconds=REVOCATION_REFRESH_SECONDS,
+    window_seconds=REFRESH_TOKEN_HOURS * 3600,
+)
+
+
+class TokenUser:
+    """Usuário montado a partir dos claims do token.
+
+    Expõe `_mapping` como uma `Row` do SQLAlchemy, então as rotas continuam
+    usando `current_user._mapping['id_usuario']` sem saber de onde veio.
+    """
+
+    __slots__ = ('_mapping',)
+
+    def __init__(self, id_usuario: int, nome: str, email: str):
+        self._mapping = {'id_usuario': id_usuario, 'nome': nome, 'email': email}
+
+
+def _encode(payload: dict) -> str:
+    token = jwt.encode(payload, JWT_SECRET_KEY, algorithm='HS256')
+    if isinstance(token, bytes):
+        token = token.decode('utf-8')
+    return token
 
 
 def generate_token(user_id: int, name: str, hours_valid: int = 8) -> str:
@@ -13,16 +52,80 @@ def generate_token(user_id: int, name: str, hours_valid: int = 8) -> str:
         'name': name,
         'exp': datetime.now(timezone.utc) + timedelta(hours=hours_valid)
     }
-    token = jwt.encode(payload, JWT_SECRET_KEY, algorithm='HS256')
-    if isinstance(token, bytes):
-        token = token.decode('utf-8')
-    return token
+    return _encode(payload)
+
+
+def generate_token_pair(user_id: int, name: str, email: str) -> dict:
+    """Gera o par access/refresh usado no modo sem estado."""
+    agora = datetime.now(timezone.utc)
+    issued_at = int(agora.timestamp())
+    # `iat` é em segundos (padrão JWT); a revogação compara em milissegundos
+    issued_at_ms = int(agora.timestamp() * 1000)
+
+    access_token = _encode({
+        'sub': str(user_id),
+        'name': name,
+        'email': email,
+        'typ': 'access',
+        'iat': issued_at,
+        'iat_ms': issued_at_ms,
+        'exp': agora + timedelta(minutes=ACCESS_TOKEN_MINUTES),
+    })
+    refresh_token = _encode({
+        'sub': str(user_id),
+        'typ': 'refresh',
+        'iat': issued_at,
+        'iat_ms': issued_at_ms,
+        'exp': agora + timedelta(hours=REFRESH_TOKEN_HOURS),
+    })
+    return {
+        'access_token': access_token,
+        'refresh_token': refresh_token,
+        'token_type': 'Bearer',
+        'expires_in': ACCESS_TOKEN_MINUTES * 60,
+    }
 
 
 def decode_token(token: str) -> dict:
     return jwt.decode(token, JWT_SECRET_KEY, algorithms=['HS256'])
 
 
+def load_user(id_usuario: int):
+    """Retorna a linha de `usuario`, consultando o cache antes do banco."""
+    current_user = user_cache.get(id_usuario)
+    if current_user is not None:
+        return current_user
+
+    with get_connection() as conn:
+        current_user = usuarios.buscar(conn, id_usuario)
+
+    if current_user is not None:
+        user_cache.set(id_usuario, current_user)
+    return current_user
+
+
+def invalidate_user(id_usuario: int) -> None:
+    """Descarta a linha em cache; chamar sempre que `usuario` for alterado."""
+    user_cache.invalidate(id_usuario)
+
+
+def revoke_user_tokens(conn, id_usuario: int) -> None:
+    """Invalida todos os tokens já emitidos para o usuário (troca de e-mail ou senha).
+
+    Só tem efeito no modo sem estado; no modo padrão o usuário é relido do banco.
+    """
+    if JWT_STATELESS:
+        revocation_list.revoke(conn, id_usuario)
+
+
+def is_token_revoked(id_usuario: int, payload: dict) -> bool:
+    if not revocation_list.might_be_revoked(id_usuario):
+        return False
+    # Tokens emitidos antes de `iat_ms` existir: início do segundo de `iat`
+    issued_at_ms = payload.get('iat_ms', payload.get('iat', 0) * 1000)
+    return revocation_list.is_revoked(id_usuario, issued_at_ms)
+
+
 def token_required(func):
     @wraps(func)
     def wrapper(*args, **kwargs):
@@ -47,16 +150,27 @@ def token_required(func):
         except Exception as e:
             return jsonify({'error': str(e)}), 500
 
+        if payload.get('typ') == 'refresh':
+            return jsonify({'message': 'Use o access token para acessar este recurso.'}), 401
+
         # 'sub' was stored as string
         try:
             id_usuario = int(payload.get('sub'))
         except (TypeError, ValueError):
             return jsonify({'message': 'Token é inválido (sub malformado).'}), 401
 
-        # Busca o usuário no banco
-        with get_connection() as conn:
-            query = text("SELECT * FROM usuario WHERE id_usuario = :id_usuario")
-            current_user = conn.execute(query, {'id_usuario': id_usuario}).fetchone()
+        # Usado pelo roteamento de leituras (replicas.py) para ler as próprias escritas
+        g.id_usuario = id_usuario
+
+        if JWT_STATELESS and payload.get('typ') == 'access':
+            # Claims suficientes no token: sem SQL, salvo revogação suspeita
+            if is_token_revoked(id_usuario, payload):
+                return jsonify({'message': 'Token revogado. Faça login novamente.'}), 401
+            current_user = TokenUser(id_usuario, payload.get('name'), payload.get('email'))
+            return func(current_user, *args, **kwargs)
+
+        # Busca o usuário (cache local ou banco)
+        current_user = load_user(id_usuario)
 
         if not current_user:
             return jsonify({'message': 'Usuário do token não encontrado.'}), 401
@@ -0,0 +1,107 @@
+"""Benchmark: serialização das listagens com o provider padrão do Flask vs. `ORJSONProvider`.
+
+Gera N linhas no formato de GET /partidas (SQLite em memória) e mede a
+resposta como era montada antes (dict por linha + `.isoformat()` nas
+datas + `DefaultJSONProvider`) contra as linhas entregues direto ao
+`ORJSONProvider`, conferindo que o JSON decodificado é o mesmo.
+
+Uso:
+    python -m benchmarks.bench_json --linhas 50000 --json resultado.json
+"""
+import argparse
+import json
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import DateTime, create_engine, text
+
+from json_provider import ORJSONProvider
+
+
+def carregar_linhas(num_linhas: int) -> list:
+    engine = create_engine('sqlite://')
+    inicio = datetime(2024, 1, 1, 8, 0)
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE partida (id_partida INTEGER PRIMARY KEY, dthr_ini DATETIME, dthr_fim DATETIME, "
+            "nome_local TEXT, nome_responsavel TEXT, placar_time_casa INTEGER, placar_time_visitante INTEGER, "
+            "time_casa TEXT, time_visitante TEXT)"
+        ))
+        conn.execute(
+            text("INSERT INTO partida VALUES (:id, :ini, :fim, :local, :resp, :pc, :pv, :tc, :tv)"),
+            [
+                {'id': i, 'ini': inicio + timedelta(hours=i), 'fim': inicio + timedelta(hours=i + 1),
+                 'local': f'Local {i % 50}', 'resp': f'Usuario {i % 1000}', 'pc': i % 5, 'pv': i % 3,
+                 'tc': f'Time {i % 2000}', 'tv': f'Time {(i + 7) % 2000}'}
+                for i in range(1, num_linhas + 1)
+            ],
+        )
+        # SQLite devolve DATETIME como texto; `columns()` converte para `datetime`, como no MySQL
+        query = text("SELECT * FROM partida").columns(dthr_ini=DateTime, dthr_fim=DateTime)
+        return conn.execute(query).all()
+
+
+def _timeit(fn, repeticoes: int) -> list:
+    amostras = []
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        fn()
+        amostras.append(time.perf_counter() - t0)
+    return amostras
+
+
+def run(num_linhas: int, repeticoes: int) -> dict:
+    linhas = carregar_linhas(num_linhas)
+
+    app_antigo = Flask('antigo')
+    app_antigo.json = DefaultJSONProvider(app_antigo)
+    app_novo = Flask('novo')
+    app_novo.json = ORJSONProvider(app_novo)
+
+    def antigo():
+        with app_antigo.app_context():
+            partidas = [
+                {
+                    **row._mapping,
+                    'dthr_ini': row._mapping['dthr_ini'].isoformat(),
+                    'dthr_fim': row._mapping['dthr_fim'].isoformat(),
+                }
+                for row in linhas
+            ]
+            return app_antigo.json.response(partidas).get_data()
+
+    def novo():
+        with app_novo.app_context():
+            return app_novo.json.response(linhas).get_data()
+
+    assert json.loads(antigo()) == json.loads(novo()), 'JSON diverge'
+
+    t_antigo = statistics.median(_timeit(antigo, repeticoes))
+    t_novo = statistics.median(_timeit(novo, repeticoes))
+    return {
+        'linhas': num_linhas,
+        'antigo_s': round(t_antigo, 4),
+        'novo_s': round(t_novo, 4),
+        'ganho': round(t_antigo / t_novo, 2) if t_novo else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--linhas', type=int, default=50_000)
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--json', help='grava o resultado neste arquivo')
+    args = parser.parse_args()
+
+    resultados = run(args.linhas, args.repeticoes)
+    print(json.dumps(resultados, indent=2))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(resultados, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,21 +1,176 @@
-from sqlalchemy import create_engine
+import threading
+import time
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from contextlib import contextmanager
-from config import DB_URL
+from config import (
+    DB_URL,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE,
+    DB_POOL_PRE_PING,
+)
+
+
+def create_pooled_engine(url: str):
+    """Engine com o pool configurado em `config` (primário e réplicas)."""
+    return create_engine(
+        url,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+    )
+
 
 # Cria a engine uma vez por processo
-engine = create_engine(DB_URL)
+engine = create_pooled_engine(DB_URL)
+
+
+class PoolMetrics:
+    """Contadores do pool de conexões de uma engine, acumulados no processo.
+
+    `checkout()` mede o tempo de espera por uma conexão; os eventos do pool
+    contam conexões novas, uso de overflow e invalidações.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.overflow_checkouts = 0
+        self.timeouts = 0
+        self.invalidations = 0
+        self.connects = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+        event.listen(engine, 'checkout', self._on_checkout)
+        event.listen(engine, 'connect', self._on_connect)
+        event.listen(engine, 'invalidate', self._on_invalidate)
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        pool = self.engine.pool
+        with self._lock:
+            self.checkouts += 1
+            if hasattr(pool, 'checkedout') and pool.checkedout() > pool.size():
+                self.overflow_checkouts += 1
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.connects += 1
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self.invalidations += 1
+
+    def checkout(self):
+        start = time.perf_counter()
+        try:
+            conn = self.engine.connect()
+        except PoolTimeoutError:
+            with self._lock:
+                self.timeouts += 1
+            raise
+
+        waited = time.perf_counter() - start
+        with self._lock:
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+        return conn
+
+    def snapshot(self) -> dict:
+        pool = self.engine.pool
+        with self._lock:
+            stats = {
+                'checkouts': self.checkouts,
+                'overflow_checkouts': self.overflow_checkouts,
+                'timeouts': self.timeouts,
+                'invalidations': self.invalidations,
+                'connects': self.connects,
+                'wait_seconds_total': self.wait_seconds_total,
+                'wait_seconds_max': self.wait_seconds_max,
+                'wait_seconds_avg': self.wait_seconds_total / self.checkouts if self.checkouts else 0.0,
+            }
+        if hasattr(pool, 'checkedout'):
+            stats.update({
+                'pool_size': pool.size(),
+                'checked_in': pool.checkedin(),
+                'checked_out': pool.checkedout(),
+                'overflow': max(pool.overflow(), 0),
+            })
+        return stats
+
+
+# PoolMetrics de cada engine do processo (primário e réplicas), pelo nome
+# usado no label `banco` das métricas
+pools = {}
+
+
+def register_pool(nome: str, pool_engine) -> PoolMetrics:
+    pools[nome] = PoolMetrics(pool_engine)
+    return pools[nome]
+
+
+pool_metrics = register_pool('primario', engine)
+
+
+def pool_stats(nome: str = 'primario') -> dict:
+    """Contadores e estado atual de um pool deste processo (para ajuste por deploy)."""
+    return pools[nome].snapshot()
 
 
 @contextmanager
 def get_connection():
     """Context manager simples para obter uma conexão SQLAlchemy.
 
+    É o único caminho de checkout do primário usado pelas rotas; as
+    réplicas (`replicas.get_read_connection`) também passam por `PoolMetrics`.
+
     Usage:
         with get_connection() as conn:
             conn.execute(...)
     """
-    conn = engine.connect()
+    conn = pool_metrics.checkout()
     try:
         yield conn
     finally:
         conn.close()
+
+
+@contextmanager
+def get_transaction():
+    """Como `engine.begin()`: commit ao sair do bloco, rollback em exceção.
+
+    Usage:
+        with get_transaction() as conn:
+            conn.execute(...)
+    """
+    with get_connection() as conn:
+        with conn.begin():
+            yield conn
+
+
+def insert_many(conn, table: str, columns, rows, suffix: str = '', chunk_size: int = 1000) -> list:
+    """INSERT multi-linha: um único comando `VALUES (...), (...)` por bloco de `chunk_size`.
+
+    `rows` é uma lista de dicts com as chaves de `columns`; `suffix` permite
+    acrescentar, por exemplo, `ON DUPLICATE KEY UPDATE ...`. Retorna
+    `(lastrowid, linhas)` de cada bloco (no MySQL, `lastrowid` é o id gerado
+    para a primeira linha do bloco).
+    """
+    blocks = []
+    column_list = ', '.join(columns)
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        values = []
+        params = {}
+        for i, row in enumerate(chunk):
+            values.append('(' + ', '.join(f':{c}_{i}' for c in columns) + ')')
+            params.update({f'{c}_{i}': row[c] for c in columns})
+
+        query = text(f"INSERT INTO {table} ({column_list}) VALUES {', '.join(values)} {suffix}")
+        blocks.append((conn.execute(query, params).lastrowid, len(chunk)))
+    return blocks
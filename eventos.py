@@ -0,0 +1,228 @@
+"""Eventos ao vivo das partidas (placar e presenças) via Server-Sent Events.
+
+As rotas de escrita chamam `publicar_partida()` depois do commit; `GET
+/partidas/<id>/eventos` assina o tópico da partida e repassa cada evento ao
+cliente como `text/event-stream`.
+
+O `EventHub` de cada processo mantém os assinantes por tópico e faz o
+fan-out para as filas deles. A publicação passa sempre pelo transporte:
+
+- `LocalTransport` entrega direto ao hub do próprio processo (um worker só,
+  ou nos testes);
+- `RedisTransport` (`EVENTOS_REDIS_URL`) publica num canal do Redis e cada
+  worker assinante repassa ao seu hub, então um placar gravado no worker A
+  chega aos streams abertos no worker B. Requer o pacote `redis`.
+
+Um stream ocioso não segura conexão do banco (o estado inicial é lido e a
+conexão devolvida antes do laço) e fica parado na fila do assinante. Em
+produção o app roda com workers gevent (`gunicorn.conf.py`): com o
+monkey-patch, `queue.Queue` e os locks viram primitivas cooperativas, cada
+stream é um greenlet e a espera na fila não ocupa thread nem o worker.
+`EVENTOS_MAX_ASSINANTES` limita os streams por processo.
+"""
+import json
+import logging
+import queue
+import threading
+import time
+
+from config import EVENTOS_FILA_MAX, EVENTOS_MAX_ASSINANTES, EVENTOS_REDIS_URL
+
+logger = logging.getLogger(__name__)
+
+EVENT_STREAM_MIMETYPE = 'text/event-stream'
+# Espera sugerida ao navegador antes de reconectar (campo `retry:` do SSE)
+RETRY_MS = 3000
+_REDIS_CANAL = 'futplan:eventos'
+
+
+class HubLotado(Exception):
+    """O processo já atende `max_assinantes` streams."""
+
+
+class Assinatura:
+    """Fila de eventos de um stream. É encerrada pelo hub se o cliente não acompanhar."""
+
+    def __init__(self, topico, tamanho_fila: int):
+        self.topico = topico
+        self.encerrada = False
+        self._fila = queue.Queue(maxsize=tamanho_fila)
+
+    def entregar(self, evento: dict) -> bool:
+        """False se a fila estiver cheia (o assinante deve ser descartado)."""
+        try:
+            self._fila.put_nowait(evento)
+            return True
+        except queue.Full:
+            return False
+
+    def proximo(self, timeout: float):
+        """Próximo evento, ou None se nada chegar em `timeout` segundos."""
+        try:
+            return self._fila.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class LocalTransport:
+    """Entrega no próprio processo: suficiente com um único worker e nos testes."""
+
+    def start(self, entregar, ressincronizar=None) -> None:
+        self._entregar = entregar
+
+    def publish(self, topico, evento: dict) -> None:
+        self._entregar(topico, evento)
+
+
+class RedisTransport:
+    """Pub/sub do Redis entre workers: cada processo publica e escuta o mesmo canal."""
+
+    def __init__(self, url: str, canal: str = _REDIS_CANAL, espera_inicial: float = 1.0, espera_maxima: float = 30.0):
+        import redis  # dependência opcional, só quando EVENTOS_REDIS_URL está definido
+
+        self.canal = canal
+        self.espera_inicial = espera_inicial
+        self.espera_maxima = espera_maxima
+        self._redis = redis.Redis.from_url(url)
+
+    def start(self, entregar, ressincronizar=None) -> None:
+        threading.Thread(
+            target=self.escutar, args=(entregar, ressincronizar), name='eventos-redis', daemon=True
+        ).start()
+
+    def escutar(self, entregar, ressincronizar=None) -> None:
+        """Laço do listener: reassina com backoff exponencial se a conexão cair.
+
+        Eventos publicados durante a queda se perdem; ao reassinar,
+        `ressincronizar` encerra os streams locais para que os clientes
+        reconectem e recebam o estado atual.
+        """
+        espera = self.espera_inicial
+        falhou = False
+        while True:
+            pubsub = None
+            try:
+                pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.canal)
+                if falhou and ressincronizar:
+                    ressincronizar()
+                espera, falhou = self.espera_inicial, False
+                for mensagem in pubsub.listen():
+                    self._repassar(entregar, mensagem)
+            except Exception as e:
+                logger.warning(f'Assinatura do canal {self.canal} caiu ({e}); nova tentativa em {espera:.0f}s.')
+            if pubsub is not None:
+                try:
+                    pubsub.close()
+                except Exception:
+                    pass
+            falhou = True
+            time.sleep(espera)
+            espera = min(espera * 2, self.espera_maxima)
+
+    def _repassar(self, entregar, mensagem) -> None:
+        try:
+            dados = json.loads(mensagem['data'])
+            entregar(dados['topico'], dados['evento'])
+        except Exception as e:
+            logger.warning(f'Evento inválido no canal {self.canal}: {e}')
+
+    def publish(self, topico, evento: dict) -> None:
+        self._redis.publish(self.canal, json.dumps({'topico': topico, 'evento': evento}, default=str))
+
+
+class EventHub:
+    """Assinantes por tópico e fan-out dos eventos recebidos do transporte.
+
+    O transporte só é iniciado no primeiro uso, então um processo criado por
+    fork (gunicorn com `--preload`) abre a própria assinatura no Redis.
+    """
+
+    def __init__(self, transport, tamanho_fila: int = 100, max_assinantes: int = 1000):
+        self.transport = transport
+        self.tamanho_fila = tamanho_fila
+        self.max_assinantes = max_assinantes
+        self._topicos = {}
+        self._total = 0
+        self._iniciado = False
+        self._lock = threading.Lock()
+
+    def _iniciar(self) -> None:
+        with self._lock:
+            if not self._iniciado:
+                self.transport.start(self._entregar, self.encerrar_todos)
+                self._iniciado = True
+
+    def assinar(self, topico) -> Assinatura:
+        self._iniciar()
+        with self._lock:
+            if self._total >= self.max_assinantes:
+                raise HubLotado()
+            assinatura = Assinatura(topico, self.tamanho_fila)
+            self._topicos.setdefault(topico, set()).add(assinatura)
+            self._total += 1
+        return assinatura
+
+    def cancelar(self, assinatura: Assinatura) -> None:
+        with self._lock:
+            assinantes = self._topicos.get(assinatura.topico)
+            if assinantes is None or assinatura not in assinantes:
+                return
+            assinantes.discard(assinatura)
+            self._total -= 1
+            if not assinantes:
+                del self._topicos[assinatura.topico]
+
+    def encerrar_todos(self) -> None:
+        """Encerra todos os streams do processo (eventos podem ter se perdido)."""
+        with self._lock:
+            assinaturas = [a for assinantes in self._topicos.values() for a in assinantes]
+            self._topicos.clear()
+            self._total = 0
+        for assinatura in assinaturas:
+            assinatura.encerrada = True
+            assinatura.entregar({'tipo': 'ressincronizar'})
+
+    def assinantes(self, topico=None) -> int:
+        with self._lock:
+            return self._total if topico is None else len(self._topicos.get(topico, ()))
+
+    def publicar(self, topico, evento: dict) -> None:
+        self._iniciar()
+        self.transport.publish(topico, evento)
+
+    def _entregar(self, topico, evento: dict) -> None:
+        with self._lock:
+            assinantes = list(self._topicos.get(topico, ()))
+        for assinatura in assinantes:
+            if not assinatura.entregar(evento):
+                # Cliente lento: encerra o stream; ao reconectar ele recebe o estado atual
+                assinatura.encerrada = True
+                self.cancelar(assinatura)
+
+
+def criar_transporte():
+    return RedisTransport(EVENTOS_REDIS_URL) if EVENTOS_REDIS_URL else LocalTransport()
+
+
+hub = EventHub(criar_transporte(), tamanho_fila=EVENTOS_FILA_MAX, max_assinantes=EVENTOS_MAX_ASSINANTES)
+
+
+def topico_partida(id_partida: int) -> str:
+    return f'partida:{id_partida}'
+
+
+def publicar_partida(id_partida: int, tipo: str, **dados) -> None:
+    """Publica um evento da partida; chamar só depois do commit.
+
+    Falhas do transporte são registradas e não afetam a resposta da escrita.
+    """
+    try:
+        hub.publicar(topico_partida(id_partida), {'tipo': tipo, 'id_partida': id_partida, **dados})
+    except Exception as e:
+        logger.warning(f'Falha ao publicar evento {tipo} da partida {id_partida}: {e}')
+
+
+def formatar_sse(tipo: str, dados: str) -> str:
+    """Um evento no formato `text/event-stream` (`dados` já serializado em JSON)."""
+    return f'event: {tipo}\n' + ''.join(f'data: {linha}\n' for linha in dados.splitlines()) + '\n'
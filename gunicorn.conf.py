@@ -0,0 +1,29 @@
+"""Configuração do gunicorn (lida automaticamente por `gunicorn app:app`).
+
+Workers gevent: cada requisição é um greenlet, então os streams de
+GET /partidas/<id>/eventos parados na fila não ocupam thread nem o worker, e
+o timeout do gunicorn (heartbeat do worker) não derruba streams longos.
+O app é importado em cada worker depois do monkey-patch do gevent (sem
+`preload_app`), para que filas, locks e sockets do driver sejam cooperativos.
+"""
+import multiprocessing
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("GUNICORN_WORKERS", str(multiprocessing.cpu_count())))
+worker_class = "gevent"
+# Conexões simultâneas por worker (requisições + streams abertos)
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", "1000"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+preload_app = False
+
+
+def child_exit(server, worker):
+    # Descarta os gauges do worker encerrado (ver metrics.py). Fica aqui, sem
+    # importar `metrics`: o master não deve carregar o app antes do fork, senão
+    # os workers herdam módulos importados antes do monkey-patch do gevent
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,55 @@
+"""Provider JSON do Flask baseado em `orjson`.
+
+Serializa diretamente o que as rotas recebem do banco: `Row`/`RowMapping`
+do SQLAlchemy viram objetos, `datetime`/`date`/`time` saem em ISO 8601
+(como `.isoformat()`) e `timedelta` (colunas TIME no mysql-connector) sai
+como `HH:MM:SS`. Assim as rotas podem devolver as linhas sem reconstruir
+um dict por linha.
+"""
+from collections.abc import Mapping
+from datetime import timedelta
+from decimal import Decimal
+
+import orjson
+from flask.json.provider import JSONProvider
+from sqlalchemy.engine import Row
+
+_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def format_timedelta(value: timedelta) -> str:
+    total = int(value.total_seconds())
+    sign = '-' if total < 0 else ''
+    total = abs(total)
+    return f'{sign}{total // 3600:02d}:{total % 3600 // 60:02d}:{total % 60:02d}'
+
+
+def _default(obj):
+    if isinstance(obj, Row):
+        return obj._asdict()
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    if isinstance(obj, timedelta):
+        return format_timedelta(obj)
+    if isinstance(obj, Decimal):
+        return str(obj)
+    if hasattr(obj, '_mapping'):  # TokenUser e afins
+        return dict(obj._mapping)
+    raise TypeError(f'Objeto do tipo {type(obj).__name__} não é serializável em JSON')
+
+
+def dumps_bytes(obj) -> bytes:
+    return orjson.dumps(obj, default=_default, option=_OPTIONS)
+
+
+class ORJSONProvider(JSONProvider):
+    def dumps(self, obj, **kwargs) -> str:
+        return dumps_bytes(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Evita a volta bytes -> str -> bytes de JSONProvider.response
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_bytes(obj), mimetype='application/json')
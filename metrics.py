@@ -0,0 +1,156 @@
+"""Métricas no formato Prometheus expostas em `/metrics`.
+
+Com vários workers (gunicorn etc.) defina `PROMETHEUS_MULTIPROC_DIR` para um
+diretório vazio e gravável: cada processo grava seus valores em arquivos
+mapeados em memória nesse diretório e o `/metrics` de qualquer worker
+agrega todos eles. Sem a variável, as métricas são as do processo atual.
+"""
+import os
+import threading
+import time
+
+from flask import Response, g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+from db import pools
+
+# Buckets fixos (segundos) para a latência das requisições
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REQUESTS = Counter(
+    'futplan_http_requests_total',
+    'Requisições HTTP atendidas.',
+    ['blueprint', 'endpoint', 'method', 'status'],
+)
+LATENCY = Histogram(
+    'futplan_http_request_duration_seconds',
+    'Latência das requisições HTTP.',
+    ['blueprint', 'endpoint'],
+    buckets=LATENCY_BUCKETS,
+)
+IN_FLIGHT = Gauge(
+    'futplan_http_requests_in_flight',
+    'Requisições em andamento.',
+    multiprocess_mode='livesum',
+)
+
+# Estado do pool de conexões de cada engine (`banco`: primario, replica0, ...),
+# somado entre os workers vivos
+POOL_GAUGES = {
+    name: Gauge(f'futplan_db_pool_{name}', description, ['banco'], multiprocess_mode='livesum')
+    for name, description in (
+        ('checked_out', 'Conexões em uso.'),
+        ('checked_in', 'Conexões ociosas no pool.'),
+        ('overflow', 'Conexões abertas além de pool_size.'),
+    )
+}
+# Contadores acumulados do pool (`*_total`): `rate()` funciona e os valores de
+# workers encerrados continuam somados, como em qualquer Counter
+POOL_COUNTERS = {
+    name: Counter(f"futplan_db_pool_{name.removesuffix('_total')}", description, ['banco'])
+    for name, description in (
+        ('checkouts', 'Checkouts de conexão.'),
+        ('overflow_checkouts', 'Checkouts que usaram overflow.'),
+        ('timeouts', 'Checkouts que estouraram pool_timeout.'),
+        ('invalidations', 'Conexões invalidadas.'),
+        ('wait_seconds_total', 'Tempo total de espera por conexão.'),
+    )
+}
+# Último valor de cada `(banco, contador)` já somado aos Counters deste processo
+_pool_exportado = {}
+_pool_lock = threading.Lock()
+
+# Worker do outbox (`flask outbox processar`): vazão, atraso de entrega e fila
+OUTBOX_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 3600.0)
+OUTBOX_EVENTOS = Counter(
+    'futplan_outbox_eventos_total',
+    'Eventos do outbox tratados pelo worker (entregue, erro ou descartado).',
+    ['tipo', 'resultado'],
+)
+OUTBOX_ATRASO = Histogram(
+    'futplan_outbox_atraso_seconds',
+    'Tempo entre a gravação do evento e a entrega bem-sucedida.',
+    ['tipo'],
+    buckets=OUTBOX_BUCKETS,
+)
+OUTBOX_PENDENTES = Gauge(
+    'futplan_outbox_pendentes',
+    'Eventos pendentes no outbox.',
+    multiprocess_mode='livemax',
+)
+OUTBOX_ATRASO_MAXIMO = Gauge(
+    'futplan_outbox_atraso_maximo_seconds',
+    'Idade do evento pendente mais antigo.',
+    multiprocess_mode='livemax',
+)
+
+
+def _labels():
+    endpoint = request.endpoint or 'nao_encontrado'
+    return request.blueprint or 'app', endpoint
+
+
+def update_pool_metrics() -> None:
+    for banco, pool in list(pools.items()):
+        stats = pool.snapshot()
+        for name, gauge in POOL_GAUGES.items():
+            if name in stats:
+                gauge.labels(banco).set(stats[name])
+        # `snapshot()` é acumulado no processo; o Counter recebe só o incremento
+        with _pool_lock:
+            for name, counter in POOL_COUNTERS.items():
+                incremento = stats.get(name, 0) - _pool_exportado.get((banco, name), 0)
+                if incremento > 0:
+                    counter.labels(banco).inc(incremento)
+                    _pool_exportado[(banco, name)] = stats[name]
+
+
+def _start_request():
+    g._metrics_inicio = time.perf_counter()
+    g._metrics_em_andamento = True
+    IN_FLIGHT.inc()
+
+
+def _finish_request(response):
+    inicio = g.pop('_metrics_inicio', None)
+    if inicio is not None:
+        blueprint, endpoint = _labels()
+        LATENCY.labels(blueprint, endpoint).observe(time.perf_counter() - inicio)
+        REQUESTS.labels(blueprint, endpoint, request.method, str(response.status_code)).inc()
+        update_pool_metrics()
+    return response
+
+
+def _teardown_request(exc):
+    # Roda mesmo quando after_request não roda, então o gauge nunca fica preso
+    if g.pop('_metrics_em_andamento', False):
+        IN_FLIGHT.dec()
+
+
+def _registry():
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def metrics_view():
+    update_pool_metrics()
+    return Response(generate_latest(_registry()), mimetype=CONTENT_TYPE_LATEST)
+
+
+def install(app) -> None:
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.teardown_request(_teardown_request)
+    app.add_url_rule('/metrics', 'metrics', metrics_view, methods=['GET'])
@@ -0,0 +1,112 @@
+"""Migrações versionadas do esquema do futPlan.
+
+Cada módulo `vNNN_*.py` expõe `VERSION`, `DESCRIPTION` e `upgrade(conn)`.
+A versão aplicada fica registrada em `schema_versao`; `upgrade()` aplica, em
+ordem, apenas as migrações ainda não registradas.
+"""
+import importlib
+import pkgutil
+
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+VERSION_TABLE_DDL = """
+    CREATE TABLE IF NOT EXISTS schema_versao (
+        versao INT PRIMARY KEY,
+        descricao VARCHAR(255) NOT NULL,
+        aplicada_em DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+
+def load_migrations() -> list:
+    """Retorna os módulos de migração ordenados por versão."""
+    modules = []
+    for info in pkgutil.iter_modules(__path__):
+        if info.name.startswith('v') and info.name[1:4].isdigit():
+            modules.append(importlib.import_module(f'{__name__}.{info.name}'))
+
+    modules.sort(key=lambda m: m.VERSION)
+    versions = [m.VERSION for m in modules]
+    if len(set(versions)) != len(versions):
+        raise RuntimeError(f'Versões de migração duplicadas: {versions}')
+    return modules
+
+
+def current_version(conn) -> int:
+    conn.execute(text(VERSION_TABLE_DDL))
+    return conn.execute(text("SELECT COALESCE(MAX(versao), 0) FROM schema_versao")).scalar()
+
+
+def upgrade(engine, target: int = None, echo=print) -> int:
+    """Aplica as migrações pendentes até `target` (ou a última) e retorna a versão final."""
+    with engine.begin() as conn:
+        version = current_version(conn)
+
+    for migration in load_migrations():
+        if migration.VERSION <= version or (target is not None and migration.VERSION > target):
+            continue
+
+        echo(f'Aplicando {migration.VERSION:03d}: {migration.DESCRIPTION}')
+        # DDL no MySQL faz commit implícito: cada migração precisa ser idempotente
+        with engine.begin() as conn:
+            migration.upgrade(conn)
+            conn.execute(
+                text("INSERT INTO schema_versao (versao, descricao) VALUES (:versao, :descricao)"),
+                {'versao': migration.VERSION, 'descricao': migration.DESCRIPTION},
+            )
+        version = migration.VERSION
+
+    return version
+
+
+def _indexes(conn, table: str) -> dict:
+    """`{nome: (colunas, unico)}` dos índices de `table`."""
+    query = text(
+        """
+        SELECT index_name, column_name, non_unique
+        FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = :table
+        ORDER BY index_name, seq_in_index
+        """
+    )
+    indexes = {}
+    for row in conn.execute(query, {'table': table}):
+        colunas, _ = indexes.setdefault(row[0], ([], not row[2]))
+        colunas.append(row[1].lower())
+    return indexes
+
+
+def index_exists(conn, table: str, columns, unique: bool = False) -> bool:
+    """Verifica se algum índice de `table` atende às colunas dadas.
+
+    Sem `unique`, basta um índice que comece exatamente por elas. Com
+    `unique`, só vale um índice UNIQUE (ou a PK) com exatamente essas
+    colunas: um índice comum ou mais largo não garante a unicidade.
+    """
+    wanted = [c.lower() for c in columns]
+    for cols, unico in _indexes(conn, table).values():
+        if unique and unico and cols == wanted:
+            return True
+        if not unique and cols[:len(wanted)] == wanted:
+            return True
+    return False
+
+
+def create_index_if_missing(conn, table: str, name: str, columns, unique: bool = False) -> None:
+    """CREATE INDEX idempotente (o MySQL 8 não tem `CREATE INDEX IF NOT EXISTS`)."""
+    if index_exists(conn, table, columns, unique=unique):
+        return
+    if name in _indexes(conn, table):
+        raise RuntimeError(
+            f"O índice {name} de {table} já existe, mas não é {'UNIQUE ' if unique else ''}"
+            f"em ({', '.join(columns)}); remova-o e rode a migração de novo."
+        )
+    kind = 'UNIQUE INDEX' if unique else 'INDEX'
+    try:
+        conn.execute(text(f"CREATE {kind} {name} ON `{table}` ({', '.join(columns)})"))
+    except IntegrityError as e:
+        raise RuntimeError(
+            f"Não foi possível criar {name}: há linhas repetidas em {table} ({', '.join(columns)}). "
+            f"Remova as duplicatas e rode a migração de novo. ({e.orig})"
+        ) from e
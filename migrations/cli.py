@@ -0,0 +1,58 @@
+import click
+from flask.cli import AppGroup
+
+from db import engine
+from migrations import current_version, load_migrations, upgrade
+from migrations.explain import explain, extract_queries, full_scans
+
+db_cli = AppGroup('db', help='Migrações de esquema e diagnóstico de consultas.')
+
+
+@db_cli.command('upgrade')
+@click.option('--target', type=int, default=None, help='Versão máxima a aplicar.')
+def upgrade_command(target):
+    """Cria/atualiza o esquema aplicando as migrações pendentes."""
+    version = upgrade(engine, target=target, echo=click.echo)
+    click.echo(f'Esquema na versão {version}.')
+
+
+@db_cli.command('version')
+def version_command():
+    """Mostra a versão aplicada e as migrações pendentes."""
+    with engine.begin() as conn:
+        version = current_version(conn)
+    click.echo(f'Versão aplicada: {version}')
+    for migration in load_migrations():
+        if migration.VERSION > version:
+            click.echo(f'  pendente {migration.VERSION:03d}: {migration.DESCRIPTION}')
+
+
+@db_cli.command('explain')
+@click.option('--only-full-scans', is_flag=True, help='Exibe apenas consultas com full scan.')
+@click.option('--strict', is_flag=True, help='Sai com código 1 se houver full scan.')
+def explain_command(only_full_scans, strict):
+    """Exibe o plano EXPLAIN de cada consulta usada pelas rotas."""
+    total_scans = 0
+    with engine.connect() as conn:
+        for location, sql in extract_queries():
+            try:
+                plan = explain(conn, sql)
+            except Exception as e:
+                click.echo(f'\n{location}\n  {sql}\n  ERRO: {e}')
+                continue
+
+            scans = full_scans(plan)
+            total_scans += len(scans)
+            if only_full_scans and not scans:
+                continue
+
+            click.echo(f'\n{location}{"  [FULL SCAN]" if scans else ""}\n  {sql}')
+            for row in plan:
+                click.echo(
+                    f"  - {row.get('table')}: type={row.get('type')} key={row.get('key')} "
+                    f"rows={row.get('rows')} extra={row.get('Extra')}"
+                )
+
+    click.echo(f'\n{total_scans} acesso(s) com full scan.')
+    if strict and total_scans:
+        raise SystemExit(1)
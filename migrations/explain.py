@@ -0,0 +1,81 @@
+"""Planos `EXPLAIN` para as consultas SQL da camada `repository`.
+
+As consultas são extraídas do código-fonte (literais que começam com
+SELECT/UPDATE/DELETE), os parâmetros `:nome` recebem valores de exemplo
+e o plano de cada uma é exibido, destacando acessos `type = ALL` (full scan).
+"""
+import ast
+import re
+from datetime import date, datetime
+from pathlib import Path
+
+from sqlalchemy import text
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Arquivos varridos em busca de SQL
+QUERY_SOURCES = ['repository', 'revocation.py']
+
+_SQL_START = re.compile(r'^\s*(SELECT|UPDATE|DELETE)\s+\S', re.IGNORECASE)
+_BIND_PARAM = re.compile(r'(?<![:\w]):(\w+)')
+
+
+def _source_files(sources) -> list:
+    files = []
+    for source in sources:
+        path = ROOT / source
+        files.extend(sorted(path.glob('*.py')) if path.is_dir() else [path])
+    return files
+
+
+def extract_queries(sources=QUERY_SOURCES) -> list:
+    """Retorna `(locais, sql)` para cada literal SQL distinto encontrado nos arquivos.
+
+    Trechos de f-strings são ignorados, pois o texto completo só existe em
+    tempo de execução; os UPDATE de campos opcionais são montados com o Core
+    e também ficam de fora.
+    """
+    queries = {}
+    for path in _source_files(sources):
+        tree = ast.parse(path.read_text(encoding='utf-8'))
+        fstring_parts = {
+            id(value) for node in ast.walk(tree) if isinstance(node, ast.JoinedStr) for value in node.values
+        }
+        for node in ast.walk(tree):
+            if (
+                isinstance(node, ast.Constant)
+                and isinstance(node.value, str)
+                and id(node) not in fstring_parts
+                and _SQL_START.match(node.value)
+            ):
+                location = f'{path.relative_to(ROOT)}:{node.lineno}'
+                queries.setdefault(' '.join(node.value.split()), []).append(location)
+    return [(', '.join(locations), sql) for sql, locations in queries.items()]
+
+
+def sample_value(name: str):
+    """Valor de exemplo para um parâmetro, inferido pelo nome."""
+    name = name.lower()
+    if 'dthr' in name or name == 'agora':
+        return datetime.now()
+    if 'data' in name:
+        return date.today()
+    if 'email' in name:
+        return 'explain@example.com'
+    if name == 'status':
+        return 'Confirmado'
+    if name == 'cv':
+        return 'C'
+    if 'nome' in name or 'motivo' in name:
+        return 'explain'
+    return 1
+
+
+def explain(conn, sql: str) -> list:
+    params = {name: sample_value(name) for name in _BIND_PARAM.findall(sql)}
+    result = conn.execute(text(f'EXPLAIN {sql}'), params)
+    return [dict(row._mapping) for row in result]
+
+
+def full_scans(plan: list) -> list:
+    return [row for row in plan if str(row.get('type', '')).upper() == 'ALL']
@@ -0,0 +1,104 @@
+from sqlalchemy import text
+
+VERSION = 1
+DESCRIPTION = 'Esquema inicial (tabelas usadas pelas rotas)'
+
+# `time_partida.fk_time` não referencia `time`: `delete_time` remove times
+# que ainda aparecem em partidas passadas.
+TABLES = [
+    """
+    CREATE TABLE IF NOT EXISTS usuario (
+        id_usuario INT AUTO_INCREMENT PRIMARY KEY,
+        nome VARCHAR(100) NOT NULL,
+        email VARCHAR(255) NOT NULL,
+        hash_senha VARCHAR(255) NOT NULL,
+        genero VARCHAR(20) NULL,
+        dt_nascimento DATE NULL,
+        no_telefone VARCHAR(20) NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS time (
+        id_time INT AUTO_INCREMENT PRIMARY KEY,
+        nome_time VARCHAR(100) NOT NULL,
+        fk_responsavel_time INT NOT NULL,
+        cor_uniforme VARCHAR(50) NULL,
+        CONSTRAINT fk_time_responsavel FOREIGN KEY (fk_responsavel_time) REFERENCES usuario (id_usuario)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS time_membros (
+        fk_usuario INT NOT NULL,
+        fk_time INT NOT NULL,
+        numero_camisa INT NULL,
+        PRIMARY KEY (fk_usuario, fk_time),
+        CONSTRAINT fk_time_membros_usuario FOREIGN KEY (fk_usuario) REFERENCES usuario (id_usuario),
+        CONSTRAINT fk_time_membros_time FOREIGN KEY (fk_time) REFERENCES time (id_time)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS local (
+        id_local INT AUTO_INCREMENT PRIMARY KEY,
+        nome VARCHAR(100) NOT NULL,
+        capacidade INT NOT NULL,
+        disponivel_para_agendamento BOOLEAN NOT NULL DEFAULT TRUE,
+        horario_abertura TIME NULL,
+        horario_fechamento TIME NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS local_excecoes (
+        id_excecao INT AUTO_INCREMENT PRIMARY KEY,
+        fk_local INT NOT NULL,
+        data_excecao DATE NOT NULL,
+        motivo VARCHAR(255) NULL,
+        horario_abertura_excecao TIME NULL,
+        horario_fechamento_excecao TIME NULL,
+        CONSTRAINT fk_local_excecoes_local FOREIGN KEY (fk_local) REFERENCES local (id_local)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS agendamento (
+        id_agendamento INT AUTO_INCREMENT PRIMARY KEY,
+        dthr_ini DATETIME NOT NULL,
+        dthr_fim DATETIME NOT NULL,
+        fk_local INT NOT NULL,
+        CONSTRAINT fk_agendamento_local FOREIGN KEY (fk_local) REFERENCES local (id_local)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS partida (
+        id_partida INT AUTO_INCREMENT PRIMARY KEY,
+        fk_responsavel_partida INT NOT NULL,
+        fk_agendamento INT NOT NULL,
+        placar_time_casa INT NULL,
+        placar_time_visitante INT NULL,
+        CONSTRAINT fk_partida_responsavel FOREIGN KEY (fk_responsavel_partida) REFERENCES usuario (id_usuario),
+        CONSTRAINT fk_partida_agendamento FOREIGN KEY (fk_agendamento) REFERENCES agendamento (id_agendamento)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS time_partida (
+        fk_time INT NOT NULL,
+        fk_partida INT NOT NULL,
+        casa_visitante CHAR(1) NOT NULL,
+        PRIMARY KEY (fk_partida, casa_visitante),
+        CONSTRAINT fk_time_partida_partida FOREIGN KEY (fk_partida) REFERENCES partida (id_partida)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS partida_presenca (
+        fk_partida INT NOT NULL,
+        fk_usuario INT NOT NULL,
+        status ENUM('Confirmado', 'Duvida', 'Recusado') NOT NULL,
+        PRIMARY KEY (fk_partida, fk_usuario),
+        CONSTRAINT fk_partida_presenca_partida FOREIGN KEY (fk_partida) REFERENCES partida (id_partida),
+        CONSTRAINT fk_partida_presenca_usuario FOREIGN KEY (fk_usuario) REFERENCES usuario (id_usuario)
+    )
+    """,
+]
+
+
+def upgrade(conn) -> None:
+    for ddl in TABLES:
+        conn.execute(text(ddl))
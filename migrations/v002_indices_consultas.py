@@ -0,0 +1,33 @@
+from migrations import create_index_if_missing
+
+VERSION = 2
+DESCRIPTION = 'Índices dos predicados mais usados pelas rotas'
+
+# (tabela, nome, colunas, unique) — cada índice cita a consulta que atende
+INDEXES = [
+    # login e checagem de e-mail duplicado em update_profile
+    ('usuario', 'uq_usuario_email', ['email'], True),
+    # checagem de conflito em create_partida: fk_local = ? AND dthr_ini < ? AND dthr_fim > ?
+    ('agendamento', 'idx_agendamento_local_periodo', ['fk_local', 'dthr_ini', 'dthr_fim'], False),
+    # ordenação/paginação de get_partidas por dthr_ini
+    ('agendamento', 'idx_agendamento_dthr_ini', ['dthr_ini'], False),
+    ('partida', 'idx_partida_agendamento', ['fk_agendamento'], False),
+    # joins casa/visitante de get_partidas e get_partida_details
+    ('time_partida', 'idx_time_partida_partida_cv', ['fk_partida', 'casa_visitante'], False),
+    # partidas futuras de um time (delete_time) e filtro id_time
+    ('time_partida', 'idx_time_partida_time', ['fk_time', 'fk_partida'], False),
+    # pertencimento (confirm_presence, update_time, add_member)
+    ('time_membros', 'idx_time_membros_usuario_time', ['fk_usuario', 'fk_time'], False),
+    ('time_membros', 'idx_time_membros_time_usuario', ['fk_time', 'fk_usuario'], False),
+    # número de camisa único por time (add_member, update_member_shirt_number)
+    ('time_membros', 'uq_time_membros_camisa', ['fk_time', 'numero_camisa'], True),
+    # upsert e listagem de presença
+    ('partida_presenca', 'idx_partida_presenca_partida_usuario', ['fk_partida', 'fk_usuario'], True),
+    # exceção do dia em create_partida
+    ('local_excecoes', 'uq_local_excecoes_local_data', ['fk_local', 'data_excecao'], True),
+]
+
+
+def upgrade(conn) -> None:
+    for table, name, columns, unique in INDEXES:
+        create_index_if_missing(conn, table, name, columns, unique=unique)
@@ -0,0 +1,20 @@
+from sqlalchemy import text
+
+VERSION = 3
+DESCRIPTION = 'Tabela de revogação de tokens (modo JWT sem estado)'
+
+
+def upgrade(conn) -> None:
+    conn.execute(
+        text(
+            """
+            CREATE TABLE IF NOT EXISTS token_revogacao (
+                id_revogacao INT AUTO_INCREMENT PRIMARY KEY,
+                fk_usuario INT NOT NULL,
+                revogado_em BIGINT NOT NULL,
+                INDEX idx_token_revogacao_usuario (fk_usuario, revogado_em),
+                INDEX idx_token_revogacao_revogado_em (revogado_em)
+            )
+            """
+        )
+    )
@@ -0,0 +1,25 @@
+from sqlalchemy import text
+
+VERSION = 4
+DESCRIPTION = 'Contadores de versão por tabela (ETags das listagens)'
+
+
+def upgrade(conn) -> None:
+    conn.execute(
+        text(
+            """
+            CREATE TABLE IF NOT EXISTS tabela_versao (
+                tabela VARCHAR(64) PRIMARY KEY,
+                versao BIGINT NOT NULL DEFAULT 0
+            )
+            """
+        )
+    )
+    conn.execute(
+        text(
+            """
+            INSERT IGNORE INTO tabela_versao (tabela)
+            VALUES ('local'), ('time'), ('partida'), ('usuario')
+            """
+        )
+    )
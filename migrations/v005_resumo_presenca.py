@@ -0,0 +1,39 @@
+from sqlalchemy import text
+
+VERSION = 5
+DESCRIPTION = 'Contadores de presença por partida e time (partida_presenca_resumo)'
+
+
+def upgrade(conn) -> None:
+    conn.execute(
+        text(
+            """
+            CREATE TABLE IF NOT EXISTS partida_presenca_resumo (
+                fk_partida INT NOT NULL,
+                fk_time INT NOT NULL,
+                confirmados INT NOT NULL DEFAULT 0,
+                duvidas INT NOT NULL DEFAULT 0,
+                recusados INT NOT NULL DEFAULT 0,
+                PRIMARY KEY (fk_partida, fk_time),
+                INDEX idx_presenca_resumo_time (fk_time)
+            )
+            """
+        )
+    )
+    # Carga inicial a partir das presenças já registradas (idempotente)
+    conn.execute(text("DELETE FROM partida_presenca_resumo"))
+    conn.execute(
+        text(
+            """
+            INSERT INTO partida_presenca_resumo (fk_partida, fk_time, confirmados, duvidas, recusados)
+            SELECT pp.fk_partida, tm.fk_time,
+                SUM(CASE WHEN pp.status = 'Confirmado' THEN 1 ELSE 0 END),
+                SUM(CASE WHEN pp.status = 'Duvida' THEN 1 ELSE 0 END),
+                SUM(CASE WHEN pp.status = 'Recusado' THEN 1 ELSE 0 END)
+            FROM partida_presenca AS pp
+            JOIN time_partida AS tp ON tp.fk_partida = pp.fk_partida
+            JOIN time_membros AS tm ON tm.fk_usuario = pp.fk_usuario AND tm.fk_time = tp.fk_time
+            GROUP BY pp.fk_partida, tm.fk_time
+            """
+        )
+    )
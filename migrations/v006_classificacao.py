@@ -0,0 +1,58 @@
+from sqlalchemy import text
+
+VERSION = 6
+DESCRIPTION = 'Classificação materializada por time (classificacao)'
+
+
+def upgrade(conn) -> None:
+    conn.execute(
+        text(
+            """
+            CREATE TABLE IF NOT EXISTS classificacao (
+                fk_time INT PRIMARY KEY,
+                jogos INT NOT NULL DEFAULT 0,
+                vitorias INT NOT NULL DEFAULT 0,
+                empates INT NOT NULL DEFAULT 0,
+                derrotas INT NOT NULL DEFAULT 0,
+                gols_pro INT NOT NULL DEFAULT 0,
+                gols_contra INT NOT NULL DEFAULT 0,
+                pontos INT NOT NULL DEFAULT 0
+            )
+            """
+        )
+    )
+    conn.execute(text("INSERT IGNORE INTO tabela_versao (tabela) VALUES ('classificacao')"))
+
+    # Carga inicial a partir dos placares já registrados (idempotente)
+    conn.execute(text("DELETE FROM classificacao"))
+    conn.execute(
+        text(
+            """
+            INSERT INTO classificacao (fk_time, jogos, vitorias, empates, derrotas, gols_pro, gols_contra, pontos)
+            SELECT
+                r.fk_time,
+                COUNT(*),
+                SUM(CASE WHEN r.gols_pro > r.gols_contra THEN 1 ELSE 0 END),
+                SUM(CASE WHEN r.gols_pro = r.gols_contra THEN 1 ELSE 0 END),
+                SUM(CASE WHEN r.gols_pro < r.gols_contra THEN 1 ELSE 0 END),
+                SUM(r.gols_pro),
+                SUM(r.gols_contra),
+                SUM(CASE WHEN r.gols_pro > r.gols_contra THEN 3 WHEN r.gols_pro = r.gols_contra THEN 1 ELSE 0 END)
+            FROM (
+                SELECT tpc.fk_time, p.placar_time_casa AS gols_pro, p.placar_time_visitante AS gols_contra
+                FROM partida AS p
+                JOIN time_partida AS tpc ON tpc.fk_partida = p.id_partida AND tpc.casa_visitante = 'C'
+                JOIN time_partida AS tpv ON tpv.fk_partida = p.id_partida AND tpv.casa_visitante = 'V'
+                WHERE p.placar_time_casa IS NOT NULL AND p.placar_time_visitante IS NOT NULL
+                UNION ALL
+                SELECT tpv.fk_time, p.placar_time_visitante, p.placar_time_casa
+                FROM partida AS p
+                JOIN time_partida AS tpc ON tpc.fk_partida = p.id_partida AND tpc.casa_visitante = 'C'
+                JOIN time_partida AS tpv ON tpv.fk_partida = p.id_partida AND tpv.casa_visitante = 'V'
+                WHERE p.placar_time_casa IS NOT NULL AND p.placar_time_visitante IS NOT NULL
+            ) AS r
+            JOIN time AS t ON t.id_time = r.fk_time
+            GROUP BY r.fk_time
+            """
+        )
+    )
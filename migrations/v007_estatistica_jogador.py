@@ -0,0 +1,43 @@
+from sqlalchemy import text
+
+VERSION = 7
+DESCRIPTION = 'Estatísticas de presença por jogador e time (estatistica_jogador)'
+
+
+def upgrade(conn) -> None:
+    conn.execute(
+        text(
+            """
+            CREATE TABLE IF NOT EXISTS estatistica_jogador (
+                fk_time INT NOT NULL,
+                fk_usuario INT NOT NULL,
+                confirmados INT NOT NULL DEFAULT 0,
+                duvidas INT NOT NULL DEFAULT 0,
+                recusados INT NOT NULL DEFAULT 0,
+                jogos INT NOT NULL DEFAULT 0,
+                PRIMARY KEY (fk_time, fk_usuario),
+                INDEX idx_estatistica_jogador_usuario (fk_usuario)
+            )
+            """
+        )
+    )
+    # Carga inicial a partir das presenças e placares já registrados (idempotente)
+    conn.execute(text("DELETE FROM estatistica_jogador"))
+    conn.execute(
+        text(
+            """
+            INSERT INTO estatistica_jogador (fk_time, fk_usuario, confirmados, duvidas, recusados, jogos)
+            SELECT tm.fk_time, tm.fk_usuario,
+                SUM(CASE WHEN pp.status = 'Confirmado' THEN 1 ELSE 0 END),
+                SUM(CASE WHEN pp.status = 'Duvida' THEN 1 ELSE 0 END),
+                SUM(CASE WHEN pp.status = 'Recusado' THEN 1 ELSE 0 END),
+                SUM(CASE WHEN pp.status = 'Confirmado' AND p.placar_time_casa IS NOT NULL
+                         AND p.placar_time_visitante IS NOT NULL THEN 1 ELSE 0 END)
+            FROM time_membros AS tm
+            JOIN time_partida AS tp ON tp.fk_time = tm.fk_time
+            JOIN partida_presenca AS pp ON pp.fk_partida = tp.fk_partida AND pp.fk_usuario = tm.fk_usuario
+            JOIN partida AS p ON p.id_partida = pp.fk_partida
+            GROUP BY tm.fk_time, tm.fk_usuario
+            """
+        )
+    )
@@ -0,0 +1,26 @@
+from sqlalchemy import text
+
+VERSION = 8
+DESCRIPTION = 'Outbox transacional de eventos de partidas (outbox)'
+
+
+def upgrade(conn) -> None:
+    conn.execute(
+        text(
+            """
+            CREATE TABLE IF NOT EXISTS outbox (
+                id_evento BIGINT AUTO_INCREMENT PRIMARY KEY,
+                tipo VARCHAR(50) NOT NULL,
+                payload JSON NOT NULL,
+                status ENUM('pendente', 'processado', 'falhou') NOT NULL DEFAULT 'pendente',
+                tentativas INT NOT NULL DEFAULT 0,
+                ultimo_erro VARCHAR(500) NULL,
+                criado_em DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+                disponivel_em DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+                processado_em DATETIME(6) NULL,
+                INDEX idx_outbox_fila (status, disponivel_em, id_evento),
+                INDEX idx_outbox_processado (status, processado_em)
+            )
+            """
+        )
+    )
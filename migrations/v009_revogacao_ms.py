@@ -0,0 +1,9 @@
+from sqlalchemy import text
+
+VERSION = 9
+DESCRIPTION = 'Revogação de tokens em milissegundos (token_revogacao.revogado_em)'
+
+
+def upgrade(conn) -> None:
+    # Valores em segundos (< 1e11) passam a milissegundos; idempotente
+    conn.execute(text("UPDATE token_revogacao SET revogado_em = revogado_em * 1000 WHERE revogado_em < 100000000000"))
@@ -0,0 +1,8 @@
+from sqlalchemy import text
+
+VERSION = 10
+DESCRIPTION = 'Versão própria para os contadores de presença (ETag de GET /partidas)'
+
+
+def upgrade(conn) -> None:
+    conn.execute(text("INSERT IGNORE INTO tabela_versao (tabela) VALUES ('partida_presenca_resumo')"))
@@ -0,0 +1,19 @@
+from migrations import create_index_if_missing
+
+VERSION = 11
+DESCRIPTION = 'Garante os índices UNIQUE da v002 (antes aceitos como índice comum)'
+
+# (tabela, nome, colunas) — a v002 dava por existente qualquer índice com as
+# mesmas colunas iniciais, mesmo sem UNIQUE; aqui só vale um índice único
+UNIQUE_INDEXES = [
+    ('usuario', 'uq_usuario_email', ['email']),
+    ('time_membros', 'uq_time_membros_camisa', ['fk_time', 'numero_camisa']),
+    # chave do upsert de presença (ON DUPLICATE KEY UPDATE)
+    ('partida_presenca', 'idx_partida_presenca_partida_usuario', ['fk_partida', 'fk_usuario']),
+    ('local_excecoes', 'uq_local_excecoes_local_data', ['fk_local', 'data_excecao']),
+]
+
+
+def upgrade(conn) -> None:
+    for table, name, columns in UNIQUE_INDEXES:
+        create_index_if_missing(conn, table, name, columns, unique=True)
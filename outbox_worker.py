@@ -0,0 +1,183 @@
+"""Worker do outbox transacional (`flask outbox ...`).
+
+`create_partida`, `cancel_partida` e `register_score` (e os agendamentos em
+lote) gravam eventos em `outbox` na própria transação; efeitos colaterais
+como notificações ficam nos handlers, fora do caminho da requisição.
+
+Cada lote é reservado com `FOR UPDATE SKIP LOCKED`, os handlers rodam e o
+resultado é gravado na mesma transação. Se o worker cair no meio, a
+transação reverte e o lote volta para a fila: a entrega é "pelo menos uma
+vez", então os handlers devem ser idempotentes (use `id_evento` para
+deduplicar). Um handler que falha faz o evento voltar após um backoff
+exponencial com jitter; depois de `OUTBOX_MAX_TENTATIVAS` o evento fica com
+status 'falhou' e `ultimo_erro`.
+
+Handlers são registrados por tipo com `@handler('partida_cancelada')`; a
+função recebe `(id_evento, payload)`. Tipos sem handler são marcados como
+processados.
+"""
+import logging
+import random
+import signal
+import time as _time
+
+import click
+from flask.cli import AppGroup
+
+import metrics
+from config import (
+    OUTBOX_BACKOFF_BASE_SECONDS,
+    OUTBOX_BACKOFF_MAX_SECONDS,
+    OUTBOX_INTERVALO_SECONDS,
+    OUTBOX_LOTE,
+    OUTBOX_MAX_TENTATIVAS,
+    OUTBOX_METRICAS_SECONDS,
+)
+from db import get_connection
+from repository import outbox
+
+logger = logging.getLogger(__name__)
+
+# Teto da espera entre tentativas quando o próprio lote falha (banco fora do ar)
+ESPERA_MAXIMA_FALHA_SECONDS = 60.0
+
+HANDLERS = {}
+
+outbox_cli = AppGroup('outbox', help='Entrega dos eventos gravados no outbox.')
+
+
+def handler(tipo: str):
+    """Registra a função decorada como handler de `tipo` (pode haver vários por tipo)."""
+    def registrar(func):
+        HANDLERS.setdefault(tipo, []).append(func)
+        return func
+    return registrar
+
+
+@handler(outbox.PARTIDA_CRIADA)
+@handler(outbox.PARTIDA_CANCELADA)
+@handler(outbox.PLACAR_REGISTRADO)
+def _registrar_no_log(id_evento: int, payload: dict) -> None:
+    logger.info(f'outbox {id_evento}: {payload}')
+
+
+def backoff(tentativas: int, base: float, maximo: float, rand=random.random) -> float:
+    """Espera antes da próxima tentativa: `base * 2^(tentativas-1)`, limitada a `maximo`,
+    com jitter entre 50% e 100% para não sincronizar workers."""
+    espera = min(maximo, base * 2 ** (tentativas - 1))
+    return espera * (0.5 + rand() / 2)
+
+
+def processar_lote(conn, handlers=None, lote: int = OUTBOX_LOTE, max_tentativas: int = OUTBOX_MAX_TENTATIVAS) -> int:
+    """Reserva e entrega um lote numa transação; retorna quantos eventos foram reservados."""
+    handlers = HANDLERS if handlers is None else handlers
+    with conn.begin():
+        eventos = outbox.reservar(conn, lote)
+        entregues = []
+        for evento in eventos:
+            dados = evento._mapping
+            try:
+                for func in handlers.get(dados['tipo'], ()):
+                    func(dados['id_evento'], outbox.payload(evento))
+            except Exception as e:
+                tentativas = dados['tentativas'] + 1
+                desistir = tentativas >= max_tentativas
+                espera = backoff(tentativas, OUTBOX_BACKOFF_BASE_SECONDS, OUTBOX_BACKOFF_MAX_SECONDS)
+                outbox.reagendar(conn, dados['id_evento'], tentativas, espera, f'{type(e).__name__}: {e}', desistir)
+                metrics.OUTBOX_EVENTOS.labels(dados['tipo'], 'descartado' if desistir else 'erro').inc()
+                logger.warning(f"outbox {dados['id_evento']} ({dados['tipo']}) falhou na tentativa {tentativas}: {e}")
+                continue
+            entregues.append(dados['id_evento'])
+            metrics.OUTBOX_EVENTOS.labels(dados['tipo'], 'entregue').inc()
+            metrics.OUTBOX_ATRASO.labels(dados['tipo']).observe(float(dados['atraso']))
+        outbox.marcar_processados(conn, entregues)
+    return len(eventos)
+
+
+def atualizar_fila(conn) -> tuple:
+    """Atualiza os gauges de fila do worker; retorna `(pendentes, atraso_maximo)`."""
+    with conn.begin():
+        pendentes, atraso = outbox.pendencias(conn)
+    metrics.OUTBOX_PENDENTES.set(pendentes)
+    metrics.OUTBOX_ATRASO_MAXIMO.set(atraso)
+    return pendentes, atraso
+
+
+@outbox_cli.command('processar')
+@click.option('--lote', type=int, default=OUTBOX_LOTE, show_default=True, help='Eventos por transação.')
+@click.option('--uma-vez', is_flag=True, help='Esvazia o que estiver disponível e sai (ex.: cron).')
+@click.option('--metrics-port', type=int, default=None,
+              help='Expõe as métricas do worker em http://0.0.0.0:<porta>/ (sem PROMETHEUS_MULTIPROC_DIR).')
+def processar_command(lote, uma_vez, metrics_port):
+    """Entrega os eventos pendentes; roda até receber SIGTERM/SIGINT.
+
+    Uma falha de banco (conexão perdida, deadlock) reverte só o lote da vez:
+    o worker registra o erro, espera com backoff e segue com outra conexão
+    do pool. Com `--uma-vez` a falha encerra o comando com erro.
+    """
+    if metrics_port:
+        from prometheus_client import start_http_server
+        start_http_server(metrics_port)
+
+    parar = []
+    signal.signal(signal.SIGTERM, lambda *_: parar.append(True))
+
+    total = 0
+    falhas = 0
+    proxima_metrica = _time.monotonic()
+    try:
+        while not parar:
+            try:
+                with get_connection() as conn:
+                    reservados = processar_lote(conn, lote=lote)
+                    total += reservados
+                    # Por relógio, não por lote curto: com backlog os lotes vêm
+                    # sempre cheios e é justamente quando os gauges importam
+                    if _time.monotonic() >= proxima_metrica:
+                        atualizar_fila(conn)
+                        proxima_metrica = _time.monotonic() + OUTBOX_METRICAS_SECONDS
+            except Exception as e:
+                if uma_vez:
+                    raise click.ClickException(f'Falha ao processar o outbox: {e}')
+                falhas += 1
+                espera = backoff(falhas, OUTBOX_INTERVALO_SECONDS, ESPERA_MAXIMA_FALHA_SECONDS)
+                logger.exception(f'Falha no lote do outbox ({falhas} seguida(s)); nova tentativa em {espera:.1f}s.')
+                _time.sleep(espera)
+                continue
+
+            falhas = 0
+            if reservados < lote:
+                if uma_vez:
+                    break
+                if not reservados:
+                    _time.sleep(OUTBOX_INTERVALO_SECONDS)
+    except KeyboardInterrupt:
+        pass
+    click.echo(f'{total} evento(s) tratado(s).')
+
+
+@outbox_cli.command('status')
+def status_command():
+    """Mostra quantos eventos estão pendentes e a idade do mais antigo."""
+    from db import engine
+
+    with engine.connect() as conn:
+        pendentes, atraso = atualizar_fila(conn)
+    click.echo(f'{pendentes} pendente(s); o mais antigo há {atraso:.1f}s.')
+
+
+@outbox_cli.command('limpar')
+@click.option('--dias', type=int, default=7, show_default=True, help='Apaga os processados há mais de N dias.')
+def limpar_command(dias):
+    """Remove eventos já processados (os com status 'falhou' ficam para análise)."""
+    from db import engine
+
+    removidos = 0
+    with engine.connect() as conn:
+        while True:
+            apagados = outbox.limpar(conn, dias)
+            conn.commit()
+            removidos += apagados
+            if not apagados:
+                break
+    click.echo(f'{removidos} evento(s) removido(s).')
@@ -0,0 +1,129 @@
+import base64
+import json
+from datetime import date, datetime
+from urllib.parse import urlencode
+
+from config import PAGE_SIZE_DEFAULT, PAGE_SIZE_MAX
+
+
+class PaginationError(ValueError):
+    """Parâmetros de paginação ou filtro inválidos (vira resposta 400 nas rotas)."""
+
+
+def encode_cursor(values) -> str:
+    raw = [v.isoformat() if isinstance(v, (datetime, date)) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(raw, separators=(',', ':')).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, key_types) -> list:
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        raw = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if not isinstance(raw, list) or len(raw) != len(key_types):
+            raise ValueError
+        return [convert(v) for convert, v in zip(key_types, raw)]
+    except (ValueError, TypeError):
+        raise PaginationError('Cursor de paginação inválido.')
+
+
+class Page:
+    """Paginação por keyset (cursor) com `limit`, `after` e `before`.
+
+    O custo de cada página depende só de `limit`: a consulta começa do
+    ponto indicado pelo cursor via índice, sem OFFSET. Os cursores da
+    página seguinte/anterior voltam nos cabeçalhos `X-Next-Cursor`,
+    `X-Prev-Cursor` e `Link`, mantendo o corpo da resposta como lista.
+    """
+
+    def __init__(self, limit: int, after=None, before=None):
+        self.limit = limit
+        self.after = after
+        self.before = before
+        self.next_cursor = None
+        self.prev_cursor = None
+
+    @classmethod
+    def from_request(cls, args, key_types) -> 'Page':
+        try:
+            limit = int(args.get('limit', PAGE_SIZE_DEFAULT))
+        except (TypeError, ValueError):
+            raise PaginationError("'limit' deve ser um número inteiro.")
+        if limit < 1 or limit > PAGE_SIZE_MAX:
+            raise PaginationError(f"'limit' deve estar entre 1 e {PAGE_SIZE_MAX}.")
+
+        after = args.get('after')
+        before = args.get('before')
+        if after and before:
+            raise PaginationError("Use apenas um entre 'after' e 'before'.")
+
+        return cls(
+            limit,
+            after=decode_cursor(after, key_types) if after else None,
+            before=decode_cursor(before, key_types) if before else None,
+        )
+
+    @classmethod
+    def for_stream(cls, args, key_types) -> 'Page':
+        """Modo streaming: sem `limit`, do cursor `after` (se houver) até o fim."""
+        if args.get('before'):
+            raise PaginationError("'before' não é suportado no modo streaming.")
+        after = args.get('after')
+        return cls(None, after=decode_cursor(after, key_types) if after else None)
+
+    def keyset_sql(self, select_sql: str, where: list, params: dict, key_columns) -> tuple:
+        """Completa `select_sql` com WHERE, ORDER BY e LIMIT (se houver) para esta página."""
+        where = list(where)
+        params = dict(params)
+
+        cursor = self.after or self.before
+        if cursor is not None:
+            op = '>' if self.after is not None else '<'
+            for i, value in enumerate(cursor):
+                params[f'_k{i}'] = value
+            # (c1 > :k0) OR (c1 = :k0 AND c2 > :k1) ... — forma expandida, amigável ao índice
+            alternatives = []
+            for i, column in enumerate(key_columns):
+                terms = [f'{key_columns[j]} = :_k{j}' for j in range(i)]
+                terms.append(f'{column} {op} :_k{i}')
+                alternatives.append('(' + ' AND '.join(terms) + ')')
+            where.append('(' + ' OR '.join(alternatives) + ')')
+
+        direction = 'DESC' if self.before is not None else 'ASC'
+        sql = select_sql
+        if where:
+            sql += '\nWHERE ' + '\n  AND '.join(where)
+        sql += '\nORDER BY ' + ', '.join(f'{c} {direction}' for c in key_columns)
+        if self.limit is not None:
+            sql += f'\nLIMIT {self.limit + 1}'
+        return sql, params
+
+    def split(self, rows, key) -> list:
+        """Descarta a linha extra, reordena e calcula os cursores de vizinhança."""
+        rows = list(rows)
+        has_more = len(rows) > self.limit
+        rows = rows[:self.limit]
+        if self.before is not None:
+            rows.reverse()
+
+        if rows:
+            first = encode_cursor(key(rows[0]))
+            last = encode_cursor(key(rows[-1]))
+            if self.before is not None:
+                self.prev_cursor = first if has_more else None
+                self.next_cursor = last
+            else:
+                self.prev_cursor = first if self.after is not None else None
+                self.next_cursor = last if has_more else None
+        return rows
+
+    def apply_headers(self, response, base_url: str, args) -> None:
+        query = {k: v for k, v in args.items() if k not in ('after', 'before')}
+        links = []
+        if self.next_cursor:
+            response.headers['X-Next-Cursor'] = self.next_cursor
+            links.append(f'<{base_url}?{urlencode({**query, "after": self.next_cursor})}>; rel="next"')
+        if self.prev_cursor:
+            response.headers['X-Prev-Cursor'] = self.prev_cursor
+            links.append(f'<{base_url}?{urlencode({**query, "before": self.prev_cursor})}>; rel="prev"')
+        if links:
+            response.headers['Link'] = ', '.join(links)
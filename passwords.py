@@ -0,0 +1,75 @@
+"""Hash e verificação de senhas em um pool de threads limitado.
+
+As funções de KDF (scrypt/pbkdf2) são lentas de propósito e liberam o GIL.
+Executá-las em um pool com `PASSWORD_POOL_WORKERS` threads limita quantos
+núcleos uma rajada de logins consegue ocupar; com mais de
+`PASSWORD_POOL_QUEUE` pedidos aguardando, novos pedidos falham na hora com
+`HashPoolSaturated` (HTTP 503) em vez de enfileirar e travar os workers.
+
+Nos workers gevent (`gunicorn.conf.py`) as threads do `ThreadPoolExecutor`
+viram greenlets e o KDF travaria o loop de eventos; com `threading`
+patcheado o pool usa o executor do gevent, que roda em threads nativas.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from functools import lru_cache
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from config import PASSWORD_HASH_METHOD, PASSWORD_POOL_QUEUE, PASSWORD_POOL_TIMEOUT, PASSWORD_POOL_WORKERS
+
+
+def _criar_executor():
+    try:
+        from gevent import monkey
+    except ImportError:
+        monkey = None
+    if monkey is not None and monkey.is_module_patched('threading'):
+        from gevent.threadpool import ThreadPoolExecutor as NativeThreadPoolExecutor
+        return NativeThreadPoolExecutor(max_workers=PASSWORD_POOL_WORKERS)
+    return ThreadPoolExecutor(max_workers=PASSWORD_POOL_WORKERS, thread_name_prefix='hash-senha')
+
+
+_executor = _criar_executor()
+_slots = threading.BoundedSemaphore(PASSWORD_POOL_WORKERS + PASSWORD_POOL_QUEUE)
+
+
+class HashPoolSaturated(RuntimeError):
+    """O pool de hashing está cheio (ou não respondeu a tempo)."""
+
+
+def _run(fn, *args):
+    if not _slots.acquire(blocking=False):
+        raise HashPoolSaturated('Pool de hashing de senhas saturado.')
+
+    try:
+        future = _executor.submit(fn, *args)
+    except Exception:
+        _slots.release()
+        raise
+    future.add_done_callback(lambda _: _slots.release())
+
+    try:
+        return future.result(timeout=PASSWORD_POOL_TIMEOUT)
+    except TimeoutError:
+        raise HashPoolSaturated('Tempo esgotado aguardando o pool de hashing de senhas.')
+
+
+def hash_password(senha: str) -> str:
+    return _run(generate_password_hash, senha, PASSWORD_HASH_METHOD)
+
+
+def verify_password(hash_senha: str, senha: str) -> bool:
+    return _run(check_password_hash, hash_senha, senha)
+
+
+@lru_cache(maxsize=1)
+def _configured_method() -> str:
+    # O werkzeug completa parâmetros omitidos (ex.: 'pbkdf2:sha256' -> iterações padrão);
+    # gerar um hash de referência uma vez dá o prefixo exato a comparar.
+    return generate_password_hash('', PASSWORD_HASH_METHOD).split('$', 1)[0]
+
+
+def needs_rehash(hash_senha: str) -> bool:
+    """Indica se o hash armazenado usa método/custo diferentes dos configurados."""
+    return hash_senha.split('$', 1)[0] != _configured_method()
@@ -0,0 +1,99 @@
+"""Instrumentação de SQL por requisição: contagem, tempo total e consulta mais lenta.
+
+Os números voltam no header `Server-Timing` e comandos acima de
+`slow_query_ms` vão para o logger `futplan.slow_query`, com os valores dos
+parâmetros substituídos pelo tipo. Com a instrumentação desligada nenhum
+listener é registrado, então o custo por consulta é zero.
+"""
+import logging
+import time
+
+from flask import g, has_request_context
+from sqlalchemy import event
+
+slow_query_logger = logging.getLogger('futplan.slow_query')
+
+
+class RequestQueryStats:
+    __slots__ = ('count', 'total_seconds', 'slowest_seconds', 'slowest_statement')
+
+    def __init__(self):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_statement = None
+
+    def add(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.total_seconds += seconds
+        if seconds > self.slowest_seconds:
+            self.slowest_seconds = seconds
+            self.slowest_statement = statement
+
+    def server_timing(self) -> str:
+        return (
+            f'db;desc="{self.count} consulta(s)";dur={self.total_seconds * 1000:.2f}, '
+            f'db-max;dur={self.slowest_seconds * 1000:.2f}'
+        )
+
+
+def redact(parameters):
+    """Troca cada valor pelo nome do tipo; nomes dos parâmetros são mantidos."""
+    if isinstance(parameters, dict):
+        return {name: f'<{type(value).__name__}>' for name, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            return f'{len(parameters)} linha(s), ex.: {redact(parameters[0])}'
+        return [f'<{type(value).__name__}>' for value in parameters]
+    return parameters
+
+
+def current_stats():
+    """Estatísticas da requisição atual, ou None fora de requisição/instrumentação."""
+    return g.get('_query_stats') if has_request_context() else None
+
+
+class QueryTimer:
+    """Instrumenta `engines` (o primário e as réplicas de leitura)."""
+
+    def __init__(self, engines, slow_query_ms: float):
+        self.engines = list(engines)
+        self.slow_query_seconds = slow_query_ms / 1000
+
+    def install(self, app) -> None:
+        for engine in self.engines:
+            event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+
+    # O início fica no contexto de execução, que morre com o comando: se ele
+    # falhar, `after_cursor_execute` não roda e nada sobra na conexão do pool
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        context._query_start = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._query_start
+
+        stats = current_stats()
+        if stats is not None:
+            stats.add(statement, elapsed)
+
+        if elapsed >= self.slow_query_seconds:
+            slow_query_logger.warning(
+                'Consulta lenta (%.1f ms): %s | parâmetros: %s',
+                elapsed * 1000, ' '.join(statement.split()), redact(parameters),
+            )
+
+    def _start_request(self):
+        g._query_stats = RequestQueryStats()
+
+    def _finish_request(self, response):
+        stats = current_stats()
+        if stats is not None and stats.count:
+            response.headers.add('Server-Timing', stats.server_timing())
+            slow_query_logger.debug(
+                'Consulta mais lenta da requisição (%.1f ms): %s',
+                stats.slowest_seconds * 1000, ' '.join(stats.slowest_statement.split()),
+            )
+        return response
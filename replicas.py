@@ -0,0 +1,156 @@
+"""Roteamento das rotas somente leitura para réplicas.
+
+As rotas de listagem/detalhe usam `get_read_connection()` em vez de
+`get_connection()`. Sem `DB_REPLICA_URLS` as duas são equivalentes. Com
+réplicas:
+
+- a réplica é escolhida em rodízio e fixada em `g` para toda a requisição
+  (a versão da ETag e os dados vêm do mesmo servidor);
+- depois de uma escrita bem-sucedida (método diferente de GET/HEAD/OPTIONS
+  com status 2xx/3xx) o usuário lê do primário por `REPLICA_STICKY_SECONDS`.
+  O prazo fica no cache do processo e num cookie, para valer também nos
+  outros workers;
+- uma réplica que falha ao conectar fica fora do rodízio por
+  `REPLICA_RETRY_SECONDS` e a leitura segue para a próxima ou o primário.
+
+Cada réplica tem seu `PoolMetrics` (`db.pools`, nomes `replica0`, ...), então
+entra nas métricas do pool e na instrumentação de SQL como o primário.
+"""
+import itertools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import g, has_request_context, request
+
+from cache import TTLCache
+from config import DB_REPLICA_URLS, REPLICA_RETRY_SECONDS, REPLICA_STICKY_SECONDS
+from db import create_pooled_engine, get_connection, register_pool
+
+logger = logging.getLogger(__name__)
+
+STICKY_COOKIE = 'futplan_primario_ate'
+_READ_ONLY_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class ReadRouter:
+    """Rodízio entre `replicas` (objetos com `checkout()`, como `PoolMetrics`)."""
+
+    def __init__(self, replicas, sticky_seconds: float, retry_seconds: float, timer=time.time):
+        self.replicas = list(replicas)
+        self.sticky_seconds = sticky_seconds
+        self.retry_seconds = retry_seconds
+        self.timer = timer
+        self._pinned = TTLCache(maxsize=100_000, ttl=sticky_seconds, timer=timer)
+        self._down_until = {}
+        self._next = itertools.cycle(range(len(self.replicas))) if self.replicas else None
+        self._lock = threading.Lock()
+
+    # --- leitura das próprias escritas ------------------------------------
+
+    def pin(self, id_usuario) -> float:
+        until = self.timer() + self.sticky_seconds
+        self._pinned.set(id_usuario, until)
+        return until
+
+    def is_pinned(self, id_usuario, cookie_value=None) -> bool:
+        if id_usuario is not None and self._pinned.get(id_usuario) is not None:
+            return True
+        try:
+            return cookie_value is not None and float(cookie_value) > self.timer()
+        except ValueError:
+            return False
+
+    # --- saúde das réplicas -----------------------------------------------
+
+    def mark_down(self, indice: int) -> None:
+        with self._lock:
+            self._down_until[indice] = self.timer() + self.retry_seconds
+
+    def healthy(self, indice: int) -> bool:
+        return self._down_until.get(indice, 0) <= self.timer()
+
+    def candidates(self) -> list:
+        """Índices das réplicas saudáveis, a partir da próxima do rodízio."""
+        if not self.replicas:
+            return []
+        with self._lock:
+            inicio = next(self._next)
+        ordem = [(inicio + i) % len(self.replicas) for i in range(len(self.replicas))]
+        return [i for i in ordem if self.healthy(i)]
+
+    def connect_replica(self):
+        """Abre uma conexão numa réplica saudável; None se nenhuma responder."""
+        for indice in self.candidates():
+            try:
+                return indice, self.replicas[indice].checkout()
+            except Exception as e:
+                logger.warning(f'Réplica {indice} indisponível, fora do rodízio por {self.retry_seconds:.0f}s: {e}')
+                self.mark_down(indice)
+        return None, None
+
+
+read_router = ReadRouter(
+    [register_pool(f'replica{i}', create_pooled_engine(url)) for i, url in enumerate(DB_REPLICA_URLS)],
+    sticky_seconds=REPLICA_STICKY_SECONDS,
+    retry_seconds=REPLICA_RETRY_SECONDS,
+)
+
+
+def _use_primary() -> bool:
+    if not read_router.replicas:
+        return True
+    if not has_request_context():
+        return False
+    return read_router.is_pinned(g.get('id_usuario'), request.cookies.get(STICKY_COOKIE))
+
+
+@contextmanager
+def get_read_connection():
+    """Como `get_connection()`, mas numa réplica quando possível (somente leitura)."""
+    if _use_primary():
+        with get_connection() as conn:
+            yield conn
+        return
+
+    preferida = g.get('_replica') if has_request_context() else None
+    conn = None
+    if preferida is not None and read_router.healthy(preferida):
+        try:
+            conn = read_router.replicas[preferida].checkout()
+        except Exception:
+            read_router.mark_down(preferida)
+    if conn is None:
+        preferida, conn = read_router.connect_replica()
+        if conn is not None and has_request_context():
+            g._replica = preferida
+
+    if conn is None:  # nenhuma réplica saudável: failover para o primário
+        with get_connection() as conn:
+            yield conn
+        return
+
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def _pin_after_write(response):
+    if (
+        request.method not in _READ_ONLY_METHODS
+        and 200 <= response.status_code < 400
+        and g.get('id_usuario') is not None
+    ):
+        until = read_router.pin(g.id_usuario)
+        response.set_cookie(
+            STICKY_COOKIE, f'{until:.3f}', max_age=int(read_router.sticky_seconds) + 1,
+            httponly=True, samesite='Lax',
+        )
+    return response
+
+
+def install(app) -> None:
+    if read_router.replicas:
+        app.after_request(_pin_after_write)
@@ -0,0 +1,20 @@
+"""Camada de acesso a dados: cada comando SQL da aplicação, montado uma única vez.
+
+Os módulos `usuarios`, `times`, `locais`, `partidas`, `classificacao` e
+`estatisticas` expõem funções tipadas que recebem a conexão (ou transação)
+aberta pela rota. Os textos fixos são `text()` criados na importação; os
+UPDATE com campos opcionais usam `update()` do Core sobre as tabelas de
+`tabelas`, e cada combinação de colunas é compilada uma vez e reaproveitada
+pelo cache de compilação do SQLAlchemy. É o lugar único para ajustar
+consultas (e o que `flask db explain` examina).
+"""
+from functools import lru_cache
+
+from sqlalchemy import text
+
+
+@lru_cache(maxsize=256)
+def cached_text(sql: str):
+    """`text()` reaproveitado para SQL montado em tempo de execução com poucas formas
+    possíveis (ex.: as variações de página/filtro de `Page.keyset_sql`)."""
+    return text(sql)
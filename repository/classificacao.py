@@ -0,0 +1,147 @@
+"""Classificação materializada (`classificacao`, migração v006).
+
+Cada placar registrado entra como delta nas linhas dos dois times; trocar o
+placar subtrai o resultado anterior antes de somar o novo e cancelar a
+partida subtrai o resultado. A leitura é uma varredura de uma linha por time.
+"""
+from typing import Optional
+
+from sqlalchemy import text
+
+from db import insert_many
+
+PONTOS_VITORIA = 3
+PONTOS_EMPATE = 1
+
+COLUNAS = ('jogos', 'vitorias', 'empates', 'derrotas', 'gols_pro', 'gols_contra', 'pontos')
+
+_LISTAR = text(
+    """
+    SELECT
+        c.fk_time AS id_time,
+        t.nome_time,
+        c.pontos,
+        c.jogos,
+        c.vitorias,
+        c.empates,
+        c.derrotas,
+        c.gols_pro,
+        c.gols_contra,
+        c.gols_pro - c.gols_contra AS saldo
+    FROM classificacao AS c
+    JOIN time AS t ON c.fk_time = t.id_time
+    ORDER BY c.pontos DESC, c.vitorias DESC, saldo DESC, c.gols_pro DESC, t.nome_time
+"""
+)
+
+# Resultado de cada time em cada partida com placar completo, dos dois lados
+CALCULADA_SELECT = f"""
+    SELECT
+        r.fk_time,
+        COUNT(*) AS jogos,
+        SUM(CASE WHEN r.gols_pro > r.gols_contra THEN 1 ELSE 0 END) AS vitorias,
+        SUM(CASE WHEN r.gols_pro = r.gols_contra THEN 1 ELSE 0 END) AS empates,
+        SUM(CASE WHEN r.gols_pro < r.gols_contra THEN 1 ELSE 0 END) AS derrotas,
+        SUM(r.gols_pro) AS gols_pro,
+        SUM(r.gols_contra) AS gols_contra,
+        SUM(CASE WHEN r.gols_pro > r.gols_contra THEN {PONTOS_VITORIA}
+                 WHEN r.gols_pro = r.gols_contra THEN {PONTOS_EMPATE} ELSE 0 END) AS pontos
+    FROM (
+        SELECT tpc.fk_time, p.placar_time_casa AS gols_pro, p.placar_time_visitante AS gols_contra
+        FROM partida AS p
+        JOIN time_partida AS tpc ON tpc.fk_partida = p.id_partida AND tpc.casa_visitante = 'C'
+        JOIN time_partida AS tpv ON tpv.fk_partida = p.id_partida AND tpv.casa_visitante = 'V'
+        WHERE p.placar_time_casa IS NOT NULL AND p.placar_time_visitante IS NOT NULL
+        UNION ALL
+        SELECT tpv.fk_time, p.placar_time_visitante, p.placar_time_casa
+        FROM partida AS p
+        JOIN time_partida AS tpc ON tpc.fk_partida = p.id_partida AND tpc.casa_visitante = 'C'
+        JOIN time_partida AS tpv ON tpv.fk_partida = p.id_partida AND tpv.casa_visitante = 'V'
+        WHERE p.placar_time_casa IS NOT NULL AND p.placar_time_visitante IS NOT NULL
+    ) AS r
+    JOIN time AS t ON t.id_time = r.fk_time
+    GROUP BY r.fk_time
+"""
+
+_CALCULADA = text(CALCULADA_SELECT)
+_MATERIALIZADA = text(f"SELECT fk_time, {', '.join(COLUNAS)} FROM classificacao")
+_LIMPAR = text("DELETE FROM classificacao")
+_RECALCULAR = text(f"INSERT INTO classificacao (fk_time, {', '.join(COLUNAS)}) {CALCULADA_SELECT}")
+_EXCLUIR_TIME = text("DELETE FROM classificacao WHERE fk_time = :id_time")
+
+
+def linha_resultado(gols_pro: int, gols_contra: int, sinal: int = 1) -> dict:
+    """Contribuição de um resultado para a linha de um time (`sinal=-1` para desfazer)."""
+    vitoria, empate = gols_pro > gols_contra, gols_pro == gols_contra
+    pontos = PONTOS_VITORIA if vitoria else PONTOS_EMPATE if empate else 0
+    valores = (1, int(vitoria), int(empate), int(gols_pro < gols_contra), gols_pro, gols_contra, pontos)
+    return {coluna: sinal * valor for coluna, valor in zip(COLUNAS, valores)}
+
+
+def deltas(id_time_casa: int, id_time_visitante: int, antigo: Optional[tuple], novo: Optional[tuple]) -> dict:
+    """`{id_time: {coluna: delta}}` para trocar o placar `antigo` por `novo`.
+
+    Placares são `(gols_casa, gols_visitante)`; None significa sem resultado.
+    Times sem variação não aparecem.
+    """
+    por_time = {id_time_casa: dict.fromkeys(COLUNAS, 0), id_time_visitante: dict.fromkeys(COLUNAS, 0)}
+    for placar, sinal in ((antigo, -1), (novo, 1)):
+        if placar is None:
+            continue
+        gols_casa, gols_visitante = placar
+        for id_time, linha in ((id_time_casa, linha_resultado(gols_casa, gols_visitante, sinal)),
+                               (id_time_visitante, linha_resultado(gols_visitante, gols_casa, sinal))):
+            for coluna, valor in linha.items():
+                por_time[id_time][coluna] += valor
+    return {id_time: delta for id_time, delta in por_time.items() if any(delta.values())}
+
+
+def aplicar(conn, id_time_casa: int, id_time_visitante: int, antigo: Optional[tuple], novo: Optional[tuple]) -> bool:
+    """Aplica a troca de resultado às linhas dos dois times; True se algo mudou."""
+    variacao = deltas(id_time_casa, id_time_visitante, antigo, novo)
+    if not variacao:
+        return False
+    insert_many(
+        conn,
+        "classificacao",
+        ["fk_time", *COLUNAS],
+        [{"fk_time": id_time, **delta} for id_time, delta in variacao.items()],
+        suffix="ON DUPLICATE KEY UPDATE " + ", ".join(f"{c} = {c} + VALUES({c})" for c in COLUNAS),
+    )
+    return True
+
+
+def listar(conn) -> list:
+    return conn.execute(_LISTAR).all()
+
+
+def excluir_time(conn, id_time: int) -> None:
+    conn.execute(_EXCLUIR_TIME, {"id_time": id_time})
+
+
+def recalcular(conn) -> None:
+    """Refaz a tabela inteira a partir de `partida` e `time_partida`."""
+    conn.execute(_LIMPAR)
+    conn.execute(_RECALCULAR)
+
+
+def divergencias(conn) -> list:
+    """Compara a tabela materializada com o cálculo direto sobre `partida`.
+
+    Retorna `(id_time, materializada, calculada)` para cada time que difere;
+    linhas zeradas contam como ausentes.
+    """
+    def por_time(query):
+        linhas = {}
+        for row in conn.execute(query):
+            valores = tuple(int(row._mapping[c] or 0) for c in COLUNAS)
+            if any(valores):
+                linhas[row._mapping["fk_time"]] = dict(zip(COLUNAS, valores))
+        return linhas
+
+    materializada, calculada = por_time(_MATERIALIZADA), por_time(_CALCULADA)
+    return [
+        (id_time, materializada.get(id_time), calculada.get(id_time))
+        for id_time in sorted(materializada.keys() | calculada.keys())
+        if materializada.get(id_time) != calculada.get(id_time)
+    ]
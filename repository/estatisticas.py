@@ -0,0 +1,232 @@
+"""Estatísticas por jogador e time (`estatistica_jogador`, migração v007).
+
+Uma linha por membro e time com as presenças respondidas nas partidas do
+time (`confirmados`, `duvidas`, `recusados`) e `jogos`: partidas com placar
+registrado em que o jogador estava confirmado. O total de jogos do time vem
+de `classificacao`, então `participacao_jogos_time` é `jogos /
+classificacao.jogos`: a fração de todos os jogos do time, inclusive os de
+antes de o jogador entrar (`time_membros` não guarda a data de entrada).
+
+As linhas são mantidas por delta nas mesmas transações que gravam
+presenças, placares, cancelamentos e membros; `recalcular` refaz uma faixa
+de times a partir das tabelas de origem.
+"""
+from typing import Optional
+
+from sqlalchemy import text
+
+from db import insert_many
+
+COLUNAS = ('confirmados', 'duvidas', 'recusados', 'jogos')
+COLUNA_STATUS = {'Confirmado': 'confirmados', 'Duvida': 'duvidas', 'Recusado': 'recusados'}
+
+_DO_TIME = text(
+    """
+    SELECT
+        t.id_time,
+        t.nome_time,
+        COALESCE(c.jogos, 0) AS jogos,
+        COALESCE(c.vitorias, 0) AS vitorias,
+        COALESCE(c.empates, 0) AS empates,
+        COALESCE(c.derrotas, 0) AS derrotas,
+        COALESCE(c.gols_pro, 0) AS gols_pro,
+        COALESCE(c.gols_contra, 0) AS gols_contra,
+        COALESCE(c.pontos, 0) AS pontos
+    FROM time AS t
+    LEFT JOIN classificacao AS c ON c.fk_time = t.id_time
+    WHERE t.id_time = :id_time
+"""
+)
+_MEMBROS = text(
+    """
+    SELECT
+        tm.fk_usuario AS id_usuario,
+        u.nome,
+        tm.numero_camisa,
+        COALESCE(e.confirmados, 0) AS confirmados,
+        COALESCE(e.duvidas, 0) AS duvidas,
+        COALESCE(e.recusados, 0) AS recusados,
+        COALESCE(e.jogos, 0) AS jogos
+    FROM time_membros AS tm
+    JOIN usuario AS u ON u.id_usuario = tm.fk_usuario
+    LEFT JOIN estatistica_jogador AS e ON e.fk_time = tm.fk_time AND e.fk_usuario = tm.fk_usuario
+    WHERE tm.fk_time = :id_time
+    ORDER BY u.nome
+"""
+)
+_DO_USUARIO = text(
+    """
+    SELECT
+        tm.fk_time AS id_time,
+        t.nome_time,
+        COALESCE(e.confirmados, 0) AS confirmados,
+        COALESCE(e.duvidas, 0) AS duvidas,
+        COALESCE(e.recusados, 0) AS recusados,
+        COALESCE(e.jogos, 0) AS jogos,
+        COALESCE(c.jogos, 0) AS jogos_time
+    FROM time_membros AS tm
+    JOIN time AS t ON t.id_time = tm.fk_time
+    LEFT JOIN estatistica_jogador AS e ON e.fk_time = tm.fk_time AND e.fk_usuario = tm.fk_usuario
+    LEFT JOIN classificacao AS c ON c.fk_time = tm.fk_time
+    WHERE tm.fk_usuario = :id_usuario
+    ORDER BY t.nome_time
+"""
+)
+# Soma (ou subtrai) as presenças de uma partida às linhas dos membros que
+# responderam; `sinal_jogos` conta os confirmados como jogo disputado.
+_AJUSTAR_PARTIDA = text(
+    """
+    INSERT INTO estatistica_jogador (fk_time, fk_usuario, confirmados, duvidas, recusados, jogos)
+    SELECT tm.fk_time, pp.fk_usuario,
+        :sinal * (CASE WHEN pp.status = 'Confirmado' THEN 1 ELSE 0 END),
+        :sinal * (CASE WHEN pp.status = 'Duvida' THEN 1 ELSE 0 END),
+        :sinal * (CASE WHEN pp.status = 'Recusado' THEN 1 ELSE 0 END),
+        :sinal_jogos * (CASE WHEN pp.status = 'Confirmado' THEN 1 ELSE 0 END)
+    FROM partida_presenca AS pp
+    JOIN time_partida AS tp ON tp.fk_partida = pp.fk_partida
+    JOIN time_membros AS tm ON tm.fk_usuario = pp.fk_usuario AND tm.fk_time = tp.fk_time
+    WHERE pp.fk_partida = :id_partida
+    ON DUPLICATE KEY UPDATE
+        confirmados = confirmados + VALUES(confirmados),
+        duvidas = duvidas + VALUES(duvidas),
+        recusados = recusados + VALUES(recusados),
+        jogos = jogos + VALUES(jogos)
+"""
+)
+# Linha de um membro recém-adicionado, a partir das presenças que ele já tinha
+_CARREGAR_MEMBRO = text(
+    """
+    INSERT INTO estatistica_jogador (fk_time, fk_usuario, confirmados, duvidas, recusados, jogos)
+    SELECT tp.fk_time, pp.fk_usuario,
+        SUM(CASE WHEN pp.status = 'Confirmado' THEN 1 ELSE 0 END),
+        SUM(CASE WHEN pp.status = 'Duvida' THEN 1 ELSE 0 END),
+        SUM(CASE WHEN pp.status = 'Recusado' THEN 1 ELSE 0 END),
+        SUM(CASE WHEN pp.status = 'Confirmado' AND p.placar_time_casa IS NOT NULL
+                 AND p.placar_time_visitante IS NOT NULL THEN 1 ELSE 0 END)
+    FROM partida_presenca AS pp
+    JOIN time_partida AS tp ON tp.fk_partida = pp.fk_partida
+    JOIN partida AS p ON p.id_partida = pp.fk_partida
+    WHERE pp.fk_usuario = :id_usuario AND tp.fk_time = :id_time
+    GROUP BY tp.fk_time, pp.fk_usuario
+    ON DUPLICATE KEY UPDATE
+        confirmados = VALUES(confirmados),
+        duvidas = VALUES(duvidas),
+        recusados = VALUES(recusados),
+        jogos = VALUES(jogos)
+"""
+)
+_REMOVER_MEMBRO = text("DELETE FROM estatistica_jogador WHERE fk_time = :id_time AND fk_usuario = :id_usuario")
+_REMOVER_FAIXA = text("DELETE FROM estatistica_jogador WHERE fk_time BETWEEN :ini AND :fim")
+_RECALCULAR_FAIXA = text(
+    """
+    INSERT INTO estatistica_jogador (fk_time, fk_usuario, confirmados, duvidas, recusados, jogos)
+    SELECT tm.fk_time, tm.fk_usuario,
+        SUM(CASE WHEN pp.status = 'Confirmado' THEN 1 ELSE 0 END),
+        SUM(CASE WHEN pp.status = 'Duvida' THEN 1 ELSE 0 END),
+        SUM(CASE WHEN pp.status = 'Recusado' THEN 1 ELSE 0 END),
+        SUM(CASE WHEN pp.status = 'Confirmado' AND p.placar_time_casa IS NOT NULL
+                 AND p.placar_time_visitante IS NOT NULL THEN 1 ELSE 0 END)
+    FROM time_membros AS tm
+    JOIN time_partida AS tp ON tp.fk_time = tm.fk_time
+    JOIN partida_presenca AS pp ON pp.fk_partida = tp.fk_partida AND pp.fk_usuario = tm.fk_usuario
+    JOIN partida AS p ON p.id_partida = pp.fk_partida
+    WHERE tm.fk_time BETWEEN :ini AND :fim
+    GROUP BY tm.fk_time, tm.fk_usuario
+"""
+)
+_FAIXA = text(
+    """
+    SELECT
+        (SELECT MIN(fk_time) FROM time_membros),
+        (SELECT MAX(fk_time) FROM time_membros),
+        (SELECT MIN(fk_time) FROM estatistica_jogador),
+        (SELECT MAX(fk_time) FROM estatistica_jogador)
+"""
+)
+
+
+def participacao(jogos: int, jogos_time: int) -> Optional[float]:
+    """Fração de todos os jogos do time em que o jogador estava confirmado; None se o time não jogou."""
+    return round(jogos / jogos_time, 3) if jogos_time else None
+
+
+def deltas(antigos: dict, novos: dict, times_por_jogador: dict, encerrada: bool) -> dict:
+    """`{(id_time, id_usuario): {coluna: delta}}` para trocar os status `antigos` pelos `novos`.
+
+    Mesmo critério de `partidas.deltas_resumo`: a presença conta em cada
+    time da partida de que o jogador é membro. Em partida `encerrada` (com
+    placar) entrar ou sair de 'Confirmado' também move `jogos`.
+    """
+    por_chave = {}
+    for id_usuario, novo in novos.items():
+        antigo = antigos.get(id_usuario)
+        if antigo == novo:
+            continue
+        delta = dict.fromkeys(COLUNAS, 0)
+        if antigo in COLUNA_STATUS:
+            delta[COLUNA_STATUS[antigo]] -= 1
+        delta[COLUNA_STATUS[novo]] += 1
+        if encerrada:
+            delta['jogos'] = (novo == 'Confirmado') - (antigo == 'Confirmado')
+        for id_time in times_por_jogador.get(id_usuario, {}):
+            por_chave[(id_time, id_usuario)] = dict(delta)
+    return por_chave
+
+
+def aplicar(conn, variacao: dict) -> None:
+    """Soma a saída de `deltas` às linhas de `estatistica_jogador` (upsert multi-linha)."""
+    if not variacao:
+        return
+    insert_many(
+        conn,
+        'estatistica_jogador',
+        ['fk_time', 'fk_usuario', *COLUNAS],
+        [{'fk_time': id_time, 'fk_usuario': id_usuario, **delta} for (id_time, id_usuario), delta in variacao.items()],
+        suffix='ON DUPLICATE KEY UPDATE ' + ', '.join(f'{c} = {c} + VALUES({c})' for c in COLUNAS),
+    )
+
+
+def ajustar_partida(conn, id_partida: int, sinal: int, sinal_jogos: int) -> None:
+    """Aplica as presenças da partida com os sinais dados.
+
+    Placar registrado pela primeira vez: `(0, 1)`; cancelamento: `(-1, -1)`
+    se a partida tinha placar, senão `(-1, 0)`. Deve rodar antes de apagar
+    as presenças.
+    """
+    params = {'id_partida': id_partida, 'sinal': sinal, 'sinal_jogos': sinal_jogos}
+    conn.execute(_AJUSTAR_PARTIDA, params)
+
+
+def carregar_membro(conn, id_time: int, id_usuario: int) -> None:
+    conn.execute(_CARREGAR_MEMBRO, {'id_time': id_time, 'id_usuario': id_usuario})
+
+
+def remover_membro(conn, id_time: int, id_usuario: int) -> None:
+    conn.execute(_REMOVER_MEMBRO, {'id_time': id_time, 'id_usuario': id_usuario})
+
+
+def do_time(conn, id_time: int) -> tuple:
+    """`(linha do time com a classificação, membros)`; `(None, [])` se o time não existe."""
+    resumo = conn.execute(_DO_TIME, {'id_time': id_time}).fetchone()
+    if resumo is None:
+        return None, []
+    return resumo, conn.execute(_MEMBROS, {'id_time': id_time}).all()
+
+
+def do_usuario(conn, id_usuario: int) -> list:
+    """Uma linha por time de que o usuário é membro."""
+    return conn.execute(_DO_USUARIO, {'id_usuario': id_usuario}).all()
+
+
+def faixa(conn) -> tuple:
+    """`(menor, maior)` id de time em `time_membros` ou nas estatísticas; `(None, None)` se vazios."""
+    menor_tm, maior_tm, menor_e, maior_e = conn.execute(_FAIXA).one()
+    menores = [v for v in (menor_tm, menor_e) if v is not None]
+    maiores = [v for v in (maior_tm, maior_e) if v is not None]
+    return (min(menores), max(maiores)) if menores else (None, None)
+
+
+def recalcular(conn, ini: int, fim: int) -> None:
+    """Refaz do zero as linhas dos times com id em [ini, fim]."""
+    conn.execute(_REMOVER_FAIXA, {'ini': ini, 'fim': fim})
+    conn.execute(_RECALCULAR_FAIXA, {'ini': ini, 'fim': fim})
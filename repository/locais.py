@@ -0,0 +1,56 @@
+from datetime import date, datetime
+
+from sqlalchemy import text
+
+LOCAIS_SELECT = "SELECT id_local, nome, capacidade, disponivel_para_agendamento FROM local"
+
+_INSERT = text(
+    """
+    INSERT INTO local (nome, capacidade, disponivel_para_agendamento)
+    VALUES (:nome, :capacidade, :disponivel)
+"""
+)
+_HORARIO = text(
+    """
+    SELECT nome, disponivel_para_agendamento, horario_abertura, horario_fechamento
+    FROM local WHERE id_local = :id_local
+"""
+)
+_EXCECOES = text(
+    """
+    SELECT data_excecao, motivo, horario_abertura_excecao, horario_fechamento_excecao
+    FROM local_excecoes
+    WHERE fk_local = :id_local AND data_excecao BETWEEN :data_ini AND :data_fim
+"""
+)
+_AGENDAMENTOS = text(
+    """
+    SELECT dthr_ini, dthr_fim FROM agendamento
+    WHERE fk_local = :id_local AND dthr_ini < :fim AND dthr_fim > :ini
+    ORDER BY dthr_ini
+"""
+)
+
+
+def inserir(conn, nome: str, capacidade: int, disponivel: bool) -> int:
+    return conn.execute(_INSERT, {'nome': nome, 'capacidade': capacidade, 'disponivel': disponivel}).lastrowid
+
+
+def horario(conn, id_local: int):
+    """Nome, disponibilidade e horário padrão do local, ou None."""
+    return conn.execute(_HORARIO, {'id_local': id_local}).fetchone()
+
+
+def excecoes_por_data(conn, id_local: int, data_ini: date, data_fim: date) -> dict:
+    return {
+        row._mapping['data_excecao']: row._mapping
+        for row in conn.execute(_EXCECOES, {'id_local': id_local, 'data_ini': data_ini, 'data_fim': data_fim})
+    }
+
+
+def agendamentos(conn, id_local: int, ini: datetime, fim: datetime) -> list:
+    """Intervalos `(dthr_ini, dthr_fim)` que tocam [ini, fim), em ordem de início."""
+    return [
+        (row._mapping['dthr_ini'], row._mapping['dthr_fim'])
+        for row in conn.execute(_AGENDAMENTOS, {'id_local': id_local, 'ini': ini, 'fim': fim})
+    ]
@@ -0,0 +1,108 @@
+"""Outbox transacional (`outbox`, migração v008).
+
+As rotas gravam o evento com `registrar` na mesma transação da mudança de
+domínio: se a transação reverte, o evento some junto; se confirma, o
+worker (`flask outbox processar`) o entrega depois. Os horários vêm do
+relógio do banco (`NOW(6)`), então atraso e backoff não dependem do relógio
+de cada processo.
+"""
+import json
+
+from sqlalchemy import bindparam, text
+
+from db import insert_many
+
+# Tipos de evento gravados pelas rotas de partidas
+PARTIDA_CRIADA = 'partida_criada'
+PARTIDA_CANCELADA = 'partida_cancelada'
+PLACAR_REGISTRADO = 'placar_registrado'
+
+PENDENTE = 'pendente'
+PROCESSADO = 'processado'
+FALHOU = 'falhou'
+
+# SKIP LOCKED: vários workers reservam lotes disjuntos sem esperar um pelo outro
+_RESERVAR = text(
+    """
+    SELECT id_evento, tipo, payload, tentativas,
+        TIMESTAMPDIFF(MICROSECOND, criado_em, NOW(6)) / 1000000 AS atraso
+    FROM outbox
+    WHERE status = 'pendente' AND disponivel_em <= NOW(6)
+    ORDER BY disponivel_em, id_evento
+    LIMIT :lote
+    FOR UPDATE SKIP LOCKED
+"""
+)
+_MARCAR_PROCESSADOS = text(
+    "UPDATE outbox SET status = 'processado', processado_em = NOW(6) WHERE id_evento IN :ids"
+).bindparams(bindparam("ids", expanding=True))
+_REAGENDAR = text(
+    """
+    UPDATE outbox
+    SET tentativas = :tentativas, ultimo_erro = :erro, status = :status,
+        disponivel_em = NOW(6) + INTERVAL :espera_us MICROSECOND
+    WHERE id_evento = :id_evento
+"""
+)
+_PENDENCIAS = text(
+    """
+    SELECT COUNT(*) AS pendentes,
+        COALESCE(MAX(TIMESTAMPDIFF(MICROSECOND, criado_em, NOW(6))), 0) / 1000000 AS atraso_maximo
+    FROM outbox
+    WHERE status = 'pendente'
+"""
+)
+_LIMPAR = text(
+    "DELETE FROM outbox WHERE status = 'processado' AND processado_em < NOW(6) - INTERVAL :dias DAY LIMIT :lote"
+)
+
+
+def _serializar(payload: dict) -> str:
+    return json.dumps(payload, default=lambda v: v.isoformat() if hasattr(v, 'isoformat') else str(v))
+
+
+def registrar(conn, tipo: str, payload: dict) -> None:
+    """Grava um evento; chamar dentro da transação da mudança que ele descreve."""
+    registrar_muitos(conn, tipo, [payload])
+
+
+def registrar_muitos(conn, tipo: str, payloads: list) -> None:
+    """Vários eventos do mesmo tipo num INSERT multi-linha (ex.: partidas criadas em lote)."""
+    insert_many(conn, 'outbox', ['tipo', 'payload'], [{'tipo': tipo, 'payload': _serializar(p)} for p in payloads])
+
+
+def reservar(conn, lote: int) -> list:
+    """Até `lote` eventos pendentes e disponíveis, travados até o fim da transação."""
+    return conn.execute(_RESERVAR, {'lote': lote}).all()
+
+
+def payload(evento) -> dict:
+    valor = evento._mapping['payload']
+    return json.loads(valor) if isinstance(valor, (str, bytes)) else valor
+
+
+def marcar_processados(conn, ids: list) -> None:
+    if ids:
+        conn.execute(_MARCAR_PROCESSADOS, {'ids': ids})
+
+
+def reagendar(conn, id_evento: int, tentativas: int, espera_segundos: float, erro: str, desistir: bool = False) -> None:
+    """Registra a falha; o evento volta após `espera_segundos` ou fica como 'falhou' se `desistir`."""
+    conn.execute(_REAGENDAR, {
+        'id_evento': id_evento,
+        'tentativas': tentativas,
+        'erro': erro[:500],
+        'status': FALHOU if desistir else PENDENTE,
+        'espera_us': int(espera_segundos * 1_000_000),
+    })
+
+
+def pendencias(conn) -> tuple:
+    """`(pendentes, segundos desde a criação do pendente mais antigo)`."""
+    pendentes, atraso = conn.execute(_PENDENCIAS).one()
+    return int(pendentes), float(atraso or 0)
+
+
+def limpar(conn, dias: int, lote: int = 10000) -> int:
+    """Apaga até `lote` eventos processados há mais de `dias` dias; retorna quantos."""
+    return conn.execute(_LIMPAR, {'dias': dias, 'lote': lote}).rowcount
@@ -0,0 +1,501 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import bindparam, text
+
+from db import insert_many
+from repository import estatisticas
+
+# Contadores de presença por status, mantidos em `partida_presenca_resumo`
+# (migração v005) na mesma transação de cada escrita em `partida_presenca`.
+COLUNA_STATUS = {"Confirmado": "confirmados", "Duvida": "duvidas", "Recusado": "recusados"}
+
+# Os dois lados da partida vêm de um único par de joins em `time_partida`
+# (um para 'C', outro para 'V') em vez de subconsultas correlacionadas por
+# linha. LEFT JOIN preserva partidas sem algum dos times, como antes. Os
+# contadores de presença de cada lado vêm de `partida_presenca_resumo`.
+PARTIDAS_SELECT = """
+    SELECT
+        p.id_partida,
+        a.dthr_ini,
+        a.dthr_fim,
+        l.nome AS nome_local,
+        u.nome AS nome_responsavel,
+        p.placar_time_casa,
+        p.placar_time_visitante,
+        tc.nome_time AS time_casa,
+        tv.nome_time AS time_visitante,
+        COALESCE(rc.confirmados, 0) AS confirmados_casa,
+        COALESCE(rc.duvidas, 0) AS duvidas_casa,
+        COALESCE(rc.recusados, 0) AS recusados_casa,
+        COALESCE(rv.confirmados, 0) AS confirmados_visitante,
+        COALESCE(rv.duvidas, 0) AS duvidas_visitante,
+        COALESCE(rv.recusados, 0) AS recusados_visitante
+    FROM partida AS p
+    JOIN agendamento AS a ON p.fk_agendamento = a.id_agendamento
+    JOIN local AS l ON a.fk_local = l.id_local
+    JOIN usuario AS u ON p.fk_responsavel_partida = u.id_usuario
+    LEFT JOIN time_partida AS tpc ON tpc.fk_partida = p.id_partida AND tpc.casa_visitante = 'C'
+    LEFT JOIN time AS tc ON tpc.fk_time = tc.id_time
+    LEFT JOIN time_partida AS tpv ON tpv.fk_partida = p.id_partida AND tpv.casa_visitante = 'V'
+    LEFT JOIN time AS tv ON tpv.fk_time = tv.id_time
+    LEFT JOIN partida_presenca_resumo AS rc ON rc.fk_partida = p.id_partida AND rc.fk_time = tpc.fk_time
+    LEFT JOIN partida_presenca_resumo AS rv ON rv.fk_partida = p.id_partida AND rv.fk_time = tpv.fk_time
+"""
+
+PARTIDA_DETAILS_SELECT = """
+    SELECT
+        p.id_partida, p.fk_responsavel_partida, a.dthr_ini, a.dthr_fim, l.nome AS nome_local, u.nome AS nome_responsavel,
+        p.placar_time_casa, p.placar_time_visitante,
+        tc.id_time AS id_time_casa,
+        tc.nome_time AS nome_time_casa,
+        tv.id_time AS id_time_visitante,
+        tv.nome_time AS nome_time_visitante,
+        COALESCE(rc.confirmados, 0) AS confirmados_casa,
+        COALESCE(rc.duvidas, 0) AS duvidas_casa,
+        COALESCE(rc.recusados, 0) AS recusados_casa,
+        COALESCE(rv.confirmados, 0) AS confirmados_visitante,
+        COALESCE(rv.duvidas, 0) AS duvidas_visitante,
+        COALESCE(rv.recusados, 0) AS recusados_visitante
+    FROM partida AS p
+    JOIN agendamento AS a ON p.fk_agendamento = a.id_agendamento
+    JOIN local AS l ON a.fk_local = l.id_local
+    JOIN usuario AS u ON p.fk_responsavel_partida = u.id_usuario
+    LEFT JOIN time_partida AS tpc ON tpc.fk_partida = p.id_partida AND tpc.casa_visitante = 'C'
+    LEFT JOIN time AS tc ON tpc.fk_time = tc.id_time
+    LEFT JOIN time_partida AS tpv ON tpv.fk_partida = p.id_partida AND tpv.casa_visitante = 'V'
+    LEFT JOIN time AS tv ON tpv.fk_time = tv.id_time
+    LEFT JOIN partida_presenca_resumo AS rc ON rc.fk_partida = p.id_partida AND rc.fk_time = tpc.fk_time
+    LEFT JOIN partida_presenca_resumo AS rv ON rv.fk_partida = p.id_partida AND rv.fk_time = tpv.fk_time
+    WHERE p.id_partida = :id_partida
+"""
+
+# Usada tanto na resposta JSON quanto no modo NDJSON de GET /partidas/<id>/presenca
+LISTA_PRESENCA = text(
+    """
+    SELECT
+        u.id_usuario,
+        u.nome AS nome_jogador,
+        pp.status,
+        t.nome_time
+    FROM partida_presenca AS pp
+    JOIN usuario AS u ON pp.fk_usuario = u.id_usuario
+    JOIN time_partida AS tp ON pp.fk_partida = tp.fk_partida
+    JOIN time_membros AS tm ON u.id_usuario = tm.fk_usuario AND tp.fk_time = tm.fk_time
+    JOIN time AS t ON tm.fk_time = t.id_time
+    WHERE pp.fk_partida = :id_partida
+    ORDER BY t.nome_time, u.nome;
+"""
+)
+
+_DETALHES = text(PARTIDA_DETAILS_SELECT)
+_DADOS_AGENDAMENTO = text(
+    """
+    SELECT t.fk_responsavel_time, l.horario_abertura, l.horario_fechamento
+    FROM time AS t, local AS l
+    WHERE t.id_time = :id_time AND l.id_local = :id_local
+"""
+)
+_EXCECAO_DO_DIA = text(
+    """
+    SELECT motivo, horario_abertura_excecao, horario_fechamento_excecao
+    FROM local_excecoes
+    WHERE fk_local = :id_local AND data_excecao = DATE(:dthr_ini)
+"""
+)
+_CONFLITO = text(
+    """
+    SELECT 1 FROM agendamento
+    WHERE fk_local = :id_local AND dthr_ini < :dthr_fim AND dthr_fim > :dthr_ini
+"""
+)
+_INSERT_AGENDAMENTO = text(
+    "INSERT INTO agendamento (dthr_ini, dthr_fim, fk_local) VALUES (:dthr_ini, :dthr_fim, :fk_local)"
+)
+_INSERT_PARTIDA = text(
+    "INSERT INTO partida (fk_responsavel_partida, fk_agendamento) VALUES (:id_capitao, :id_agendamento)"
+)
+_INSERT_TIME_PARTIDA = text(
+    "INSERT INTO time_partida (fk_time, fk_partida, casa_visitante) VALUES (:fk_time, :fk_partida, :cv)"
+)
+_AUTO_INCREMENT_INCREMENT = text("SELECT @@auto_increment_increment")
+
+_RESPONSAVEIS_TIMES = text(
+    "SELECT id_time, fk_responsavel_time FROM time WHERE id_time IN :ids"
+).bindparams(bindparam("ids", expanding=True))
+_LOCAIS_PARA_AGENDA = text(
+    "SELECT id_local, horario_abertura, horario_fechamento FROM local WHERE id_local IN :ids FOR UPDATE"
+).bindparams(bindparam("ids", expanding=True))
+_EXCECOES_PERIODO = text(
+    """
+    SELECT fk_local, data_excecao, motivo, horario_abertura_excecao, horario_fechamento_excecao
+    FROM local_excecoes
+    WHERE fk_local IN :ids AND data_excecao BETWEEN DATE(:dthr_min) AND DATE(:dthr_max)
+"""
+).bindparams(bindparam("ids", expanding=True))
+_AGENDAMENTOS_PERIODO = text(
+    """
+    SELECT fk_local, dthr_ini, dthr_fim FROM agendamento
+    WHERE fk_local IN :ids AND dthr_ini < :dthr_max AND dthr_fim > :dthr_min
+"""
+).bindparams(bindparam("ids", expanding=True))
+_CAPITAES = text(
+    """
+    SELECT t.fk_responsavel_time FROM time_partida AS tp
+    JOIN time AS t ON tp.fk_time = t.id_time
+    WHERE tp.fk_partida = :id_partida
+"""
+)
+_JOGADORES_IN = text(
+    """
+    SELECT tm.fk_usuario, tm.fk_time, t.fk_responsavel_time FROM time_membros AS tm
+    JOIN time_partida AS tp ON tm.fk_time = tp.fk_time
+    JOIN time AS t ON tm.fk_time = t.id_time
+    WHERE tp.fk_partida = :id_partida AND tm.fk_usuario IN :ids
+"""
+).bindparams(bindparam("ids", expanding=True))
+_CONTADORES = text(
+    "SELECT fk_time AS id_time, confirmados, duvidas, recusados FROM partida_presenca_resumo WHERE fk_partida = :id_partida"
+)
+# Trava compartilhada: serializa com `buscar` (FOR UPDATE) de register_score
+_ENCERRADA = text(
+    """
+    SELECT placar_time_casa IS NOT NULL AND placar_time_visitante IS NOT NULL FROM partida
+    WHERE id_partida = :id_partida
+    FOR SHARE
+"""
+)
+_STATUS_ATUAIS = text(
+    """
+    SELECT fk_usuario, status FROM partida_presenca
+    WHERE fk_partida = :id_partida AND fk_usuario IN :ids
+    FOR UPDATE
+"""
+).bindparams(bindparam("ids", expanding=True))
+# Soma (ou subtrai, com `sinal` = -1) as presenças de um membro às partidas do time
+_AJUSTAR_RESUMO_MEMBRO = text(
+    """
+    INSERT INTO partida_presenca_resumo (fk_partida, fk_time, confirmados, duvidas, recusados)
+    SELECT pp.fk_partida, tp.fk_time,
+        :sinal * SUM(CASE WHEN pp.status = 'Confirmado' THEN 1 ELSE 0 END),
+        :sinal * SUM(CASE WHEN pp.status = 'Duvida' THEN 1 ELSE 0 END),
+        :sinal * SUM(CASE WHEN pp.status = 'Recusado' THEN 1 ELSE 0 END)
+    FROM partida_presenca AS pp
+    JOIN time_partida AS tp ON tp.fk_partida = pp.fk_partida
+    WHERE pp.fk_usuario = :id_usuario AND tp.fk_time = :id_time
+    GROUP BY pp.fk_partida, tp.fk_time
+    ON DUPLICATE KEY UPDATE
+        confirmados = confirmados + VALUES(confirmados),
+        duvidas = duvidas + VALUES(duvidas),
+        recusados = recusados + VALUES(recusados)
+"""
+)
+# Mesmo critério de LISTA_PRESENCA: a presença conta para cada time da
+# partida de que o jogador é membro.
+_REMOVER_RESUMO_FAIXA = text(
+    "DELETE FROM partida_presenca_resumo WHERE fk_partida BETWEEN :ini AND :fim"
+)
+_RECALCULAR_RESUMO_FAIXA = text(
+    """
+    INSERT INTO partida_presenca_resumo (fk_partida, fk_time, confirmados, duvidas, recusados)
+    SELECT pp.fk_partida, tm.fk_time,
+        SUM(CASE WHEN pp.status = 'Confirmado' THEN 1 ELSE 0 END),
+        SUM(CASE WHEN pp.status = 'Duvida' THEN 1 ELSE 0 END),
+        SUM(CASE WHEN pp.status = 'Recusado' THEN 1 ELSE 0 END)
+    FROM partida_presenca AS pp
+    JOIN time_partida AS tp ON tp.fk_partida = pp.fk_partida
+    JOIN time_membros AS tm ON tm.fk_usuario = pp.fk_usuario AND tm.fk_time = tp.fk_time
+    WHERE pp.fk_partida BETWEEN :ini AND :fim
+    GROUP BY pp.fk_partida, tm.fk_time
+"""
+)
+_FAIXA_RESUMO = text(
+    """
+    SELECT
+        (SELECT MIN(fk_partida) FROM partida_presenca),
+        (SELECT MAX(fk_partida) FROM partida_presenca),
+        (SELECT MIN(fk_partida) FROM partida_presenca_resumo),
+        (SELECT MAX(fk_partida) FROM partida_presenca_resumo)
+"""
+)
+_EXISTE = text("SELECT 1 FROM partida WHERE id_partida = :id_partida")
+# FOR UPDATE: o placar lido é o "antigo" subtraído da classificação
+_BUSCAR = text(
+    """
+    SELECT
+        p.fk_responsavel_partida, p.fk_agendamento, p.placar_time_casa, p.placar_time_visitante,
+        tpc.fk_time AS id_time_casa, tpv.fk_time AS id_time_visitante
+    FROM partida AS p
+    LEFT JOIN time_partida AS tpc ON tpc.fk_partida = p.id_partida AND tpc.casa_visitante = 'C'
+    LEFT JOIN time_partida AS tpv ON tpv.fk_partida = p.id_partida AND tpv.casa_visitante = 'V'
+    WHERE p.id_partida = :id_partida
+    FOR UPDATE
+"""
+)
+_UPDATE_PLACAR = text(
+    """
+    UPDATE partida
+    SET placar_time_casa = :placar_casa, placar_time_visitante = :placar_visitante
+    WHERE id_partida = :id_partida
+"""
+)
+_EXCLUIR = (
+    text('DELETE FROM partida_presenca_resumo WHERE fk_partida = :id_partida'),
+    text('DELETE FROM time_partida WHERE fk_partida = :id_partida'),
+    text('DELETE FROM partida_presenca WHERE fk_partida = :id_partida'),
+    text('DELETE FROM partida WHERE id_partida = :id_partida'),
+)
+_EXCLUIR_AGENDAMENTO = text('DELETE FROM agendamento WHERE id_agendamento = :id_agendamento')
+
+
+# --- agendamento -------------------------------------------------------------
+
+def dados_agendamento(conn, id_time: int, id_local: int):
+    """Capitão do time e horário padrão do local numa linha; None se algum não existe."""
+    return conn.execute(_DADOS_AGENDAMENTO, {"id_time": id_time, "id_local": id_local}).fetchone()
+
+
+def excecao_do_dia(conn, id_local: int, dthr_ini: datetime):
+    row = conn.execute(_EXCECAO_DO_DIA, {"id_local": id_local, "dthr_ini": dthr_ini}).fetchone()
+    return row._mapping if row else None
+
+
+def tem_conflito(conn, id_local: int, dthr_ini: datetime, dthr_fim: datetime) -> bool:
+    params = {"id_local": id_local, "dthr_ini": dthr_ini, "dthr_fim": dthr_fim}
+    return conn.execute(_CONFLITO, params).fetchone() is not None
+
+
+def inserir(conn, id_responsavel: int, id_local: int, dthr_ini: datetime, dthr_fim: datetime,
+            id_time_casa: int, id_time_visitante: int) -> int:
+    """Grava `agendamento`, `partida` e os dois `time_partida`; retorna o id da partida."""
+    id_agendamento = conn.execute(
+        _INSERT_AGENDAMENTO, {"dthr_ini": dthr_ini, "dthr_fim": dthr_fim, "fk_local": id_local}
+    ).lastrowid
+    id_partida = conn.execute(
+        _INSERT_PARTIDA, {"id_capitao": id_responsavel, "id_agendamento": id_agendamento}
+    ).lastrowid
+    conn.execute(_INSERT_TIME_PARTIDA, {"fk_time": id_time_casa, "fk_partida": id_partida, "cv": "C"})
+    conn.execute(_INSERT_TIME_PARTIDA, {"fk_time": id_time_visitante, "fk_partida": id_partida, "cv": "V"})
+    return id_partida
+
+
+def carregar_agenda(conn, ids_times, ids_locais, dthr_min, dthr_max) -> tuple:
+    """Carrega, com uma consulta por tabela, tudo que as regras de agendamento precisam.
+
+    Retorna `(responsaveis, locais, excecoes, ocupados_por_local)`: capitão
+    de cada time, linha de cada local (bloqueada com FOR UPDATE para
+    serializar agendamentos em lote sobre os mesmos locais), exceções por
+    `(id_local, data)` e intervalos já agendados por local no período.
+    """
+    responsaveis = {
+        row._mapping["id_time"]: row._mapping["fk_responsavel_time"]
+        for row in conn.execute(_RESPONSAVEIS_TIMES, {"ids": list(ids_times)})
+    }
+    locais = {
+        row._mapping["id_local"]: row._mapping
+        for row in conn.execute(_LOCAIS_PARA_AGENDA, {"ids": list(ids_locais)})
+    }
+
+    periodo = {"ids": list(ids_locais), "dthr_min": dthr_min, "dthr_max": dthr_max}
+    excecoes = {
+        (row._mapping["fk_local"], row._mapping["data_excecao"]): row._mapping
+        for row in conn.execute(_EXCECOES_PERIODO, periodo)
+    }
+    ocupados_por_local = {}
+    for row in conn.execute(_AGENDAMENTOS_PERIODO, periodo):
+        ocupados_por_local.setdefault(row._mapping["fk_local"], []).append((row._mapping["dthr_ini"], row._mapping["dthr_fim"]))
+
+    return responsaveis, locais, excecoes, ocupados_por_local
+
+
+def ids_consecutivos(conn) -> bool:
+    """Se um INSERT multi-linha recebe ids AUTO_INCREMENT consecutivos (`auto_increment_increment = 1`)."""
+    return conn.execute(_AUTO_INCREMENT_INCREMENT).scalar() == 1
+
+
+def _ids_gerados(blocos: list) -> list:
+    # `(primeiro id, linhas)` de cada bloco de `insert_many`; os ids do bloco
+    # são consecutivos a partir do primeiro (ver `ids_consecutivos`)
+    return [primeiro + i for primeiro, linhas in blocos for i in range(linhas)]
+
+
+def inserir_lote(conn, id_responsavel: int, itens: list) -> list:
+    """Grava `agendamento`, `partida` e `time_partida` com INSERTs multi-linha.
+
+    O responsável de cada partida é `item["id_responsavel"]` quando presente
+    (campeonatos: o capitão do time da casa), senão `id_responsavel`.
+    Retorna os ids de partida na mesma ordem de `itens`. Os ids gerados são
+    o primeiro id de cada bloco mais a posição da linha, sem reler as tabelas
+    (um SELECT por faixa de ids poderia pegar inserções concorrentes). Se o
+    servidor não gera ids consecutivos, grava item a item com `inserir`.
+    """
+    if not itens:
+        return []
+
+    if not ids_consecutivos(conn):
+        return [
+            inserir(conn, item.get("id_responsavel", id_responsavel), item["id_local"], item["dthr_ini"],
+                    item["dthr_fim"], item["id_time_casa"], item["id_time_visitante"])
+            for item in itens
+        ]
+
+    agendamentos = [{"dthr_ini": i["dthr_ini"], "dthr_fim": i["dthr_fim"], "fk_local": i["id_local"]} for i in itens]
+    fk_agendamentos = _ids_gerados(insert_many(conn, "agendamento", ["dthr_ini", "dthr_fim", "fk_local"], agendamentos))
+
+    blocos = insert_many(
+        conn,
+        "partida",
+        ["fk_responsavel_partida", "fk_agendamento"],
+        [
+            {"fk_responsavel_partida": item.get("id_responsavel", id_responsavel), "fk_agendamento": fk}
+            for item, fk in zip(itens, fk_agendamentos)
+        ],
+    )
+
+    partidas = _ids_gerados(blocos)
+
+    times_partida = []
+    for item, id_partida in zip(itens, partidas):
+        times_partida.append({"fk_time": item["id_time_casa"], "fk_partida": id_partida, "casa_visitante": "C"})
+        times_partida.append({"fk_time": item["id_time_visitante"], "fk_partida": id_partida, "casa_visitante": "V"})
+    insert_many(conn, "time_partida", ["fk_time", "fk_partida", "casa_visitante"], times_partida)
+
+    return partidas
+
+
+# --- consulta, presença e placar ---------------------------------------------
+
+def detalhes(conn, id_partida: int):
+    return conn.execute(_DETALHES, {"id_partida": id_partida}).fetchone()
+
+
+def existe(conn, id_partida: int) -> bool:
+    return conn.execute(_EXISTE, {"id_partida": id_partida}).fetchone() is not None
+
+
+def buscar(conn, id_partida: int):
+    """Responsável, agendamento, times e placar atual da partida (linha bloqueada), ou None."""
+    return conn.execute(_BUSCAR, {"id_partida": id_partida}).fetchone()
+
+
+def placar(partida) -> Optional[tuple]:
+    """`(gols_casa, gols_visitante)` de uma linha de `buscar`, ou None se ainda sem placar."""
+    dados = partida._mapping
+    if dados["placar_time_casa"] is None or dados["placar_time_visitante"] is None:
+        return None
+    return dados["placar_time_casa"], dados["placar_time_visitante"]
+
+
+def capitaes(conn, id_partida: int) -> set:
+    """Capitães dos times da partida (vazio se a partida não existe ou não tem times)."""
+    return {row._mapping["fk_responsavel_time"] for row in conn.execute(_CAPITAES, {"id_partida": id_partida})}
+
+
+def times_dos_jogadores(conn, id_partida: int, ids_usuarios) -> dict:
+    """`{id_usuario: {id_time: id_capitao}}` dos times da partida de que cada usuário é membro.
+
+    Uma única consulta com `IN`; usuários fora dos dois times não aparecem.
+    """
+    times_por_usuario = {}
+    for row in conn.execute(_JOGADORES_IN, {"id_partida": id_partida, "ids": list(ids_usuarios)}):
+        dados = row._mapping
+        times_por_usuario.setdefault(dados["fk_usuario"], {})[dados["fk_time"]] = dados["fk_responsavel_time"]
+    return times_por_usuario
+
+
+def deltas_resumo(antigos: dict, novos: dict, times_por_jogador: dict) -> dict:
+    """Variação dos contadores por time: `{id_time: {coluna: delta}}`.
+
+    `antigos` e `novos` são `{id_usuario: status}`; cada mudança tira um do
+    status anterior (se houver) e soma um ao novo, em todos os times da
+    partida de que o jogador é membro. Times sem variação não aparecem.
+    """
+    deltas = {}
+    for id_usuario, novo in novos.items():
+        antigo = antigos.get(id_usuario)
+        if antigo == novo:
+            continue
+        for id_time in times_por_jogador.get(id_usuario, ()):
+            delta = deltas.setdefault(id_time, dict.fromkeys(COLUNA_STATUS.values(), 0))
+            if antigo in COLUNA_STATUS:
+                delta[COLUNA_STATUS[antigo]] -= 1
+            delta[COLUNA_STATUS[novo]] += 1
+    return {id_time: delta for id_time, delta in deltas.items() if any(delta.values())}
+
+
+def registrar_presencas(conn, id_partida: int, presencas: dict, times_por_jogador: dict) -> dict:
+    """Upsert multi-linha de `{id_usuario: status}` e ajuste dos contadores da partida
+    e das estatísticas dos jogadores.
+
+    Os status anteriores são lidos com FOR UPDATE antes do upsert, então
+    escritas concorrentes do mesmo jogador não perdem delta. Retorna os
+    deltas aplicados aos contadores da partida (vazio se nenhum status mudou).
+    """
+    encerrada = bool(conn.execute(_ENCERRADA, {"id_partida": id_partida}).scalar())
+    antigos = {
+        row._mapping["fk_usuario"]: row._mapping["status"]
+        for row in conn.execute(_STATUS_ATUAIS, {"id_partida": id_partida, "ids": list(presencas)})
+    }
+    insert_many(
+        conn,
+        "partida_presenca",
+        ["fk_partida", "fk_usuario", "status"],
+        [{"fk_partida": id_partida, "fk_usuario": id_usuario, "status": status} for id_usuario, status in presencas.items()],
+        suffix="ON DUPLICATE KEY UPDATE status = VALUES(status)",
+    )
+
+    deltas = deltas_resumo(antigos, presencas, times_por_jogador)
+    if deltas:
+        colunas = list(COLUNA_STATUS.values())
+        insert_many(
+            conn,
+            "partida_presenca_resumo",
+            ["fk_partida", "fk_time", *colunas],
+            [{"fk_partida": id_partida, "fk_time": id_time, **delta} for id_time, delta in deltas.items()],
+            suffix="ON DUPLICATE KEY UPDATE " + ", ".join(f"{c} = {c} + VALUES({c})" for c in colunas),
+        )
+    estatisticas.aplicar(conn, estatisticas.deltas(antigos, presencas, times_por_jogador, encerrada))
+    return deltas
+
+
+def contadores(conn, id_partida: int) -> list:
+    """Contadores de presença atuais de cada time da partida (dentro da transação que os alterou)."""
+    return conn.execute(_CONTADORES, {"id_partida": id_partida}).all()
+
+
+def ajustar_resumo_membro(conn, id_time: int, id_usuario: int, sinal: int) -> bool:
+    """Entrada (`sinal=1`) ou saída (`-1`) de um membro: soma/subtrai suas presenças
+    nas partidas do time. Retorna True se algum contador mudou."""
+    params = {"id_time": id_time, "id_usuario": id_usuario, "sinal": sinal}
+    return conn.execute(_AJUSTAR_RESUMO_MEMBRO, params).rowcount > 0
+
+
+def faixa_resumo(conn) -> tuple:
+    """`(menor, maior)` id de partida presente em `partida_presenca` ou no resumo;
+    `(None, None)` se ambos estiverem vazios."""
+    menor_pp, maior_pp, menor_r, maior_r = conn.execute(_FAIXA_RESUMO).one()
+    menores = [v for v in (menor_pp, menor_r) if v is not None]
+    maiores = [v for v in (maior_pp, maior_r) if v is not None]
+    return (min(menores), max(maiores)) if menores else (None, None)
+
+
+def recalcular_resumo(conn, ini: int, fim: int) -> None:
+    """Refaz do zero os contadores das partidas com id em [ini, fim]."""
+    conn.execute(_REMOVER_RESUMO_FAIXA, {"ini": ini, "fim": fim})
+    conn.execute(_RECALCULAR_RESUMO_FAIXA, {"ini": ini, "fim": fim})
+
+
+def lista_presenca(conn, id_partida: int) -> list:
+    return conn.execute(LISTA_PRESENCA, {"id_partida": id_partida}).all()
+
+
+def atualizar_placar(conn, id_partida: int, placar_casa: Optional[int], placar_visitante: Optional[int]) -> None:
+    params = {"placar_casa": placar_casa, "placar_visitante": placar_visitante, "id_partida": id_partida}
+    conn.execute(_UPDATE_PLACAR, params)
+
+
+def excluir(conn, id_partida: int, id_agendamento: int) -> None:
+    """Remove a partida com times, presenças e o agendamento (libera o horário)."""
+    for query in _EXCLUIR:
+        conn.execute(query, {"id_partida": id_partida})
+    conn.execute(_EXCLUIR_AGENDAMENTO, {"id_agendamento": id_agendamento})
@@ -0,0 +1,29 @@
+"""Tabelas no Core do SQLAlchemy para os UPDATE com colunas variáveis.
+
+Só as colunas que as rotas atualizam são declaradas; o esquema completo
+continua nas migrações. `dt_nascimento` fica sem tipo para o valor seguir
+ao driver como chega no JSON (texto AAAA-MM-DD), como nos comandos em texto.
+"""
+from sqlalchemy import Column, Integer, MetaData, String, Table
+
+metadata = MetaData()
+
+usuario = Table(
+    'usuario',
+    metadata,
+    Column('id_usuario', Integer, primary_key=True),
+    Column('nome', String(100)),
+    Column('email', String(255)),
+    Column('genero', String(20)),
+    Column('dt_nascimento'),
+    Column('no_telefone', String(20)),
+)
+
+time = Table(
+    'time',
+    metadata,
+    Column('id_time', Integer, primary_key=True),
+    Column('nome_time', String(100)),
+    Column('fk_responsavel_time', Integer),
+    Column('cor_uniforme', String(50)),
+)
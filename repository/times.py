@@ -0,0 +1,157 @@
+from datetime import datetime
+from functools import lru_cache
+from typing import Optional
+
+from sqlalchemy import bindparam, text, update
+
+from repository.tabelas import time
+
+CAMPOS_EDITAVEIS = ('nome_time', 'cor_uniforme', 'fk_responsavel_time')
+
+TIMES_SELECT = """
+    SELECT 
+        t.id_time, 
+        t.nome_time, 
+        t.cor_uniforme, 
+        u.nome AS nome_responsavel
+    FROM 
+        time AS t
+    JOIN 
+        usuario AS u ON t.fk_responsavel_time = u.id_usuario
+"""
+
+_INSERT = text(
+    """
+    INSERT INTO time (nome_time, fk_responsavel_time, cor_uniforme)
+    VALUES (:nome_time, :fk_responsavel_time, :cor_uniforme)
+"""
+)
+_INSERT_MEMBRO = text(
+    """
+    INSERT INTO time_membros (fk_usuario, fk_time, numero_camisa)
+    VALUES (:fk_usuario, :fk_time, :numero_camisa)
+"""
+)
+_RESPONSAVEL = text("SELECT fk_responsavel_time FROM time WHERE id_time = :id_time")
+_EXISTE = text("SELECT 1 FROM time WHERE id_time = :id_time")
+_EH_MEMBRO = text("SELECT 1 FROM time_membros WHERE fk_time = :id_time AND fk_usuario = :id_usuario")
+_CAMISA_EM_USO = text(
+    """
+    SELECT 1 FROM time_membros 
+    WHERE fk_time = :id_time AND numero_camisa = :numero_camisa
+"""
+)
+_CAMISA_EM_USO_POR_OUTRO = text(
+    """
+    SELECT 1 FROM time_membros 
+    WHERE fk_time = :id_time AND numero_camisa = :numero_camisa AND fk_usuario != :id_usuario
+"""
+)
+_MEMBROS = text(
+    """
+    SELECT 
+        u.id_usuario,
+        u.nome,
+        u.email,
+        tm.numero_camisa
+    FROM 
+        time_membros AS tm
+    JOIN 
+        usuario AS u ON tm.fk_usuario = u.id_usuario
+    WHERE 
+        tm.fk_time = :id_time
+"""
+)
+_REMOVER_MEMBRO = text("DELETE FROM time_membros WHERE fk_time = :id_time AND fk_usuario = :id_usuario")
+_PARTIDA_FUTURA = text(
+    """
+    SELECT 1 FROM time_partida AS tp
+    JOIN partida AS p ON tp.fk_partida = p.id_partida
+    JOIN agendamento AS a ON p.fk_agendamento = a.id_agendamento
+    WHERE tp.fk_time = :id_time AND a.dthr_ini > :agora
+    LIMIT 1
+"""
+)
+_EXCLUIR_MEMBROS = text("DELETE FROM time_membros WHERE fk_time = :id_time")
+_EXCLUIR_RESUMO = text("DELETE FROM partida_presenca_resumo WHERE fk_time = :id_time")
+_EXCLUIR_CLASSIFICACAO = text("DELETE FROM classificacao WHERE fk_time = :id_time")
+_EXCLUIR_ESTATISTICAS = text("DELETE FROM estatistica_jogador WHERE fk_time = :id_time")
+_EXCLUIR = text("DELETE FROM time WHERE id_time = :id_time")
+_UPDATE_CAMISA = text(
+    "UPDATE time_membros SET numero_camisa = :numero_camisa WHERE fk_time = :id_time AND fk_usuario = :id_usuario"
+)
+
+
+def inserir(conn, nome_time: str, id_responsavel: int, cor_uniforme: Optional[str]) -> int:
+    params = {'nome_time': nome_time, 'fk_responsavel_time': id_responsavel, 'cor_uniforme': cor_uniforme}
+    return conn.execute(_INSERT, params).lastrowid
+
+
+def adicionar_membro(conn, id_time: int, id_usuario: int, numero_camisa: Optional[int] = None) -> None:
+    conn.execute(_INSERT_MEMBRO, {'fk_usuario': id_usuario, 'fk_time': id_time, 'numero_camisa': numero_camisa})
+
+
+def responsavel(conn, id_time: int) -> Optional[int]:
+    """Id do capitão do time, ou None se o time não existe."""
+    row = conn.execute(_RESPONSAVEL, {'id_time': id_time}).fetchone()
+    return row._mapping['fk_responsavel_time'] if row else None
+
+
+def existe(conn, id_time: int) -> bool:
+    return conn.execute(_EXISTE, {'id_time': id_time}).fetchone() is not None
+
+
+def eh_membro(conn, id_time: int, id_usuario: int) -> bool:
+    return conn.execute(_EH_MEMBRO, {'id_time': id_time, 'id_usuario': id_usuario}).fetchone() is not None
+
+
+def camisa_em_uso(conn, id_time: int, numero_camisa: int, exceto_usuario: Optional[int] = None) -> bool:
+    """A camisa já pertence a algum membro (que não seja `exceto_usuario`)?"""
+    params = {'id_time': id_time, 'numero_camisa': numero_camisa}
+    if exceto_usuario is None:
+        return conn.execute(_CAMISA_EM_USO, params).fetchone() is not None
+    params['id_usuario'] = exceto_usuario
+    return conn.execute(_CAMISA_EM_USO_POR_OUTRO, params).fetchone() is not None
+
+
+def membros(conn, id_time: int) -> list:
+    return conn.execute(_MEMBROS, {'id_time': id_time}).all()
+
+
+def remover_membro(conn, id_time: int, id_usuario: int) -> bool:
+    """Remove o vínculo; False se o usuário não era membro."""
+    return conn.execute(_REMOVER_MEMBRO, {'id_time': id_time, 'id_usuario': id_usuario}).rowcount > 0
+
+
+def tem_partida_futura(conn, id_time: int, agora: datetime) -> bool:
+    return conn.execute(_PARTIDA_FUTURA, {'id_time': id_time, 'agora': agora}).fetchone() is not None
+
+
+def excluir(conn, id_time: int) -> None:
+    """Remove o time, seus vínculos de membros, seus contadores de presença,
+    sua linha na classificação e as estatísticas dos jogadores."""
+    conn.execute(_EXCLUIR_MEMBROS, {'id_time': id_time})
+    conn.execute(_EXCLUIR_RESUMO, {'id_time': id_time})
+    conn.execute(_EXCLUIR_CLASSIFICACAO, {'id_time': id_time})
+    conn.execute(_EXCLUIR_ESTATISTICAS, {'id_time': id_time})
+    conn.execute(_EXCLUIR, {'id_time': id_time})
+
+
+@lru_cache(maxsize=None)
+def _update_stmt(colunas: tuple):
+    return (
+        update(time)
+        .where(time.c.id_time == bindparam('_id_time'))
+        .values({coluna: bindparam(f'_{coluna}') for coluna in colunas})
+    )
+
+
+def atualizar(conn, id_time: int, campos: dict) -> None:
+    """UPDATE dos `CAMPOS_EDITAVEIS` presentes em `campos` (um comando por conjunto de colunas)."""
+    params = {f'_{coluna}': valor for coluna, valor in campos.items()}
+    params['_id_time'] = id_time
+    conn.execute(_update_stmt(tuple(sorted(campos))), params)
+
+
+def atualizar_camisa(conn, id_time: int, id_usuario: int, numero_camisa: int) -> None:
+    conn.execute(_UPDATE_CAMISA, {'numero_camisa': numero_camisa, 'id_time': id_time, 'id_usuario': id_usuario})
@@ -0,0 +1,73 @@
+from functools import lru_cache
+from typing import Optional
+
+from sqlalchemy import bindparam, text, update
+
+from repository.tabelas import usuario
+
+CAMPOS_EDITAVEIS = ('nome', 'email', 'genero', 'dt_nascimento', 'no_telefone')
+
+_SELECT_COMPLETO = text("SELECT * FROM usuario WHERE id_usuario = :id_usuario")
+_SELECT_PUBLICO = text(
+    "SELECT id_usuario, nome, email, genero, dt_nascimento, no_telefone FROM usuario WHERE id_usuario = :id_usuario"
+)
+_SELECT_LOGIN = text('SELECT id_usuario, nome, email, hash_senha FROM usuario WHERE email = :email')
+_EMAIL_EM_USO = text("SELECT id_usuario FROM usuario WHERE email = :email AND id_usuario != :id_logado")
+_INSERT = text(
+    """
+    INSERT INTO usuario (nome, email, hash_senha, genero, dt_nascimento, no_telefone)
+    VALUES (:nome, :email, :hash_senha, :genero, :dt_nascimento, :no_telefone)
+"""
+)
+_UPDATE_HASH = text('UPDATE usuario SET hash_senha = :hash_senha WHERE id_usuario = :id_usuario')
+
+
+def buscar(conn, id_usuario: int):
+    """Linha completa de `usuario` (inclui `hash_senha`), ou None."""
+    return conn.execute(_SELECT_COMPLETO, {'id_usuario': id_usuario}).fetchone()
+
+
+def buscar_publico(conn, id_usuario: int):
+    """Dados exibíveis do usuário (sem `hash_senha`), ou None."""
+    return conn.execute(_SELECT_PUBLICO, {'id_usuario': id_usuario}).fetchone()
+
+
+def buscar_login(conn, email: str):
+    return conn.execute(_SELECT_LOGIN, {'email': email}).fetchone()
+
+
+def email_em_uso(conn, email: str, exceto_id: int) -> bool:
+    return conn.execute(_EMAIL_EM_USO, {'email': email, 'id_logado': exceto_id}).fetchone() is not None
+
+
+def inserir(conn, nome: str, email: str, hash_senha: str, genero: Optional[str] = None,
+            dt_nascimento=None, no_telefone: Optional[str] = None) -> int:
+    params = {
+        'nome': nome,
+        'email': email,
+        'hash_senha': hash_senha,
+        'genero': genero,
+        'dt_nascimento': dt_nascimento,
+        'no_telefone': no_telefone,
+    }
+    return conn.execute(_INSERT, params).lastrowid
+
+
+def atualizar_hash(conn, id_usuario: int, hash_senha: str) -> None:
+    conn.execute(_UPDATE_HASH, {'hash_senha': hash_senha, 'id_usuario': id_usuario})
+
+
+@lru_cache(maxsize=None)
+def _update_stmt(colunas: tuple):
+    return (
+        update(usuario)
+        .where(usuario.c.id_usuario == bindparam('_id_usuario'))
+        .values({coluna: bindparam(f'_{coluna}') for coluna in colunas})
+    )
+
+
+def atualizar(conn, id_usuario: int, campos: dict) -> None:
+    """UPDATE dos `CAMPOS_EDITAVEIS` presentes em `campos` (um comando por conjunto de colunas)."""
+    params = {f'_{coluna}': valor for coluna, valor in campos.items()}
+    params['_id_usuario'] = id_usuario
+    conn.execute(_update_stmt(tuple(sorted(campos))), params)
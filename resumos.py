@@ -0,0 +1,103 @@
+"""Reconstrução das tabelas de resumo mantidas incrementalmente pelas rotas (`flask resumos ...`).
+
+As rotas atualizam os resumos por delta, na mesma transação da escrita. Se
+algum dado for alterado por fora da aplicação (carga manual, `flask seed`,
+correção direta no banco), estes comandos recalculam tudo a partir das
+tabelas de origem: as presenças em faixas de `--lote` partidas com commit
+por faixa, a classificação (uma linha por time) de uma vez e as estatísticas
+dos jogadores em faixas de `--lote` times.
+"""
+import time as _time
+
+import click
+from flask.cli import AppGroup
+
+from repository import classificacao, estatisticas, partidas
+from table_versions import bump_versions
+
+resumos_cli = AppGroup('resumos', help='Recalcula as tabelas de resumo a partir dos dados de origem.')
+
+
+def rebuild_presencas(conn, lote: int = 10000, echo=print) -> int:
+    """Recalcula `partida_presenca_resumo` inteira; retorna quantas faixas foram processadas."""
+    menor, maior = partidas.faixa_resumo(conn)
+    if menor is None:
+        return 0
+
+    faixas = 0
+    for ini in range(menor, maior + 1, lote):
+        partidas.recalcular_resumo(conn, ini, ini + lote - 1)
+        conn.commit()
+        faixas += 1
+    bump_versions(conn, 'partida_presenca_resumo')
+    conn.commit()
+    echo(f'partida_presenca_resumo: partidas {menor}..{maior} em {faixas} faixa(s).')
+    return faixas
+
+
+def rebuild_classificacao(conn, echo=print) -> None:
+    """Recalcula `classificacao` inteira numa transação (uma linha por time)."""
+    classificacao.recalcular(conn)
+    bump_versions(conn, 'classificacao')
+    conn.commit()
+    echo('classificacao: recalculada a partir de partida/time_partida.')
+
+
+def rebuild_estatisticas(conn, lote: int = 1000, echo=print) -> int:
+    """Recalcula `estatistica_jogador` inteira; retorna quantas faixas foram processadas."""
+    menor, maior = estatisticas.faixa(conn)
+    if menor is None:
+        return 0
+
+    faixas = 0
+    for ini in range(menor, maior + 1, lote):
+        estatisticas.recalcular(conn, ini, ini + lote - 1)
+        conn.commit()
+        faixas += 1
+    echo(f'estatistica_jogador: times {menor}..{maior} em {faixas} faixa(s).')
+    return faixas
+
+
+@resumos_cli.command('presencas')
+@click.option('--lote', type=int, default=10000, show_default=True, help='Partidas por faixa (uma transação cada).')
+def presencas_command(lote):
+    """Recalcula os contadores de presença por partida e time."""
+    from db import engine
+
+    t0 = _time.perf_counter()
+    with engine.connect() as conn:
+        rebuild_presencas(conn, lote, echo=click.echo)
+    click.echo(f'Concluído em {_time.perf_counter() - t0:.1f}s.')
+
+
+@resumos_cli.command('classificacao')
+@click.option('--verificar', is_flag=True,
+              help='Só compara com o cálculo direto sobre `partida`; sai com código 1 se houver divergência.')
+def classificacao_command(verificar):
+    """Recalcula (ou confere) a classificação materializada."""
+    from db import engine
+
+    with engine.connect() as conn:
+        if not verificar:
+            rebuild_classificacao(conn, echo=click.echo)
+            return
+
+        divergentes = classificacao.divergencias(conn)
+
+    for id_time, materializada, calculada in divergentes:
+        click.echo(f'time {id_time}: materializada={materializada} calculada={calculada}')
+    click.echo(f'{len(divergentes)} time(s) divergente(s).')
+    if divergentes:
+        raise SystemExit(1)
+
+
+@resumos_cli.command('estatisticas')
+@click.option('--lote', type=int, default=1000, show_default=True, help='Times por faixa (uma transação cada).')
+def estatisticas_command(lote):
+    """Recalcula as estatísticas de presença por jogador e time."""
+    from db import engine
+
+    t0 = _time.perf_counter()
+    with engine.connect() as conn:
+        rebuild_estatisticas(conn, lote, echo=click.echo)
+    click.echo(f'Concluído em {_time.perf_counter() - t0:.1f}s.')
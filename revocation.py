@@ -0,0 +1,104 @@
+import hashlib
+import logging
+import math
+import threading
+import time
+
+from sqlalchemy import text
+
+from db import get_connection
+
+logger = logging.getLogger(__name__)
+
+# A tabela `token_revogacao` é criada pela migração v003; `revogado_em` em
+# milissegundos desde a v009.
+_REVOGADOS_DESDE = text("SELECT DISTINCT fk_usuario FROM token_revogacao WHERE revogado_em >= :limite")
+_ULTIMA_REVOGACAO = text("SELECT MAX(revogado_em) AS revogado_em FROM token_revogacao WHERE fk_usuario = :id_usuario")
+_INSERT = text("INSERT INTO token_revogacao (fk_usuario, revogado_em) VALUES (:fk_usuario, :revogado_em)")
+
+
+class BloomFilter:
+    """Filtro de Bloom simples: sem falsos negativos, falsos positivos em ~`error_rate`."""
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        capacity = max(1, capacity)
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(str(key).encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, key) -> None:
+        for pos in self._positions(key):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class RevocationList:
+    """Revogações de token mantidas em memória como um filtro de Bloom.
+
+    O filtro contém os usuários com alguma revogação dentro da validade do
+    refresh token e é reconstruído a partir de `token_revogacao` a cada
+    `refresh_seconds`. Um usuário fora do filtro certamente não foi revogado
+    (caso comum, sem SQL); um acerto é confirmado no banco.
+    """
+
+    def __init__(self, refresh_seconds: float, window_seconds: float, capacity: int = 10000):
+        self.refresh_seconds = refresh_seconds
+        self.window_seconds = window_seconds
+        self.capacity = capacity
+        self._filter = BloomFilter(capacity)
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def rebuild(self) -> None:
+        limite = int((time.time() - self.window_seconds) * 1000)
+        with get_connection() as conn:
+            ids = [row._mapping['fk_usuario'] for row in conn.execute(_REVOGADOS_DESDE, {'limite': limite})]
+
+        novo_filtro = BloomFilter(max(self.capacity, 2 * len(ids)))
+        for id_usuario in ids:
+            novo_filtro.add(id_usuario)
+        self._filter = novo_filtro
+
+    def _refresh_if_stale(self) -> None:
+        agora = time.monotonic()
+        if self._loaded_at is not None and agora - self._loaded_at < self.refresh_seconds:
+            return
+        if not self._lock.acquire(blocking=False):
+            return  # outra thread já está reconstruindo
+        try:
+            self.rebuild()
+        except Exception as e:
+            logger.error(f'Falha ao reconstruir filtro de revogação: {e}')
+        finally:
+            self._loaded_at = agora
+            self._lock.release()
+
+    def might_be_revoked(self, id_usuario: int) -> bool:
+        self._refresh_if_stale()
+        return id_usuario in self._filter
+
+    def is_revoked(self, id_usuario: int, issued_at_ms: int) -> bool:
+        """Confirma no banco se existe revogação posterior à emissão do token.
+
+        A comparação é em milissegundos: com segundos inteiros, um token emitido
+        logo depois da revogação, no mesmo segundo, ficaria revogado para sempre.
+        """
+        with get_connection() as conn:
+            result = conn.execute(_ULTIMA_REVOGACAO, {'id_usuario': id_usuario}).fetchone()
+
+        revogado_em = result._mapping['revogado_em'] if result else None
+        return revogado_em is not None and issued_at_ms <= revogado_em
+
+    def revoke(self, conn, id_usuario: int) -> None:
+        """Registra a revogação na transação de `conn` e já a aplica ao filtro local."""
+        conn.execute(_INSERT, {'fk_usuario': id_usuario, 'revogado_em': int(time.time() * 1000)})
+        self._filter.add(id_usuario)
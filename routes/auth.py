@@ -1,8 +1,10 @@
 from flask import Blueprint, request, jsonify, current_app
-from werkzeug.security import check_password_hash
-from auth import generate_token
+from auth import generate_token, generate_token_pair, decode_token, is_token_revoked, load_user, invalidate_user
+from passwords import verify_password, hash_password, needs_rehash, HashPoolSaturated
+from config import JWT_STATELESS
+import jwt
 from db import get_connection
-from sqlalchemy import text
+from repository import usuarios
 
 bp = Blueprint('auth', __name__)
 
@@ -18,14 +20,73 @@ def login():
 
     try:
         with get_connection() as conn:
-            query = text('SELECT id_usuario, nome, hash_senha FROM usuario WHERE email = :email')
-            result = conn.execute(query, {'email': email}).fetchone()
+            result = usuarios.buscar_login(conn, email)
 
-        if not result or not check_password_hash(result._mapping['hash_senha'], senha):
+        if not result or not verify_password(result._mapping['hash_senha'], senha):
             return jsonify({'error': 'Credenciais inválidas.'}), 401
 
+        if needs_rehash(result._mapping['hash_senha']):
+            _rehash_password(result._mapping['id_usuario'], senha)
+
+        if JWT_STATELESS:
+            return jsonify(generate_token_pair(result._mapping['id_usuario'], result._mapping['nome'], result._mapping['email']))
+
         token = generate_token(result._mapping['id_usuario'], result._mapping['nome'])
         return jsonify({'access_token': token})
+    except HashPoolSaturated:
+        return jsonify({'error': 'Servidor ocupado. Tente novamente em instantes.'}), 503, {'Retry-After': '1'}
     except Exception as e:
         current_app.logger.error(f'Erro no login: {e}')
         return jsonify({'error': str(e)}), 500
+
+
+def _rehash_password(id_usuario: int, senha: str) -> None:
+    """Regrava o hash com os parâmetros atuais; falhas não impedem o login."""
+    try:
+        novo_hash = hash_password(senha)
+        with get_connection() as conn:
+            usuarios.atualizar_hash(conn, id_usuario, novo_hash)
+            conn.commit()
+        invalidate_user(id_usuario)
+    except Exception as e:
+        current_app.logger.warning(f'Falha ao atualizar hash de senha do usuário {id_usuario}: {e}')
+
+
+@bp.route('/token/refresh', methods=['POST'])
+def refresh_token():
+    """Troca um refresh token válido por um novo par (apenas no modo sem estado)."""
+    if not JWT_STATELESS:
+        return jsonify({'error': 'Refresh token não habilitado neste servidor.'}), 404
+
+    data = request.get_json()
+    if not data or 'refresh_token' not in data:
+        return jsonify({'error': "'refresh_token' é obrigatório."}), 400
+
+    try:
+        payload = decode_token(data['refresh_token'])
+    except jwt.ExpiredSignatureError:
+        return jsonify({'message': 'Refresh token expirou!'}), 401
+    except jwt.InvalidTokenError:
+        return jsonify({'message': 'Refresh token é inválido!'}), 401
+
+    if payload.get('typ') != 'refresh':
+        return jsonify({'message': 'Refresh token é inválido!'}), 401
+
+    try:
+        id_usuario = int(payload.get('sub'))
+    except (TypeError, ValueError):
+        return jsonify({'message': 'Refresh token é inválido (sub malformado).'}), 401
+
+    try:
+        if is_token_revoked(id_usuario, payload):
+            return jsonify({'message': 'Refresh token revogado. Faça login novamente.'}), 401
+
+        # Relê o usuário para que os novos claims reflitam nome/e-mail atuais
+        user = load_user(id_usuario)
+        if not user:
+            return jsonify({'message': 'Usuário do token não encontrado.'}), 401
+
+        return jsonify(generate_token_pair(user._mapping['id_usuario'], user._mapping['nome'], user._mapping['email']))
+    except Exception as e:
+        current_app.logger.error(f'Erro no refresh: {e}')
+        return jsonify({'error': str(e)}), 500
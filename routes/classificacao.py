@@ -0,0 +1,29 @@
+from flask import Blueprint, jsonify
+from replicas import get_read_connection
+from auth import token_required
+from repository import classificacao as repo
+from table_versions import versioned_etag
+
+bp = Blueprint('classificacao', __name__)
+
+
+@bp.route('/classificacao', methods=['GET'])
+@token_required
+@versioned_etag('classificacao', 'time')
+def get_classificacao(current_user):
+    """Tabela de classificação: uma linha por time com jogos, a partir de `classificacao`.
+
+    Ordem: pontos, vitórias, saldo e gols pró. O custo é proporcional ao
+    número de times, não de partidas.
+    """
+    try:
+        with get_read_connection() as conn:
+            linhas = repo.listar(conn)
+
+        return jsonify([
+            {'posicao': posicao, **linha._mapping}
+            for posicao, linha in enumerate(linhas, start=1)
+        ])
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
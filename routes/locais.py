@@ -1,7 +1,13 @@
 from flask import Blueprint, request, jsonify
-from sqlalchemy import text
-from db import engine
+from db import get_connection
+from repository import cached_text, locais as repo
+from replicas import get_read_connection
 from auth import token_required
+from pagination import Page, PaginationError
+from table_versions import bump_versions, versioned_etag
+from scheduling import horario_do_dia, janela_do_dia, mesclar_intervalos, intervalos_livres, formatar_horario
+from config import DISPONIBILIDADE_MAX_DIAS
+from datetime import date, datetime, time, timedelta
 
 bp = Blueprint('locais', __name__)
 
@@ -22,20 +28,11 @@ def create_local(current_user):
     disponivel = data.get("disponivel_para_agendamento", True)
 
     try:
-        with engine.connect() as conn:
-            query = text(
-                """
-                INSERT INTO local (nome, capacidade, disponivel_para_agendamento)
-                VALUES (:nome, :capacidade, :disponivel)
-            """
-            )
-            params = {"nome": nome, "capacidade": capacidade, "disponivel": disponivel}
-
-            result = conn.execute(query, params)
+        with get_connection() as conn:
+            novo_local_id = repo.inserir(conn, nome, capacidade, disponivel)
+            bump_versions(conn, "local")
             conn.commit()
 
-            novo_local_id = result.lastrowid
-
         return (
             jsonify(
                 {
@@ -52,17 +49,94 @@ def create_local(current_user):
 
 @bp.route("/locais", methods=["GET"])
 @token_required
+@versioned_etag("local")
 def get_locais(current_user):
     try:
-        with engine.connect() as conn:
-            query = text(
-                "SELECT id_local, nome, capacidade, disponivel_para_agendamento FROM local"
-            )
-            result = conn.execute(query)
+        page = Page.from_request(request.args, key_types=(int,))
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        with get_read_connection() as conn:
+            query, params = page.keyset_sql(repo.LOCAIS_SELECT, [], {}, ("id_local",))
+            result = conn.execute(cached_text(query), params)
+
+            locais = page.split(result, key=lambda row: (row._mapping["id_local"],))
+
+        response = jsonify(locais)
+        page.apply_headers(response, request.base_url, request.args)
+        return response
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@bp.route("/locais/<int:id_local>/disponibilidade", methods=["GET"])
+@token_required
+def get_disponibilidade(current_user, id_local):
+    """Janelas livres do local por dia, com a mesma regra de horário de `create_partida`.
+
+    Parâmetros: `data` (AAAA-MM-DD), `data_fim` opcional (inclusiva, para a
+    visão semanal) e `duracao` em minutos (padrão 60). Três consultas no
+    total — local, exceções e agendamentos do período — independentemente
+    da quantidade de dias.
+    """
+    try:
+        data_ini = date.fromisoformat(request.args["data"])
+        data_fim = date.fromisoformat(request.args.get("data_fim", request.args["data"]))
+    except KeyError:
+        return jsonify({"error": "O parâmetro 'data' é obrigatório (AAAA-MM-DD)."}), 400
+    except ValueError:
+        return jsonify({"error": "Formato de data inválido. Use AAAA-MM-DD."}), 400
+
+    try:
+        duracao = timedelta(minutes=int(request.args.get("duracao", 60)))
+    except ValueError:
+        return jsonify({"error": "'duracao' deve ser um número inteiro de minutos."}), 400
+
+    num_dias = (data_fim - data_ini).days + 1
+    if num_dias < 1 or num_dias > DISPONIBILIDADE_MAX_DIAS:
+        return jsonify({"error": f"O período deve ter entre 1 e {DISPONIBILIDADE_MAX_DIAS} dias."}), 400
+    if duracao <= timedelta(0):
+        return jsonify({"error": "'duracao' deve ser positiva."}), 400
+
+    inicio_periodo = datetime.combine(data_ini, time.min)
+    fim_periodo = datetime.combine(data_fim, time.min) + timedelta(days=1)
+
+    try:
+        with get_connection() as conn:
+            local = repo.horario(conn, id_local)
+
+            if not local:
+                return jsonify({"error": "Local não encontrado."}), 404
+
+            excecoes = repo.excecoes_por_data(conn, id_local, data_ini, data_fim)
+            ocupados = mesclar_intervalos(repo.agendamentos(conn, id_local, inicio_periodo, fim_periodo))
+
+        dados = local._mapping
+        dias = []
+        for offset in range(num_dias):
+            data = data_ini + timedelta(days=offset)
+            dia = horario_do_dia(dados["horario_abertura"], dados["horario_fechamento"], excecoes.get(data))
+            janela = janela_do_dia(dia, data)
+            livres = intervalos_livres(janela[0], janela[1], ocupados, duracao) if janela else []
 
-            locais = [dict(row._mapping) for row in result]
+            dias.append({
+                "data": data.isoformat(),
+                "fechado": dia.fechado,
+                "motivo": dia.motivo or None,
+                "abertura": formatar_horario(dia.abertura),
+                "fechamento": formatar_horario(dia.fechamento),
+                "livres": [{"inicio": ini.isoformat(), "fim": fim.isoformat()} for ini, fim in livres],
+            })
 
-        return jsonify(locais)
+        return jsonify({
+            "id_local": id_local,
+            "nome": dados["nome"],
+            "disponivel_para_agendamento": bool(dados["disponivel_para_agendamento"]),
+            "duracao_minutos": int(duracao.total_seconds() // 60),
+            "dias": dias,
+        })
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -1,13 +1,28 @@
-from flask import Blueprint, request, jsonify
-from flask import Blueprint, request, jsonify
-from sqlalchemy import text
-from db import engine
+from flask import Blueprint, Response, current_app, request, jsonify
+from db import get_transaction
+from repository import cached_text, classificacao, estatisticas, outbox, partidas as repo
+from replicas import get_read_connection
 from auth import token_required
-from datetime import datetime, timedelta, timezone
+from datetime import date, datetime, time, timedelta, timezone
 from sqlalchemy.exc import IntegrityError
+from pagination import Page, PaginationError
+from table_versions import bump_versions, versioned_etag
+from streaming import wants_stream, ndjson_response, ndjson_rows
+import eventos
+from scheduling import (
+    horario_do_dia,
+    dentro_do_horario,
+    janela_do_dia,
+    mesclar_intervalos,
+    varrer_conflitos,
+    gerar_slots,
+)
+from torneio import rodadas_round_robin, alocar_partidas
+from config import EVENTOS_HEARTBEAT_SECONDS, PARTIDAS_LOTE_MAX, PRESENCA_LOTE_MAX, TORNEIO_MAX_TIMES
 
 bp = Blueprint('partidas', __name__)
 
+STATUS_PRESENCA = ['Confirmado', 'Duvida', 'Recusado']
 
 @bp.route("/partidas", methods=["POST"])
 @token_required
@@ -56,17 +71,8 @@ def create_partida(current_user):
         )
 
     try:
-        with engine.begin() as conn:
-            query_get_data = text(
-                """
-                SELECT t.fk_responsavel_time, l.horario_abertura, l.horario_fechamento 
-                FROM time AS t, local AS l
-                WHERE t.id_time = :id_time AND l.id_local = :id_local
-            """
-            )
-            result = conn.execute(
-                query_get_data, {"id_time": id_time_casa, "id_local": id_local}
-            ).fetchone()
+        with get_transaction() as conn:
+            result = repo.dados_agendamento(conn, id_time_casa, id_local)
 
             if not result:
                 return jsonify({"error": "Time da casa ou Local não encontrado."}), 404
@@ -80,74 +86,31 @@ def create_partida(current_user):
                     403,
                 )
 
-            horario_abertura_do_dia = dados["horario_abertura"]
-            horario_fechamento_do_dia = dados["horario_fechamento"]
-            local_fechado_o_dia_todo = False
-            motivo_fechamento = ""
-
-            query_check_exception = text(
-                """
-                SELECT motivo, horario_abertura_excecao, horario_fechamento_excecao
-                FROM local_excecoes 
-                WHERE fk_local = :id_local AND data_excecao = DATE(:dthr_ini)
-            """
+            dia = horario_do_dia(
+                dados["horario_abertura"],
+                dados["horario_fechamento"],
+                repo.excecao_do_dia(conn, id_local, dthr_ini),
             )
-            excecao = conn.execute(
-                query_check_exception, {"id_local": id_local, "dthr_ini": dthr_ini}
-            ).fetchone()
-
-            if excecao:
-                ex_data = excecao._mapping
-                if ex_data["horario_abertura_excecao"] is None:
-                    local_fechado_o_dia_todo = True
-                    motivo_fechamento = (
-                        ex_data["motivo"] or "fechado por motivo não especificado"
-                    )
-                else:
-                    horario_abertura_do_dia = ex_data["horario_abertura_excecao"]
-                    horario_fechamento_do_dia = ex_data["horario_fechamento_excecao"]
-
-            if local_fechado_o_dia_todo:
+
+            if dia.fechado:
                 return (
                     jsonify({
                         "error": f"Não é possível agendar neste dia. O local estará fechado.",
-                        "motivo": motivo_fechamento,
+                        "motivo": dia.motivo,
                     }),
                     409,
                 )
 
-            if horario_abertura_do_dia and horario_fechamento_do_dia:
-                hora_inicio_partida = dthr_ini.time()
-                hora_fim_partida = dthr_fim.time()
-                timedelta_inicio = timedelta(
-                    hours=hora_inicio_partida.hour, minutes=hora_inicio_partida.minute
-                )
-                timedelta_fim = timedelta(
-                    hours=hora_fim_partida.hour, minutes=hora_fim_partida.minute
+            if not dentro_do_horario(dia, dthr_ini, dthr_fim):
+                return (
+                    jsonify({
+                        "error": "O horário solicitado está fora do horário de funcionamento para este dia.",
+                        "funcionamento_do_dia": f"Das {dia.abertura} às {dia.fechamento}",
+                    }),
+                    409,
                 )
 
-                if not (
-                    horario_abertura_do_dia <= timedelta_inicio
-                    and timedelta_fim <= horario_fechamento_do_dia
-                ):
-                    return (
-                        jsonify({
-                            "error": "O horário solicitado está fora do horário de funcionamento para este dia.",
-                            "funcionamento_do_dia": f"Das {horario_abertura_do_dia} às {horario_fechamento_do_dia}",
-                        }),
-                        409,
-                    )
-
-            query_check_conflict = text(
-                """
-                SELECT 1 FROM agendamento 
-                WHERE fk_local = :id_local AND dthr_ini < :dthr_fim AND dthr_fim > :dthr_ini
-            """
-            )
-            conflito = conn.execute(
-                query_check_conflict,
-                {"id_local": id_local, "dthr_ini": dthr_ini, "dthr_fim": dthr_fim},
-            ).fetchone()
+            conflito = repo.tem_conflito(conn, id_local, dthr_ini, dthr_fim)
 
             if conflito:
                 return (
@@ -157,35 +120,12 @@ def create_partida(current_user):
                     409,
                 )
 
-            query_insert_agendamento = text(
-                "INSERT INTO agendamento (dthr_ini, dthr_fim, fk_local) VALUES (:dthr_ini, :dthr_fim, :fk_local)"
-            )
-            result_agendamento = conn.execute(
-                query_insert_agendamento,
-                {"dthr_ini": dthr_ini, "dthr_fim": dthr_fim, "fk_local": id_local},
-            )
-            id_agendamento = result_agendamento.lastrowid
-
-            query_insert_partida = text(
-                "INSERT INTO partida (fk_responsavel_partida, fk_agendamento) VALUES (:id_capitao, :id_agendamento)"
-            )
-            result_partida = conn.execute(
-                query_insert_partida,
-                {"id_capitao": id_capitao, "id_agendamento": id_agendamento},
-            )
-            id_partida = result_partida.lastrowid
-
-            query_insert_times = text(
-                "INSERT INTO time_partida (fk_time, fk_partida, casa_visitante) VALUES (:fk_time, :fk_partida, :cv)"
-            )
-            conn.execute(
-                query_insert_times,
-                {"fk_time": id_time_casa, "fk_partida": id_partida, "cv": "C"},
-            )
-            conn.execute(
-                query_insert_times,
-                {"fk_time": id_time_visitante, "fk_partida": id_partida, "cv": "V"},
-            )
+            id_partida = repo.inserir(conn, id_capitao, id_local, dthr_ini, dthr_fim, id_time_casa, id_time_visitante)
+            bump_versions(conn, "partida")
+            outbox.registrar(conn, outbox.PARTIDA_CRIADA, _evento_partida_criada(id_partida, id_capitao, {
+                "id_time_casa": id_time_casa, "id_time_visitante": id_time_visitante,
+                "id_local": id_local, "dthr_ini": dthr_ini, "dthr_fim": dthr_fim,
+            }))
 
         return (
             jsonify({"message": "Partida agendada com sucesso!", "id_partida": id_partida}),
@@ -196,79 +136,359 @@ def create_partida(current_user):
         return jsonify({"error": "Ocorreu um erro interno.", "details": str(e)}), 500
 
 
-@bp.route('/partidas', methods=['GET'])
+@bp.route("/partidas/lote", methods=["POST"])
 @token_required
-def get_partidas(current_user):
+def create_partidas_lote(current_user):
+    """Agenda uma lista de partidas em uma única transação.
+
+    Corpo: `{"modo": "tudo_ou_nada" | "melhor_esforco", "partidas": [...]}`,
+    cada item com os mesmos campos de POST /partidas. As regras são as de
+    `create_partida`, mas os dados de apoio vêm de uma consulta por tabela
+    para o lote inteiro e a escrita usa INSERTs multi-linha. A resposta traz
+    um resultado por item, na ordem recebida.
+    """
+    data = request.get_json()
+    if not data or not isinstance(data.get("partidas"), list) or not data["partidas"]:
+        return jsonify({"error": "O campo 'partidas' deve ser uma lista não vazia."}), 400
+
+    modo = data.get("modo", "tudo_ou_nada")
+    if modo not in ("tudo_ou_nada", "melhor_esforco"):
+        return jsonify({"error": "O campo 'modo' deve ser 'tudo_ou_nada' ou 'melhor_esforco'."}), 400
+
+    if len(data["partidas"]) > PARTIDAS_LOTE_MAX:
+        return jsonify({"error": f"O lote aceita no máximo {PARTIDAS_LOTE_MAX} partidas."}), 400
+
+    id_capitao = current_user._mapping["id_usuario"]
+    resultados = [None] * len(data["partidas"])
+    itens = {}
+
+    for indice, item in enumerate(data["partidas"]):
+        erro = _validar_item_lote(item)
+        if erro:
+            resultados[indice] = {"indice": indice, "status": "erro", "codigo": 400, "error": erro}
+        else:
+            itens[indice] = {
+                "id_time_casa": item["id_time_casa"],
+                "id_time_visitante": item["id_time_visitante"],
+                "id_local": item["id_local"],
+                "dthr_ini": datetime.fromisoformat(item["dthr_ini"]),
+                "dthr_fim": datetime.fromisoformat(item["dthr_fim"]),
+            }
+
+    try:
+        with get_transaction() as conn:
+            if itens:
+                erros = _checar_lote(conn, id_capitao, itens)
+                for indice, (codigo, erro) in erros.items():
+                    resultados[indice] = {"indice": indice, "status": "erro", "codigo": codigo, "error": erro}
+                    del itens[indice]
+
+            houve_erro = any(r is not None for r in resultados)
+            if houve_erro and modo == "tudo_ou_nada":
+                return (
+                    jsonify({
+                        "error": "Nenhuma partida foi agendada: há itens inválidos ou em conflito.",
+                        "resultados": [r or {"indice": i, "status": "valida"} for i, r in enumerate(resultados)],
+                    }),
+                    409,
+                )
+
+            ids = repo.inserir_lote(conn, id_capitao, [itens[i] for i in sorted(itens)])
+            if ids:
+                bump_versions(conn, "partida")
+                outbox.registrar_muitos(conn, outbox.PARTIDA_CRIADA, [
+                    _evento_partida_criada(id_partida, id_capitao, itens[indice])
+                    for indice, id_partida in zip(sorted(itens), ids)
+                ])
+            for indice, id_partida in zip(sorted(itens), ids):
+                resultados[indice] = {"indice": indice, "status": "criada", "id_partida": id_partida}
+
+        criadas = len(itens)
+        return (
+            jsonify({
+                "message": f"{criadas} de {len(resultados)} partida(s) agendada(s).",
+                "resultados": resultados,
+            }),
+            201 if criadas else 409,
+        )
+
+    except Exception as e:
+        return jsonify({"error": "Ocorreu um erro interno.", "details": str(e)}), 500
+
+
+def _evento_partida_criada(id_partida, id_responsavel, item) -> dict:
+    """Payload do evento `partida_criada` no outbox (`item` com os campos de POST /partidas)."""
+    return {
+        "id_partida": id_partida,
+        "id_responsavel": id_responsavel,
+        **{campo: item[campo] for campo in ("id_time_casa", "id_time_visitante", "id_local", "dthr_ini", "dthr_fim")},
+    }
+
+
+def _validar_item_lote(item) -> str:
+    """Validações sem banco de `create_partida`; retorna a mensagem de erro ou ''."""
+    required_fields = ["id_time_casa", "id_time_visitante", "id_local", "dthr_ini", "dthr_fim"]
+    if not isinstance(item, dict) or not all(key in item for key in required_fields):
+        return "Campos obrigatórios: id_time_casa, id_time_visitante, id_local, dthr_ini, dthr_fim."
+
+    try:
+        dthr_ini = datetime.fromisoformat(item["dthr_ini"])
+        dthr_fim = datetime.fromisoformat(item["dthr_fim"])
+    except (TypeError, ValueError):
+        return "Formato de data inválido. Use AAAA-MM-DD HH:MM:SS."
+
+    if item["id_time_casa"] == item["id_time_visitante"]:
+        return "O time da casa e o visitante não podem ser o mesmo."
+
+    if dthr_ini >= dthr_fim:
+        return "A data/hora de início deve ser anterior à de término."
+
+    return ""
+
+
+def _checar_lote(conn, id_capitao, itens: dict) -> dict:
+    """Aplica as regras de banco de `create_partida` ao lote inteiro.
+
+    Uma consulta por tabela (times, locais, exceções e agendamentos do
+    período) e uma varredura de conflitos por local. Retorna
+    `{indice: (codigo_http, mensagem)}` para os itens rejeitados.
+    """
+    erros = {}
+
+    ids_times = {i["id_time_casa"] for i in itens.values()} | {i["id_time_visitante"] for i in itens.values()}
+    ids_locais = {i["id_local"] for i in itens.values()}
+    dthr_min = min(i["dthr_ini"] for i in itens.values())
+    dthr_max = max(i["dthr_fim"] for i in itens.values())
+
+    responsaveis, locais, excecoes, ocupados_por_local = repo.carregar_agenda(conn, ids_times, ids_locais, dthr_min, dthr_max)
+
+    candidatos_por_local = {}
+    for indice, item in itens.items():
+        local = locais.get(item["id_local"])
+        if item["id_time_casa"] not in responsaveis or not local:
+            erros[indice] = (404, "Time da casa ou Local não encontrado.")
+            continue
+        if item["id_time_visitante"] not in responsaveis:
+            erros[indice] = (404, "Time visitante não encontrado.")
+            continue
+        if responsaveis[item["id_time_casa"]] != id_capitao:
+            erros[indice] = (403, "Acesso negado. Apenas o capitão do time da casa pode agendar partidas.")
+            continue
+
+        dia = horario_do_dia(
+            local["horario_abertura"],
+            local["horario_fechamento"],
+            excecoes.get((item["id_local"], item["dthr_ini"].date())),
+        )
+        if dia.fechado:
+            erros[indice] = (409, f"Não é possível agendar neste dia. O local estará fechado ({dia.motivo}).")
+            continue
+        if not dentro_do_horario(dia, item["dthr_ini"], item["dthr_fim"]):
+            erros[indice] = (409, f"O horário solicitado está fora do horário de funcionamento (das {dia.abertura} às {dia.fechamento}).")
+            continue
+
+        candidatos_por_local.setdefault(item["id_local"], []).append((item["dthr_ini"], item["dthr_fim"], indice))
+
+    for id_local, candidatos in candidatos_por_local.items():
+        ocupados = mesclar_intervalos(ocupados_por_local.get(id_local, []))
+        for indice, motivo in varrer_conflitos(ocupados, candidatos).items():
+            if motivo == "existente":
+                erros[indice] = (409, "Horário indisponível. Já existe um agendamento neste local e período.")
+            else:
+                erros[indice] = (409, "Horário em conflito com outra partida do mesmo lote.")
+
+    return erros
+
+
+@bp.route("/partidas/torneio", methods=["POST"])
+@token_required
+def create_torneio(current_user):
+    """Gera e agenda um campeonato de pontos corridos (turno único ou ida e volta).
+
+    Corpo: `times` (ids), `locais` (ids), `data_inicio`/`data_fim`
+    (AAAA-MM-DD, inclusivas), `duracao` em minutos, `ida_e_volta` e
+    `simular` (só devolve a tabela, sem gravar). As partidas ocupam os
+    horários livres mais cedo, respeitando funcionamento, `local_excecoes`
+    e agendamentos existentes (as mesmas regras de `create_partida`), sem
+    dar duas partidas a um time no mesmo dia. Quem gera o campeonato
+    precisa ser capitão de um dos times; cada partida fica sob a
+    responsabilidade do capitão do time da casa, como em `create_partida`.
+    """
+    data = request.get_json()
+    if not data or not all(key in data for key in ("times", "locais", "data_inicio", "data_fim", "duracao")):
+        return jsonify({"error": "Campos obrigatórios: times, locais, data_inicio, data_fim, duracao."}), 400
+
+    try:
+        ids_times = [int(t) for t in data["times"]]
+        ids_locais = [int(l) for l in data["locais"]]
+        data_inicio = date.fromisoformat(data["data_inicio"])
+        data_fim = date.fromisoformat(data["data_fim"])
+        duracao = timedelta(minutes=int(data["duracao"]))
+    except (TypeError, ValueError):
+        return jsonify({"error": "Use listas de ids, datas AAAA-MM-DD e 'duracao' em minutos."}), 400
+
+    if len(set(ids_times)) != len(ids_times) or not 2 <= len(ids_times) <= TORNEIO_MAX_TIMES:
+        return jsonify({"error": f"Informe de 2 a {TORNEIO_MAX_TIMES} times distintos."}), 400
+    if not ids_locais:
+        return jsonify({"error": "Informe ao menos um local."}), 400
+    if data_fim < data_inicio or (data_fim - data_inicio).days > 366 or duracao <= timedelta(0):
+        return jsonify({"error": "Período (até um ano) ou duração inválidos."}), 400
+
+    id_organizador = current_user._mapping["id_usuario"]
+    rodadas = rodadas_round_robin(ids_times, ida_e_volta=bool(data.get("ida_e_volta")))
+    total = sum(len(rodada) for rodada in rodadas)
+    dthr_min = datetime.combine(data_inicio, time.min)
+    dthr_max = datetime.combine(data_fim, time.min) + timedelta(days=1)
+
     try:
-        with engine.connect() as conn:
-            query = text(
-                """
-                SELECT 
-                    p.id_partida,
-                    a.dthr_ini,
-                    a.dthr_fim,
-                    l.nome AS nome_local,
-                    u.nome AS nome_responsavel,
-                    p.placar_time_casa,
-                    p.placar_time_visitante,
-                    (SELECT t.nome_time FROM time_partida tp JOIN time t ON tp.fk_time = t.id_time WHERE tp.fk_partida = p.id_partida AND tp.casa_visitante = 'C') AS time_casa,
-                    (SELECT t.nome_time FROM time_partida tp JOIN time t ON tp.fk_time = t.id_time WHERE tp.fk_partida = p.id_partida AND tp.casa_visitante = 'V') AS time_visitante
-                FROM partida AS p
-                JOIN agendamento AS a ON p.fk_agendamento = a.id_agendamento
-                JOIN local AS l ON a.fk_local = l.id_local
-                JOIN usuario AS u ON p.fk_responsavel_partida = u.id_usuario
-                ORDER BY a.dthr_ini ASC
-            """
+        with get_transaction() as conn:
+            responsaveis, locais, excecoes, ocupados_por_local = repo.carregar_agenda(
+                conn, set(ids_times), set(ids_locais), dthr_min, dthr_max
             )
 
-            result = conn.execute(query)
+            faltando = sorted(set(ids_times) - set(responsaveis)) + sorted(set(ids_locais) - set(locais))
+            if faltando:
+                return jsonify({"error": "Times ou locais não encontrados.", "ids": faltando}), 404
+
+            if id_organizador not in responsaveis.values():
+                return jsonify({"error": "Acesso negado. Apenas capitães de times participantes podem gerar o campeonato."}), 403
+
+            slots_por_dia = {}
+            for id_local in ids_locais:
+                local = locais[id_local]
+                ocupados = mesclar_intervalos(ocupados_por_local.get(id_local, []))
+                for offset in range((data_fim - data_inicio).days + 1):
+                    dia_data = data_inicio + timedelta(days=offset)
+                    dia = horario_do_dia(local["horario_abertura"], local["horario_fechamento"], excecoes.get((id_local, dia_data)))
+                    janela = janela_do_dia(dia, dia_data)
+                    if janela:
+                        slots_por_dia.setdefault(dia_data, []).extend(
+                            (id_local, ini, fim) for ini, fim in gerar_slots(janela[0], janela[1], ocupados, duracao)
+                        )
+
+            alocadas, nao_alocadas = alocar_partidas(rodadas, slots_por_dia)
+            if nao_alocadas:
+                return (
+                    jsonify({
+                        "error": f"Horários insuficientes no período: {len(alocadas)} de {total} partidas alocadas.",
+                        "nao_alocadas": [
+                            {"rodada": r, "id_time_casa": casa, "id_time_visitante": visitante}
+                            for r, casa, visitante in nao_alocadas
+                        ],
+                    }),
+                    409,
+                )
+
             partidas = [
-                {
-                    **row._mapping,
-                    'dthr_ini': row._mapping['dthr_ini'].isoformat(),
-                    'dthr_fim': row._mapping['dthr_fim'].isoformat(),
-                }
-                for row in result
+                {"rodada": r, "id_time_casa": casa, "id_time_visitante": visitante,
+                 "id_local": id_local, "dthr_ini": ini, "dthr_fim": fim, "id_responsavel": responsaveis[casa]}
+                for r, casa, visitante, id_local, ini, fim in alocadas
             ]
 
-        return jsonify(partidas)
+            if not data.get("simular"):
+                ids = repo.inserir_lote(conn, id_organizador, partidas)
+                bump_versions(conn, "partida")
+                for partida, id_partida in zip(partidas, ids):
+                    partida["id_partida"] = id_partida
+                outbox.registrar_muitos(conn, outbox.PARTIDA_CRIADA, [
+                    _evento_partida_criada(partida["id_partida"], partida["id_responsavel"], partida) for partida in partidas
+                ])
+
+        return (
+            jsonify({"total": total, "rodadas": len(rodadas), "simulado": bool(data.get("simular")), "partidas": partidas}),
+            200 if data.get("simular") else 201,
+        )
+
+    except Exception as e:
+        return jsonify({"error": "Ocorreu um erro interno.", "details": str(e)}), 500
+
+
+@bp.route('/partidas', methods=['GET'])
+@token_required
+@versioned_etag('partida', 'partida_presenca_resumo', 'time', 'local', 'usuario')
+def get_partidas(current_user):
+    """Lista partidas paginadas por cursor (`limit`, `after`, `before`).
+
+    Filtros opcionais: `from` (inclusivo) e `to` (exclusivo; uma data sem
+    hora inclui o dia inteiro) sobre `dthr_ini`, `id_local` e `id_time`.
+    Com `?stream=1` (ou `Accept: application/x-ndjson`) devolve todas as
+    partidas a partir de `after`, uma por linha, sem `limit`.
+    """
+    stream = wants_stream()
+    try:
+        make_page = Page.for_stream if stream else Page.from_request
+        page = make_page(request.args, key_types=(datetime.fromisoformat, int))
+        where, params = _partidas_filters(request.args)
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
+
+    key_columns = ('a.dthr_ini', 'p.id_partida')
+    if stream:
+        return ndjson_response(page, repo.PARTIDAS_SELECT, where, params, key_columns, key=_chave_partida)
+
+    query, params = page.keyset_sql(repo.PARTIDAS_SELECT, where, params, key_columns)
+
+    try:
+        with get_read_connection() as conn:
+            result = conn.execute(cached_text(query), params)
+            rows = page.split(result, key=_chave_partida)
+
+        response = jsonify(rows)
+        page.apply_headers(response, request.base_url, request.args)
+        return response
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+def _chave_partida(row) -> tuple:
+    return row._mapping['dthr_ini'], row._mapping['id_partida']
+
+
+def _partidas_filters(args) -> tuple:
+    """Traduz os filtros de GET /partidas em cláusulas WHERE e parâmetros."""
+    where = []
+    params = {}
+
+    try:
+        if args.get('from'):
+            where.append('a.dthr_ini >= :from_dthr')
+            params['from_dthr'] = datetime.fromisoformat(args['from'])
+
+        if args.get('to'):
+            to_dthr = datetime.fromisoformat(args['to'])
+            if len(args['to']) == 10:  # só a data: inclui o dia inteiro
+                to_dthr += timedelta(days=1)
+            where.append('a.dthr_ini < :to_dthr')
+            params['to_dthr'] = to_dthr
+    except ValueError:
+        raise PaginationError("Formato de data inválido em 'from'/'to'. Use AAAA-MM-DD[THH:MM:SS].")
+
+    try:
+        if args.get('id_local'):
+            where.append('a.fk_local = :id_local')
+            params['id_local'] = int(args['id_local'])
+
+        if args.get('id_time'):
+            where.append('(tpc.fk_time = :id_time OR tpv.fk_time = :id_time)')
+            params['id_time'] = int(args['id_time'])
+    except ValueError:
+        raise PaginationError("'id_local' e 'id_time' devem ser números inteiros.")
+
+    return where, params
+
+
 @bp.route('/partidas/<int:id_partida>', methods=['GET'])
 @token_required
 def get_partida_details(current_user, id_partida):
     try:
-        with engine.connect() as conn:
-            query_partida = text(
-                """
-                SELECT 
-                    p.id_partida, p.fk_responsavel_partida, a.dthr_ini, a.dthr_fim, l.nome AS nome_local, u.nome AS nome_responsavel, 
-                    p.placar_time_casa, p.placar_time_visitante,
-                    (SELECT t.id_time FROM time_partida tp JOIN time t ON tp.fk_time = t.id_time WHERE tp.fk_partida = p.id_partida AND tp.casa_visitante = 'C') AS id_time_casa,
-                    (SELECT t.nome_time FROM time_partida tp JOIN time t ON tp.fk_time = t.id_time WHERE tp.fk_partida = p.id_partida AND tp.casa_visitante = 'C') AS nome_time_casa,
-                    (SELECT t.id_time FROM time_partida tp JOIN time t ON tp.fk_time = t.id_time WHERE tp.fk_partida = p.id_partida AND tp.casa_visitante = 'V') AS id_time_visitante,
-                    (SELECT t.nome_time FROM time_partida tp JOIN time t ON tp.fk_time = t.id_time WHERE tp.fk_partida = p.id_partida AND tp.casa_visitante = 'V') AS nome_time_visitante
-                FROM partida AS p
-                JOIN agendamento AS a ON p.fk_agendamento = a.id_agendamento
-                JOIN local AS l ON a.fk_local = l.id_local
-                JOIN usuario AS u ON p.fk_responsavel_partida = u.id_usuario
-                WHERE p.id_partida = :id_partida
-            """
-            )
-
-            result_partida = conn.execute(query_partida, {"id_partida": id_partida}).fetchone()
+        with get_read_connection() as conn:
+            result_partida = repo.detalhes(conn, id_partida)
 
             if not result_partida:
                 return jsonify({"error": "Partida não encontrada."}), 404
 
-            partida_details = dict(result_partida._mapping)
-            partida_details['dthr_ini'] = partida_details['dthr_ini'].isoformat()
-            partida_details['dthr_fim'] = partida_details['dthr_fim'].isoformat()
-
-        return jsonify(partida_details)
+        return jsonify(result_partida)
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -279,78 +499,204 @@ def get_partida_details(current_user, id_partida):
 def confirm_presence(current_user, id_partida):
     data = request.get_json()
     status = data.get('status')
-    valid_statuses = ['Confirmado', 'Duvida', 'Recusado']
-    if not status or status not in valid_statuses:
-        return jsonify({'error': f"O campo 'status' é obrigatório e deve ser um de: {valid_statuses}"}), 400
+    if not status or status not in STATUS_PRESENCA:
+        return jsonify({'error': f"O campo 'status' é obrigatório e deve ser um de: {STATUS_PRESENCA}"}), 400
 
     id_usuario = current_user._mapping['id_usuario']
 
     try:
-        with engine.begin() as conn:
-            query_check_player = text(
-                """
-                SELECT 1 FROM time_membros tm
-                JOIN time_partida tp ON tm.fk_time = tp.fk_time
-                WHERE tm.fk_usuario = :id_usuario AND tp.fk_partida = :id_partida
-            """
-            )
-            is_player_in_match = conn.execute(query_check_player, {"id_usuario": id_usuario, "id_partida": id_partida}).fetchone()
+        with get_transaction() as conn:
+            times_por_jogador = repo.times_dos_jogadores(conn, id_partida, [id_usuario])
 
-            if not is_player_in_match:
+            if not times_por_jogador:
                 return jsonify({'error': 'Acesso negado. Você não é membro de nenhum dos times desta partida.'}), 403
 
-            query_upsert = text(
-                """
-                INSERT INTO partida_presenca (fk_partida, fk_usuario, status)
-                VALUES (:id_partida, :id_usuario, :status)
-                ON DUPLICATE KEY UPDATE status = :status
-            """
-            )
-            conn.execute(query_upsert, {"id_partida": id_partida, "id_usuario": id_usuario, 'status': status})
+            # Os contadores aparecem em GET /partidas, com versão própria: presenças
+            # não disputam a linha de 'partida' com agendamentos e placares
+            contadores = None
+            if repo.registrar_presencas(conn, id_partida, {id_usuario: status}, times_por_jogador):
+                contadores = repo.contadores(conn, id_partida)
+                bump_versions(conn, 'partida_presenca_resumo')
 
+        if contadores is not None:
+            _publicar_presencas(id_partida, {id_usuario: status}, contadores)
         return jsonify({'message': f"Sua presença foi atualizada para '{status}'."}), 200
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+@bp.route('/partidas/<int:id_partida>/presenca/lote', methods=['POST'])
+@token_required
+def confirm_presence_lote(current_user, id_partida):
+    """Capitão marca a presença de vários jogadores do seu time de uma vez.
+
+    Corpo: `{"presencas": [{"id_usuario": ..., "status": ...}, ...]}`. Os
+    vínculos de todos os jogadores são checados numa única consulta com
+    `IN` e as presenças válidas são gravadas num único upsert multi-linha,
+    na mesma transação. Itens inválidos não impedem os demais; a resposta
+    traz um resultado por item, na ordem recebida.
+    """
+    data = request.get_json()
+    if not data or not isinstance(data.get('presencas'), list) or not data['presencas']:
+        return jsonify({'error': "O campo 'presencas' deve ser uma lista não vazia."}), 400
+
+    if len(data['presencas']) > PRESENCA_LOTE_MAX:
+        return jsonify({'error': f"O lote aceita no máximo {PRESENCA_LOTE_MAX} presenças."}), 400
+
+    id_capitao = current_user._mapping['id_usuario']
+    resultados, validos = _validar_presencas(data['presencas'])
+
+    try:
+        with get_transaction() as conn:
+            capitaes = repo.capitaes(conn, id_partida)
+            if not capitaes:
+                return jsonify({'error': 'Partida não encontrada.'}), 404
+            if id_capitao not in capitaes:
+                return jsonify({'error': 'Acesso negado. Apenas capitães dos times da partida podem marcar presenças.'}), 403
+
+            times_por_jogador = repo.times_dos_jogadores(conn, id_partida, validos) if validos else {}
+            presencas = {}
+            for id_usuario, (indice, status) in validos.items():
+                if id_capitao not in times_por_jogador.get(id_usuario, {}).values():
+                    resultados[indice] = {
+                        'indice': indice, 'id_usuario': id_usuario, 'resultado': 'erro', 'codigo': 403,
+                        'error': 'Usuário não é membro do seu time nesta partida.',
+                    }
+                    continue
+                presencas[id_usuario] = status
+                resultados[indice] = {'indice': indice, 'id_usuario': id_usuario, 'resultado': 'atualizada', 'status': status}
+
+            contadores = None
+            if presencas and repo.registrar_presencas(conn, id_partida, presencas, times_por_jogador):
+                contadores = repo.contadores(conn, id_partida)
+                bump_versions(conn, 'partida_presenca_resumo')
+
+        if contadores is not None:
+            _publicar_presencas(id_partida, presencas, contadores)
+        return (
+            jsonify({
+                'message': f"{len(presencas)} de {len(resultados)} presença(s) atualizada(s).",
+                'resultados': resultados,
+            }),
+            200 if presencas else 400,
+        )
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+def _publicar_presencas(id_partida, presencas: dict, contadores) -> None:
+    """Evento `presenca` com os status gravados e os contadores absolutos de cada time."""
+    eventos.publicar_partida(
+        id_partida,
+        'presenca',
+        presencas=[{'id_usuario': id_usuario, 'status': status} for id_usuario, status in presencas.items()],
+        times=[dict(row._mapping) for row in contadores],
+    )
+
+
+def _validar_presencas(itens) -> tuple:
+    """Validações sem banco do lote de presenças.
+
+    Retorna `(resultados, validos)`: `resultados` tem um slot por item, já
+    preenchido para os rejeitados (formato inválido ou usuário repetido), e
+    `validos` é `{id_usuario: (indice, status)}`.
+    """
+    resultados = [None] * len(itens)
+    validos = {}
+    for indice, item in enumerate(itens):
+        id_usuario = item.get('id_usuario') if isinstance(item, dict) else None
+        status = item.get('status') if isinstance(item, dict) else None
+        if not isinstance(id_usuario, int) or isinstance(id_usuario, bool):
+            erro = "O campo 'id_usuario' é obrigatório e deve ser um número inteiro."
+        elif status not in STATUS_PRESENCA:
+            erro = f"O campo 'status' é obrigatório e deve ser um de: {STATUS_PRESENCA}"
+        elif id_usuario in validos:
+            erro = 'Usuário repetido no lote.'
+        else:
+            validos[id_usuario] = (indice, status)
+            continue
+        resultados[indice] = {'indice': indice, 'id_usuario': id_usuario, 'resultado': 'erro', 'codigo': 400, 'error': erro}
+    return resultados, validos
+
+
 @bp.route('/partidas/<int:id_partida>/presenca', methods=['GET'])
 @token_required
 def get_presence_list(current_user, id_partida):
     try:
-        with engine.connect() as conn:
-            query_check_match = text("SELECT 1 FROM partida WHERE id_partida = :id_partida")
-            match_exists = conn.execute(query_check_match, {'id_partida': id_partida}).fetchone()
+        with get_read_connection() as conn:
+            match_exists = repo.existe(conn, id_partida)
 
             if not match_exists:
                 return jsonify({'error': 'Partida não encontrada.'}), 404
 
-            query_get_list = text(
-                """
-                SELECT 
-                    u.id_usuario,
-                    u.nome AS nome_jogador,
-                    pp.status,
-                    t.nome_time
-                FROM partida_presenca AS pp
-                JOIN usuario AS u ON pp.fk_usuario = u.id_usuario
-                JOIN time_partida AS tp ON pp.fk_partida = tp.fk_partida
-                JOIN time_membros AS tm ON u.id_usuario = tm.fk_usuario AND tp.fk_time = tm.fk_time
-                JOIN time AS t ON tm.fk_time = t.id_time
-                WHERE pp.fk_partida = :id_partida
-                ORDER BY t.nome_time, u.nome;
-            """
-            )
-
-            result = conn.execute(query_get_list, {'id_partida': id_partida})
-            presence_list = [dict(row._mapping) for row in result]
+            presence_list = repo.lista_presenca(conn, id_partida)
 
+        # Limitada aos elencos dos dois times: uma consulta basta também no NDJSON
+        if wants_stream():
+            return ndjson_rows(presence_list)
         return jsonify(presence_list)
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+@bp.route('/partidas/<int:id_partida>/eventos', methods=['GET'])
+@token_required
+def stream_eventos(current_user, id_partida):
+    """Placar e presenças da partida ao vivo (`text/event-stream`).
+
+    O primeiro evento é `estado` (o mesmo corpo de GET /partidas/<id>);
+    depois chegam `placar`, `presenca` (status gravados e contadores de cada
+    time) e `cancelada`, que encerra o stream (assim como `ressincronizar`,
+    enviado quando eventos podem ter se perdido: o cliente reconecta e
+    recebe o estado atual). Sem eventos, um comentário
+    `: ping` a cada `EVENTOS_HEARTBEAT_SECONDS` mantém a conexão e detecta
+    clientes que saíram. O `EventSource` nativo do navegador não envia o
+    header Authorization: use um cliente SSE sobre `fetch`.
+    """
+    try:
+        assinatura = eventos.hub.assinar(eventos.topico_partida(id_partida))
+    except eventos.HubLotado:
+        return jsonify({'error': 'Limite de acompanhamentos ao vivo atingido. Tente novamente em instantes.'}), 503, {'Retry-After': '5'}
+
+    # A assinatura vem antes da leitura do estado, para não perder o que for
+    # publicado entre as duas; a conexão é devolvida antes do stream começar.
+    try:
+        with get_read_connection() as conn:
+            estado = repo.detalhes(conn, id_partida)
+    except Exception as e:
+        eventos.hub.cancelar(assinatura)
+        return jsonify({'error': str(e)}), 500
+
+    if not estado:
+        eventos.hub.cancelar(assinatura)
+        return jsonify({'error': 'Partida não encontrada.'}), 404
+
+    dumps = current_app.json.dumps
+
+    def generate():
+        yield f'retry: {eventos.RETRY_MS}\n' + eventos.formatar_sse('estado', dumps(estado))
+        while not assinatura.encerrada:
+            evento = assinatura.proximo(timeout=EVENTOS_HEARTBEAT_SECONDS)
+            if evento is None:
+                yield ': ping\n\n'
+                continue
+            yield eventos.formatar_sse(evento['tipo'], dumps(evento))
+            if evento['tipo'] == 'cancelada':
+                return
+
+    response = Response(
+        generate(),
+        mimetype=eventos.EVENT_STREAM_MIMETYPE,
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+    # Também quando o cliente desconecta antes do primeiro evento
+    response.call_on_close(lambda: eventos.hub.cancelar(assinatura))
+    return response
+
+
 @bp.route('/partidas/<int:id_partida>/placar', methods=['PUT'])
 @token_required
 def register_score(current_user, id_partida):
@@ -369,9 +715,8 @@ def register_score(current_user, id_partida):
     id_usuario_logado = current_user._mapping['id_usuario']
 
     try:
-        with engine.begin() as conn:
-            query_get_partida = text("SELECT fk_responsavel_partida FROM partida WHERE id_partida = :id_partida")
-            partida_info = conn.execute(query_get_partida, {'id_partida': id_partida}).fetchone()
+        with get_transaction() as conn:
+            partida_info = repo.buscar(conn, id_partida)
 
             if not partida_info:
                 return jsonify({'error': 'Partida não encontrada.'}), 404
@@ -379,15 +724,24 @@ def register_score(current_user, id_partida):
             if partida_info._mapping['fk_responsavel_partida'] != id_usuario_logado:
                 return jsonify({'error': 'Acesso negado. Apenas quem agendou a partida pode registrar o placar.'}), 403
 
-            query_update_score = text(
-                """
-                UPDATE partida 
-                SET placar_time_casa = :placar_casa, placar_time_visitante = :placar_visitante
-                WHERE id_partida = :id_partida
-            """
-            )
-            conn.execute(query_update_score, {'placar_casa': placar_casa, 'placar_visitante': placar_visitante, 'id_partida': id_partida})
-
+            repo.atualizar_placar(conn, id_partida, placar_casa, placar_visitante)
+            outbox.registrar(conn, outbox.PLACAR_REGISTRADO, {
+                **_evento_partida(id_partida, partida_info),
+                "placar_time_casa": placar_casa,
+                "placar_time_visitante": placar_visitante,
+                "placar_anterior": repo.placar(partida_info),
+            })
+            if repo.placar(partida_info) is None:
+                # Primeiro placar: os confirmados passam a contar o jogo
+                estatisticas.ajustar_partida(conn, id_partida, 0, 1)
+            tabelas = ['partida']
+            if _aplicar_classificacao(conn, partida_info, (placar_casa, placar_visitante)):
+                tabelas.append('classificacao')
+            bump_versions(conn, *tabelas)
+
+        eventos.publicar_partida(
+            id_partida, 'placar', placar_time_casa=placar_casa, placar_time_visitante=placar_visitante
+        )
         return jsonify({'message': 'Placar registrado com sucesso!'}), 200
 
     except Exception as e:
@@ -400,9 +754,8 @@ def cancel_partida(current_user, id_partida):
     id_usuario_logado = current_user._mapping['id_usuario']
 
     try:
-        with engine.begin() as conn:
-            query_get_partida = text("SELECT fk_responsavel_partida, fk_agendamento FROM partida WHERE id_partida = :id_partida")
-            partida_info = conn.execute(query_get_partida, {'id_partida': id_partida}).fetchone()
+        with get_transaction() as conn:
+            partida_info = repo.buscar(conn, id_partida)
 
             if not partida_info:
                 return jsonify({'error': 'Partida não encontrada.'}), 404
@@ -410,14 +763,41 @@ def cancel_partida(current_user, id_partida):
             if partida_info._mapping['fk_responsavel_partida'] != id_usuario_logado:
                 return jsonify({'error': 'Acesso negado. Apenas quem agendou a partida pode cancelá-la.'}), 403
 
-            conn.execute(text('DELETE FROM time_partida WHERE fk_partida = :id_partida'), {'id_partida': id_partida})
-            conn.execute(text('DELETE FROM partida_presenca WHERE fk_partida = :id_partida'), {'id_partida': id_partida})
-            conn.execute(text('DELETE FROM partida WHERE id_partida = :id_partida'), {'id_partida': id_partida})
-
-            id_agendamento = partida_info._mapping['fk_agendamento']
-            conn.execute(text('DELETE FROM agendamento WHERE id_agendamento = :id_agendamento'), {'id_agendamento': id_agendamento})
+            tabelas = ['partida']
+            if _aplicar_classificacao(conn, partida_info, None):
+                tabelas.append('classificacao')
+            estatisticas.ajustar_partida(conn, id_partida, -1, -1 if repo.placar(partida_info) else 0)
+            outbox.registrar(conn, outbox.PARTIDA_CANCELADA, _evento_partida(id_partida, partida_info))
+            repo.excluir(conn, id_partida, partida_info._mapping['fk_agendamento'])
+            bump_versions(conn, *tabelas)
 
+        eventos.publicar_partida(id_partida, 'cancelada')
         return jsonify({'message': 'Partida cancelada com sucesso e horário liberado.'}), 200
 
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
+
+
+def _evento_partida(id_partida, partida_info) -> dict:
+    """Campos comuns dos eventos de placar e cancelamento, a partir da linha de `repo.buscar`."""
+    dados = partida_info._mapping
+    return {
+        "id_partida": id_partida,
+        "id_responsavel": dados["fk_responsavel_partida"],
+        "id_time_casa": dados["id_time_casa"],
+        "id_time_visitante": dados["id_time_visitante"],
+    }
+
+
+def _aplicar_classificacao(conn, partida_info, novo_placar) -> bool:
+    """Troca o placar atual da partida (linha de `repo.buscar`) por `novo_placar` na classificação.
+
+    `novo_placar` None desfaz o resultado (cancelamento). Sem efeito se a
+    partida não tiver os dois times; retorna True se a classificação mudou.
+    """
+    dados = partida_info._mapping
+    if dados['id_time_casa'] is None or dados['id_time_visitante'] is None:
+        return False
+    return classificacao.aplicar(
+        conn, dados['id_time_casa'], dados['id_time_visitante'], repo.placar(partida_info), novo_placar
+    )
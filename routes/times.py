@@ -1,13 +1,27 @@
 from flask import Blueprint, request, jsonify
-from sqlalchemy import text
 from sqlalchemy.exc import IntegrityError
-from db import engine
+from db import get_connection, get_transaction
+from repository import cached_text, estatisticas, partidas, times as repo
+from replicas import get_read_connection
 from auth import token_required
-from datetime import datetime, timedelta, timezone
+from pagination import Page, PaginationError
+from table_versions import bump_versions, versioned_etag
+from streaming import wants_stream, ndjson_response
+from datetime import datetime, timezone
 
 bp = Blueprint('times', __name__)
 
 
+def _checar_capitao(conn, id_time, id_usuario, acao):
+    """Resposta de erro (404/403) se o time não existe ou `id_usuario` não é o capitão; None se pode prosseguir."""
+    id_responsavel = repo.responsavel(conn, id_time)
+    if id_responsavel is None:
+        return jsonify({"error": "Time não encontrado."}), 404
+    if id_responsavel != id_usuario:
+        return jsonify({"error": f"Acesso negado. Apenas o capitão pode {acao}."}), 403
+    return None
+
+
 @bp.route("/times", methods=["POST"])
 @token_required
 def create_time(current_user):
@@ -21,31 +35,12 @@ def create_time(current_user):
     id_responsavel = current_user._mapping["id_usuario"]
 
     try:
-        with engine.begin() as conn:  # Use .begin() para transação
-            query = text(
-                """
-                INSERT INTO time (nome_time, fk_responsavel_time, cor_uniforme)
-                VALUES (:nome_time, :fk_responsavel_time, :cor_uniforme)
-            """
-            )
-
-            params = {
-                "nome_time": nome_time,
-                "fk_responsavel_time": id_responsavel,
-                "cor_uniforme": cor_uniforme,
-            }
-
-            result = conn.execute(query, params)
-            novo_time_id = result.lastrowid
+        with get_transaction() as conn:  # transação: commit ao final do bloco
+            novo_time_id = repo.inserir(conn, nome_time, id_responsavel, cor_uniforme)
 
             # Adiciona o capitão como primeiro membro do time
-            query_add_captain = text(
-                """
-                INSERT INTO time_membros (fk_usuario, fk_time)
-                VALUES (:fk_usuario, :fk_time)
-                """
-            )
-            conn.execute(query_add_captain, {"fk_usuario": id_responsavel, "fk_time": novo_time_id})
+            repo.adicionar_membro(conn, novo_time_id, id_responsavel)
+            bump_versions(conn, "time")
 
         return (
             jsonify(
@@ -63,27 +58,28 @@ def create_time(current_user):
 
 @bp.route("/times", methods=["GET"])
 @token_required
+@versioned_etag("time", "usuario")
 def get_times(current_user):
+    stream = wants_stream()
+    try:
+        make_page = Page.for_stream if stream else Page.from_request
+        page = make_page(request.args, key_types=(int,))
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if stream:
+        return ndjson_response(page, repo.TIMES_SELECT, [], {}, ("t.id_time",), key=lambda row: (row._mapping["id_time"],))
+
+    query, params = page.keyset_sql(repo.TIMES_SELECT, [], {}, ("t.id_time",))
+
     try:
-        with engine.connect() as conn:
-            query = text(
-                """
-                SELECT 
-                    t.id_time, 
-                    t.nome_time, 
-                    t.cor_uniforme, 
-                    u.nome AS nome_responsavel
-                FROM 
-                    time AS t
-                JOIN 
-                    usuario AS u ON t.fk_responsavel_time = u.id_usuario
-            """
-            )
-
-            result = conn.execute(query)
-            times = [dict(row._mapping) for row in result]
-
-        return jsonify(times)
+        with get_read_connection() as conn:
+            result = conn.execute(cached_text(query), params)
+            times = page.split(result, key=lambda row: (row._mapping["id_time"],))
+
+        response = jsonify(times)
+        page.apply_headers(response, request.base_url, request.args)
+        return response
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -105,38 +101,13 @@ def add_member(current_user, id_time):
     numero_camisa = data.get("numero_camisa")
 
     try:
-        with engine.connect() as conn:
-            query_check_owner = text(
-                "SELECT fk_responsavel_time FROM time WHERE id_time = :id_time"
-            )
-            time_info = conn.execute(query_check_owner, {"id_time": id_time}).fetchone()
-
-            if not time_info:
-                return jsonify({"error": "Time não encontrado."}), 404
-
-            if time_info._mapping["fk_responsavel_time"] != id_capitao:
-                return (
-                    jsonify(
-                        {
-                            "error": "Acesso negado. Apenas o capitão pode adicionar membros."
-                        }
-                    ),
-                    403,
-                )
+        with get_connection() as conn:
+            erro = _checar_capitao(conn, id_time, id_capitao, "adicionar membros")
+            if erro:
+                return erro
 
             if numero_camisa is not None:
-                query_check_number = text(
-                    """
-                    SELECT 1 FROM time_membros 
-                    WHERE fk_time = :fk_time AND numero_camisa = :numero_camisa
-                """
-                )
-                camisa_ja_existe = conn.execute(
-                    query_check_number,
-                    {"fk_time": id_time, "numero_camisa": numero_camisa},
-                ).fetchone()
-
-                if camisa_ja_existe:
+                if repo.camisa_em_uso(conn, id_time, numero_camisa):
                     return (
                         jsonify(
                             {
@@ -146,28 +117,14 @@ def add_member(current_user, id_time):
                         409,
                     )
 
-            query_check_member = text(
-                "SELECT 1 FROM time_membros WHERE fk_usuario = :fk_usuario AND fk_time = :fk_time"
-            )
-            ja_eh_membro = conn.execute(
-                query_check_member, {"fk_usuario": id_novo_membro, "fk_time": id_time}
-            ).fetchone()
-
-            if ja_eh_membro:
+            if repo.eh_membro(conn, id_time, id_novo_membro):
                 return jsonify({"error": "Este usuário já é membro do time."}), 409
 
-            query_insert = text(
-                """
-                INSERT INTO time_membros (fk_usuario, fk_time, numero_camisa)
-                VALUES (:fk_usuario, :fk_time, :numero_camisa)
-            """
-            )
-            params = {
-                "fk_usuario": id_novo_membro,
-                "fk_time": id_time,
-                "numero_camisa": numero_camisa,
-            }
-            conn.execute(query_insert, params)
+            repo.adicionar_membro(conn, id_time, id_novo_membro, numero_camisa)
+            # Presenças já registradas pelo usuário passam a contar para o time
+            if partidas.ajustar_resumo_membro(conn, id_time, id_novo_membro, 1):
+                bump_versions(conn, "partida_presenca_resumo")
+            estatisticas.carregar_membro(conn, id_time, id_novo_membro)
             conn.commit()
 
         return jsonify({"message": "Usuário adicionado ao time com sucesso!"}), 201
@@ -190,32 +147,11 @@ def add_member(current_user, id_time):
 @token_required
 def get_members(current_user, id_time):
     try:
-        with engine.connect() as conn:
-            query_check_time = text("SELECT 1 FROM time WHERE id_time = :id_time")
-            time_existe = conn.execute(query_check_time, {"id_time": id_time}).fetchone()
-
-            if not time_existe:
+        with get_read_connection() as conn:
+            if not repo.existe(conn, id_time):
                 return jsonify({"error": "Time não encontrado."}), 404
 
-            query = text(
-                """
-                SELECT 
-                    u.id_usuario,
-                    u.nome,
-                    u.email,
-                    tm.numero_camisa
-                FROM 
-                    time_membros AS tm
-                JOIN 
-                    usuario AS u ON tm.fk_usuario = u.id_usuario
-                WHERE 
-                    tm.fk_time = :id_time
-            """
-            )
-
-            result = conn.execute(query, {"id_time": id_time})
-
-            membros = [dict(row._mapping) for row in result]
+            membros = repo.membros(conn, id_time)
 
         return jsonify(membros)
 
@@ -223,6 +159,40 @@ def get_members(current_user, id_time):
         return jsonify({"error": str(e)}), 500
 
 
+@bp.route("/times/<int:id_time>/estatisticas", methods=["GET"])
+@token_required
+def get_time_stats(current_user, id_time):
+    """Campanha do time (de `classificacao`) e presença de cada membro.
+
+    Para cada membro: presenças respondidas por status, `jogos` (partidas
+    com placar em que estava confirmado) e `participacao_jogos_time`, a
+    fração de todos os `jogos_time` do time, desde a fundação e não desde a
+    entrada do membro. Tudo vem das tabelas de resumo, sem agregação na leitura.
+    """
+    try:
+        with get_read_connection() as conn:
+            resumo, membros = estatisticas.do_time(conn, id_time)
+
+        if resumo is None:
+            return jsonify({"error": "Time não encontrado."}), 404
+
+        jogos_time = resumo._mapping["jogos"]
+        return jsonify({
+            **resumo._mapping,
+            "membros": [
+                {
+                    **m._mapping,
+                    "jogos_time": jogos_time,
+                    "participacao_jogos_time": estatisticas.participacao(m._mapping["jogos"], jogos_time),
+                }
+                for m in membros
+            ],
+        })
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
 @bp.route('/times/<int:id_time>/membros/<int:id_usuario_membro>', methods=['DELETE'])
 @token_required
 def remove_member(current_user, id_time, id_usuario_membro):
@@ -232,22 +202,18 @@ def remove_member(current_user, id_time, id_usuario_membro):
         return jsonify({"error": "O capitão não pode se remover do próprio time."}), 400
 
     try:
-        with engine.begin() as conn:
-            query_check_owner = text("SELECT fk_responsavel_time FROM time WHERE id_time = :id_time")
-            time_info = conn.execute(query_check_owner, {"id_time": id_time}).fetchone()
-
-            if not time_info:
-                return jsonify({"error": "Time não encontrado."}), 404
+        with get_transaction() as conn:
+            erro = _checar_capitao(conn, id_time, id_capitao, "remover membros")
+            if erro:
+                return erro
 
-            if time_info._mapping['fk_responsavel_time'] != id_capitao:
-                return jsonify({"error": "Acesso negado. Apenas o capitão pode remover membros."}), 403
-
-            query_delete = text("DELETE FROM time_membros WHERE fk_time = :id_time AND fk_usuario = :id_usuario_membro")
-            result = conn.execute(query_delete, {"id_time": id_time, "id_usuario_membro": id_usuario_membro})
-
-            if result.rowcount == 0:
+            if not repo.remover_membro(conn, id_time, id_usuario_membro):
                 return jsonify({"error": "Membro não encontrado neste time."}), 404
 
+            if partidas.ajustar_resumo_membro(conn, id_time, id_usuario_membro, -1):
+                bump_versions(conn, "partida_presenca_resumo")
+            estatisticas.remover_membro(conn, id_time, id_usuario_membro)
+
         return jsonify({"message": "Membro removido do time com sucesso."}), 200
 
     except Exception as e:
@@ -260,33 +226,16 @@ def delete_time(current_user, id_time):
     id_capitao = current_user._mapping['id_usuario']
 
     try:
-        with engine.begin() as conn:
-            query_check_owner = text("SELECT fk_responsavel_time FROM time WHERE id_time = :id_time")
-            time_info = conn.execute(query_check_owner, {"id_time": id_time}).fetchone()
-
-            if not time_info:
-                return jsonify({"error": "Time não encontrado."}), 404
-
-            if time_info._mapping['fk_responsavel_time'] != id_capitao:
-                return jsonify({"error": "Acesso negado. Apenas o capitão pode excluir o time."}), 403
-
-            query_check_future_games = text(
-                """
-                SELECT 1 FROM time_partida AS tp
-                JOIN partida AS p ON tp.fk_partida = p.id_partida
-                JOIN agendamento AS a ON p.fk_agendamento = a.id_agendamento
-                WHERE tp.fk_time = :id_time AND a.dthr_ini > :agora
-                LIMIT 1
-            """
-            )
-
-            future_game = conn.execute(query_check_future_games, {"id_time": id_time, "agora": datetime.now(timezone.utc)}).fetchone()
+        with get_transaction() as conn:
+            erro = _checar_capitao(conn, id_time, id_capitao, "excluir o time")
+            if erro:
+                return erro
 
-            if future_game:
+            if repo.tem_partida_futura(conn, id_time, datetime.now(timezone.utc)):
                 return jsonify({"error": "Não é possível excluir o time. Cancele todas as partidas futuras agendadas primeiro."}), 409
 
-            conn.execute(text("DELETE FROM time_membros WHERE fk_time = :id_time"), {"id_time": id_time})
-            conn.execute(text("DELETE FROM time WHERE id_time = :id_time"), {"id_time": id_time})
+            repo.excluir(conn, id_time)
+            bump_versions(conn, "time")
 
         return jsonify({"message": "Time e todos os seus membros foram removidos com sucesso."}), 200
 
@@ -304,39 +253,22 @@ def update_time(current_user, id_time):
     id_capitao_atual = current_user._mapping['id_usuario']
 
     try:
-        with engine.begin() as conn:
-            query_check_owner = text("SELECT fk_responsavel_time FROM time WHERE id_time = :id_time")
-            time_info = conn.execute(query_check_owner, {"id_time": id_time}).fetchone()
-
-            if not time_info:
-                return jsonify({"error": "Time não encontrado."}), 404
-
-            if time_info._mapping['fk_responsavel_time'] != id_capitao_atual:
-                return jsonify({"error": "Acesso negado. Apenas o capitão pode editar o time."}), 403
+        with get_transaction() as conn:
+            erro = _checar_capitao(conn, id_time, id_capitao_atual, "editar o time")
+            if erro:
+                return erro
 
             novo_capitao_id = data.get('fk_responsavel_time')
             if novo_capitao_id:
-                query_check_member = text("SELECT 1 FROM time_membros WHERE fk_time = :id_time AND fk_usuario = :id_usuario")
-                novo_capitao_eh_membro = conn.execute(query_check_member, {"id_time": id_time, "id_usuario": novo_capitao_id}).fetchone()
-
-                if not novo_capitao_eh_membro:
+                if not repo.eh_membro(conn, id_time, novo_capitao_id):
                     return jsonify({"error": "O novo capitão deve ser um membro do time."}), 400
 
-            allowed_fields = ['nome_time', 'cor_uniforme', 'fk_responsavel_time']
-            update_fields = []
-            params = {}
-
-            for field in allowed_fields:
-                if field in data:
-                    update_fields.append(f"{field} = :{field}")
-                    params[field] = data[field]
-
-            if not update_fields:
+            campos = {field: data[field] for field in repo.CAMPOS_EDITAVEIS if field in data}
+            if not campos:
                 return jsonify({"error": "Nenhum campo válido para atualização foi enviado."}), 400
 
-            params['id_time'] = id_time
-            query_str = f"UPDATE time SET {', '.join(update_fields)} WHERE id_time = :id_time"
-            conn.execute(text(query_str), params)
+            repo.atualizar(conn, id_time, campos)
+            bump_versions(conn, "time")
 
             return jsonify({"message": "Time atualizado com sucesso."}), 200
 
@@ -356,44 +288,22 @@ def update_member_shirt_number(current_user, id_time, id_usuario_membro):
     id_capitao_requisitante = current_user._mapping['id_usuario']
 
     try:
-        with engine.begin() as conn:
+        with get_transaction() as conn:
             # 1. Verificar se o requisitante é o capitão do time
-            query_check_owner = text("SELECT fk_responsavel_time FROM time WHERE id_time = :id_time")
-            time_info = conn.execute(query_check_owner, {"id_time": id_time}).fetchone()
-
-            if not time_info:
-                return jsonify({"error": "Time não encontrado."}), 404
-
-            if time_info._mapping['fk_responsavel_time'] != id_capitao_requisitante:
-                return jsonify({"error": "Acesso negado. Apenas o capitão pode alterar o número da camisa."}), 403
+            erro = _checar_capitao(conn, id_time, id_capitao_requisitante, "alterar o número da camisa")
+            if erro:
+                return erro
 
             # 2. Verificar se o usuário a ser atualizado é membro do time
-            query_check_member = text("SELECT 1 FROM time_membros WHERE fk_time = :id_time AND fk_usuario = :id_usuario_membro")
-            is_member = conn.execute(query_check_member, {"id_time": id_time, "id_usuario_membro": id_usuario_membro}).fetchone()
-
-            if not is_member:
+            if not repo.eh_membro(conn, id_time, id_usuario_membro):
                 return jsonify({"error": "Usuário não é membro deste time."}), 404
 
             # 3. Verificar se o número da camisa já está em uso por OUTRO membro
-            query_check_number = text(
-                """
-                SELECT 1 FROM time_membros 
-                WHERE fk_time = :id_time AND numero_camisa = :numero_camisa AND fk_usuario != :id_usuario_membro
-                """
-            )
-            camisa_ja_existe = conn.execute(
-                query_check_number,
-                {"id_time": id_time, "numero_camisa": numero_camisa, "id_usuario_membro": id_usuario_membro},
-            ).fetchone()
-
-            if camisa_ja_existe:
+            if repo.camisa_em_uso(conn, id_time, numero_camisa, exceto_usuario=id_usuario_membro):
                 return jsonify({"error": f"A camisa número {numero_camisa} já está em uso neste time."}), 409
 
             # 4. Atualizar o número da camisa
-            query_update = text(
-                "UPDATE time_membros SET numero_camisa = :numero_camisa WHERE fk_time = :id_time AND fk_usuario = :id_usuario_membro"
-            )
-            conn.execute(query_update, {"numero_camisa": numero_camisa, "id_time": id_time, "id_usuario_membro": id_usuario_membro})
+            repo.atualizar_camisa(conn, id_time, id_usuario_membro, numero_camisa)
 
         return jsonify({"message": "Número da camisa atualizado com sucesso."}), 200
 
@@ -1,8 +1,10 @@
 from flask import Blueprint, request, jsonify
-from werkzeug.security import generate_password_hash
-from db import get_connection, engine
-from sqlalchemy import text
-from auth import token_required
+from passwords import hash_password, HashPoolSaturated
+from db import get_connection, get_transaction
+from replicas import get_read_connection
+from repository import estatisticas, usuarios as repo
+from auth import token_required, invalidate_user, load_user, revoke_user_tokens
+from table_versions import bump_versions
 
 bp = Blueprint('users', __name__)
 
@@ -20,25 +22,14 @@ def create_usuario():
     dt_nascimento = data.get('dt_nascimento')
     no_telefone = data.get('no_telefone')
 
-    hashed_password = generate_password_hash(senha)
+    try:
+        hashed_password = hash_password(senha)
+    except HashPoolSaturated:
+        return jsonify({'error': 'Servidor ocupado. Tente novamente em instantes.'}), 503, {'Retry-After': '1'}
 
     try:
         with get_connection() as conn:
-            query = text(
-                """
-                INSERT INTO usuario (nome, email, hash_senha, genero, dt_nascimento, no_telefone)
-                VALUES (:nome, :email, :hash_senha, :genero, :dt_nascimento, :no_telefone)
-            """
-            )
-            params = {
-                'nome': nome,
-                'email': email,
-                'hash_senha': hashed_password,
-                'genero': genero,
-                'dt_nascimento': dt_nascimento,
-                'no_telefone': no_telefone,
-            }
-            conn.execute(query, params)
+            repo.inserir(conn, nome, email, hashed_password, genero, dt_nascimento, no_telefone)
             conn.commit()
 
         return jsonify({'message': f"Usuário '{nome}' criado com sucesso!"}), 201
@@ -49,12 +40,17 @@ def create_usuario():
 @bp.route('/profile')
 @token_required
 def get_profile(current_user):
+    # No modo sem estado `current_user` só traz os claims do token
+    current_user = load_user(current_user._mapping['id_usuario'])
+    if not current_user:
+        return jsonify({'message': 'Usuário do token não encontrado.'}), 401
+
     user_data = {
         'id_usuario': current_user._mapping['id_usuario'],
         'nome': current_user._mapping['nome'],
         'email': current_user._mapping['email'],
         'genero': current_user._mapping['genero'],
-        'dt_nascimento': str(current_user._mapping['dt_nascimento']) if current_user._mapping['dt_nascimento'] else None,
+        'dt_nascimento': current_user._mapping['dt_nascimento'],
         'no_telefone': current_user._mapping['no_telefone']
     }
     return jsonify(user_data)
@@ -65,18 +61,42 @@ def get_profile(current_user):
 def get_usuario_by_id(current_user, id_usuario):
     """Obtém os dados de um usuário específico pelo seu ID."""
     try:
-        with get_connection() as conn:
-            query = text("SELECT id_usuario, nome, email, genero, dt_nascimento, no_telefone FROM usuario WHERE id_usuario = :id_usuario")
-            result = conn.execute(query, {'id_usuario': id_usuario}).fetchone()
+        with get_read_connection() as conn:
+            result = repo.buscar_publico(conn, id_usuario)
 
         if not result:
             return jsonify({'error': 'Usuário não encontrado.'}), 404
 
-        user_data = dict(result._mapping)
-        if user_data.get('dt_nascimento'):
-            user_data['dt_nascimento'] = str(user_data['dt_nascimento'])
+        return jsonify(result), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 
-        return jsonify(user_data), 200
+@bp.route('/usuarios/<int:id_usuario>/estatisticas', methods=['GET'])
+@token_required
+def get_usuario_stats(current_user, id_usuario):
+    """Presenças e jogos do usuário em cada time de que é membro, com os totais.
+
+    `participacao_jogos_time` é `jogos / jogos_time`: a fração de todos os
+    jogos do time, inclusive os anteriores à entrada do usuário.
+    """
+    try:
+        with get_read_connection() as conn:
+            times = estatisticas.do_usuario(conn, id_usuario)
+            if not times and not repo.buscar_publico(conn, id_usuario):
+                return jsonify({'error': 'Usuário não encontrado.'}), 404
+
+        por_time = [
+            {
+                **t._mapping,
+                'participacao_jogos_time': estatisticas.participacao(t._mapping['jogos'], t._mapping['jogos_time']),
+            }
+            for t in times
+        ]
+        totais = {coluna: sum(t[coluna] for t in por_time) for coluna in (*estatisticas.COLUNAS, 'jogos_time')}
+        totais['participacao_jogos_time'] = estatisticas.participacao(totais['jogos'], totais['jogos_time'])
+        return jsonify({'id_usuario': id_usuario, 'totais': totais, 'times': por_time}), 200
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -96,42 +116,30 @@ def update_profile(current_user):
     novo_email = data.get('email')
     if novo_email and novo_email != email_atual:
         try:
-            with engine.connect() as conn:
-                query_check_email = text("SELECT id_usuario FROM usuario WHERE email = :email AND id_usuario != :id_logado")
-                email_existente = conn.execute(query_check_email, {"email": novo_email, "id_logado": id_usuario_logado}).fetchone()
-
-                if email_existente:
+            with get_connection() as conn:
+                if repo.email_em_uso(conn, novo_email, id_usuario_logado):
                     return jsonify({"error": "Este e-mail já está em uso por outra conta."}), 409
         except Exception as e:
             return jsonify({"error": str(e)}), 500
 
-    allowed_fields = ['nome', 'email', 'genero', 'dt_nascimento', 'no_telefone']
-    update_fields = []
-    params = {}
-
-    for field in allowed_fields:
-        if field in data:
-            update_fields.append(f"{field} = :{field}")
-            params[field] = data[field]
-
-    if not update_fields:
+    campos = {field: data[field] for field in repo.CAMPOS_EDITAVEIS if field in data}
+    if not campos:
         return jsonify({"error": "Nenhum campo válido para atualização foi enviado."}), 400
 
-    params['id_usuario'] = id_usuario_logado
-
     try:
-        with engine.begin() as conn:
-            query_str = f"UPDATE usuario SET {', '.join(update_fields)} WHERE id_usuario = :id_usuario"
-            conn.execute(text(query_str), params)
+        with get_transaction() as conn:
+            repo.atualizar(conn, id_usuario_logado, campos)
+            # O nome aparece em GET /times e GET /partidas
+            bump_versions(conn, 'usuario')
 
-            query_get_updated = text("SELECT id_usuario, nome, email, genero, dt_nascimento, no_telefone FROM usuario WHERE id_usuario = :id_usuario")
-            updated_user = conn.execute(query_get_updated, {"id_usuario": id_usuario_logado}).fetchone()
+            # Tokens sem estado carregam o e-mail: os antigos deixam de valer
+            if novo_email and novo_email != email_atual:
+                revoke_user_tokens(conn, id_usuario_logado)
 
-            user_data = dict(updated_user._mapping)
-            if user_data.get('dt_nascimento'):
-                user_data['dt_nascimento'] = str(user_data['dt_nascimento'])
+            updated_user = repo.buscar_publico(conn, id_usuario_logado)
 
-        return jsonify(user_data), 200
+        invalidate_user(id_usuario_logado)
+        return jsonify(updated_user), 200
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
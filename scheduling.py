@@ -0,0 +1,134 @@
+"""Regras de agenda compartilhadas: horário de funcionamento e intervalos livres/ocupados.
+
+Usadas por `create_partida` (validação de um agendamento) e pela consulta de
+disponibilidade dos locais, para que ambos apliquem exatamente as mesmas regras.
+"""
+from bisect import bisect_right
+from datetime import datetime, time, timedelta
+from typing import NamedTuple, Optional
+
+
+class HorarioDia(NamedTuple):
+    fechado: bool
+    motivo: str
+    abertura: Optional[timedelta]
+    fechamento: Optional[timedelta]
+
+
+def to_timedelta(value) -> Optional[timedelta]:
+    """Colunas TIME chegam como `timedelta` (mysql-connector) ou `time` (outros drivers)."""
+    if value is None or isinstance(value, timedelta):
+        return value
+    if isinstance(value, time):
+        return timedelta(hours=value.hour, minutes=value.minute, seconds=value.second)
+    raise TypeError(f'Horário inválido: {value!r}')
+
+
+def formatar_horario(value: Optional[timedelta]) -> Optional[str]:
+    if value is None:
+        return None
+    total = int(value.total_seconds())
+    return f'{total // 3600:02d}:{total % 3600 // 60:02d}'
+
+
+def horario_do_dia(horario_abertura, horario_fechamento, excecao=None) -> HorarioDia:
+    """Combina o horário padrão do local com a exceção do dia (`local_excecoes`), se houver.
+
+    Uma exceção sem `horario_abertura_excecao` fecha o local o dia todo.
+    """
+    if excecao:
+        if excecao["horario_abertura_excecao"] is None:
+            return HorarioDia(True, excecao["motivo"] or "fechado por motivo não especificado", None, None)
+        horario_abertura = excecao["horario_abertura_excecao"]
+        horario_fechamento = excecao["horario_fechamento_excecao"]
+
+    return HorarioDia(False, "", to_timedelta(horario_abertura), to_timedelta(horario_fechamento))
+
+
+def dentro_do_horario(dia: HorarioDia, dthr_ini: datetime, dthr_fim: datetime) -> bool:
+    """Mesma checagem de `create_partida`: início e fim (hora:minuto) dentro do funcionamento."""
+    if not (dia.abertura and dia.fechamento):
+        return True
+
+    timedelta_inicio = timedelta(hours=dthr_ini.hour, minutes=dthr_ini.minute)
+    timedelta_fim = timedelta(hours=dthr_fim.hour, minutes=dthr_fim.minute)
+    return dia.abertura <= timedelta_inicio and timedelta_fim <= dia.fechamento
+
+
+def janela_do_dia(dia: HorarioDia, data) -> Optional[tuple]:
+    """Intervalo [início, fim) em que o local aceita partidas na data, ou None se fechado."""
+    if dia.fechado:
+        return None
+    inicio_dia = datetime.combine(data, time.min)
+    if dia.abertura and dia.fechamento:
+        return inicio_dia + dia.abertura, inicio_dia + dia.fechamento
+    return inicio_dia, inicio_dia + timedelta(days=1)
+
+
+def mesclar_intervalos(intervalos) -> list:
+    """Ordena e funde intervalos sobrepostos ou encostados em uma lista disjunta."""
+    mesclados = []
+    for ini, fim in sorted(intervalos):
+        if mesclados and ini <= mesclados[-1][1]:
+            if fim > mesclados[-1][1]:
+                mesclados[-1] = (mesclados[-1][0], fim)
+        else:
+            mesclados.append((ini, fim))
+    return mesclados
+
+
+def intervalos_livres(inicio: datetime, fim: datetime, ocupados: list, duracao: timedelta) -> list:
+    """Varre `ocupados` (saída de `mesclar_intervalos`) e devolve as janelas livres em [inicio, fim).
+
+    Só são retornadas janelas com pelo menos `duracao`. A busca começa por
+    bisseção, então o custo é proporcional aos intervalos dentro da janela.
+    """
+    livres = []
+    cursor = inicio
+    i = bisect_right(ocupados, inicio, key=lambda intervalo: intervalo[1])
+    while i < len(ocupados) and ocupados[i][0] < fim:
+        ini_ocupado, fim_ocupado = ocupados[i]
+        if ini_ocupado - cursor >= duracao:
+            livres.append((cursor, ini_ocupado))
+        cursor = max(cursor, fim_ocupado)
+        i += 1
+
+    if fim - cursor >= duracao:
+        livres.append((cursor, fim))
+    return livres
+
+
+def varrer_conflitos(ocupados: list, candidatos: list) -> dict:
+    """Sweep-line de um local: candidatos contra agendamentos existentes e entre si.
+
+    `ocupados` é a saída de `mesclar_intervalos` para o local; `candidatos`
+    são tuplas `(ini, fim, chave)`. Os candidatos são varridos em ordem de
+    início junto com um ponteiro sobre `ocupados`; em caso de sobreposição
+    entre candidatos vence o que começa antes. Retorna `{chave: motivo}`
+    apenas para os conflitantes (`'existente'` ou `'lote'`).
+    """
+    conflitos = {}
+    j = 0
+    fim_ultimo_aceito = None
+    for ini, fim, chave in sorted(candidatos, key=lambda c: (c[0], c[1])):
+        while j < len(ocupados) and ocupados[j][1] <= ini:
+            j += 1
+
+        if j < len(ocupados) and ocupados[j][0] < fim:
+            conflitos[chave] = 'existente'
+        elif fim_ultimo_aceito is not None and ini < fim_ultimo_aceito:
+            conflitos[chave] = 'lote'
+        else:
+            fim_ultimo_aceito = fim
+    return conflitos
+
+
+def gerar_slots(inicio: datetime, fim: datetime, ocupados: list, duracao: timedelta) -> list:
+    """Divide as janelas livres de [inicio, fim) em horários consecutivos de `duracao`."""
+    slots = []
+    for livre_ini, livre_fim in intervalos_livres(inicio, fim, ocupados, duracao):
+        ini = livre_ini
+        while ini + duracao <= livre_fim:
+            slots.append((ini, ini + duracao))
+            ini += duracao
+    return slots
@@ -0,0 +1,267 @@
+"""Gerador de dados sintéticos em volume de produção (`flask seed`).
+
+Com `--escala 1` gera ~1M `usuario`, 50k `time` (20 jogadores cada, o
+primeiro é o capitão), 500 `local` e 2M `partida`/`agendamento`, com
+`time_partida`, `time_membros`, `partida_presenca` e `local_excecoes`
+coerentes entre si: agendamentos de um local nunca se sobrepõem, respeitam
+o horário do local e as exceções do dia, e só jogadores dos dois times
+aparecem na lista de presença.
+
+A geração é determinística para a mesma `--semente` e `--escala` (cada
+tabela usa seu próprio `random.Random`). A carga usa `executemany` do
+driver, que o mysql-connector transforma em INSERTs multi-linha, com
+checagens de FK/unicidade desligadas na sessão (descartada em caso de erro)
+e commit por bloco. Partidas antes de `--corte` já têm placar; o padrão é
+derivado de `--inicio`, não da data atual. Todas as senhas recebem o mesmo
+hash, calculado uma única vez. Ao final, os contadores de presença
+(`partida_presenca_resumo`), a `classificacao` e as estatísticas dos
+jogadores (`estatistica_jogador`) são recalculados como em `flask resumos ...`.
+"""
+import random
+import time as _time
+from datetime import date, datetime, timedelta
+
+import click
+from sqlalchemy import text
+
+BASE = {'usuario': 1_000_000, 'time': 50_000, 'local': 500, 'partida': 2_000_000}
+JOGADORES_POR_TIME = 20
+SENHA_PADRAO = 'Senha1234!'
+# Sem --corte, partidas dos primeiros 180 dias da agenda já têm placar
+CORTE_PADRAO_DIAS = 180
+
+NOMES = ['Ana', 'Bruno', 'Carla', 'Diego', 'Eduarda', 'Felipe', 'Gabriela', 'Hugo', 'Isabela', 'João',
+         'Karina', 'Lucas', 'Mariana', 'Nicolas', 'Olívia', 'Pedro', 'Rafaela', 'Samuel', 'Tatiane', 'Vitor']
+SOBRENOMES = ['Silva', 'Santos', 'Oliveira', 'Souza', 'Lima', 'Pereira', 'Costa', 'Ferreira', 'Almeida', 'Ribeiro']
+CORES = ['Azul', 'Vermelho', 'Verde', 'Amarelo', 'Preto', 'Branco', 'Laranja', 'Roxo']
+STATUS_PRESENCA = ['Confirmado', 'Duvida', 'Recusado']
+
+COLUNAS = {
+    'usuario': ('id_usuario', 'nome', 'email', 'hash_senha', 'genero', 'dt_nascimento', 'no_telefone'),
+    'time': ('id_time', 'nome_time', 'fk_responsavel_time', 'cor_uniforme'),
+    'time_membros': ('fk_usuario', 'fk_time', 'numero_camisa'),
+    'local': ('id_local', 'nome', 'capacidade', 'disponivel_para_agendamento', 'horario_abertura', 'horario_fechamento'),
+    'local_excecoes': ('fk_local', 'data_excecao', 'motivo', 'horario_abertura_excecao', 'horario_fechamento_excecao'),
+    'agendamento': ('id_agendamento', 'dthr_ini', 'dthr_fim', 'fk_local'),
+    'partida': ('id_partida', 'fk_responsavel_partida', 'fk_agendamento', 'placar_time_casa', 'placar_time_visitante'),
+    'time_partida': ('fk_time', 'fk_partida', 'casa_visitante'),
+    'partida_presenca': ('fk_partida', 'fk_usuario', 'status'),
+}
+
+
+def tamanhos(escala: float) -> dict:
+    """Quantidade de linhas por entidade para a escala (mínimo de 2 times)."""
+    usuarios = max(2 * JOGADORES_POR_TIME, int(BASE['usuario'] * escala))
+    return {
+        'usuario': usuarios,
+        'time': usuarios // JOGADORES_POR_TIME,
+        'local': max(1, int(BASE['local'] * escala)),
+        'partida': max(1, int(BASE['partida'] * escala)),
+    }
+
+
+def capitao_do_time(id_time: int) -> int:
+    return (id_time - 1) * JOGADORES_POR_TIME + 1
+
+
+def _rng(semente: int, tabela: str) -> random.Random:
+    return random.Random(f'{semente}:{tabela}')
+
+
+def gerar_usuarios(semente: int, n: int, hash_senha: str):
+    rng = _rng(semente, 'usuario')
+    for i in range(1, n + 1):
+        nome = f'{rng.choice(NOMES)} {rng.choice(SOBRENOMES)}'
+        nascimento = date(1970, 1, 1) + timedelta(days=rng.randrange(365 * 38))
+        yield (i, nome, f'usuario{i}@seed.futplan', hash_senha, rng.choice(['M', 'F']), nascimento,
+               f'119{rng.randrange(10 ** 8):08d}')
+
+
+def gerar_times(semente: int, n: int):
+    rng = _rng(semente, 'time')
+    for t in range(1, n + 1):
+        yield (t, f'{rng.choice(SOBRENOMES)} FC {t}', capitao_do_time(t), rng.choice(CORES))
+
+
+def gerar_membros(n_times: int):
+    for t in range(1, n_times + 1):
+        for camisa in range(1, JOGADORES_POR_TIME + 1):
+            yield (capitao_do_time(t) + camisa - 1, t, camisa)
+
+
+def gerar_locais(semente: int, n: int) -> list:
+    rng = _rng(semente, 'local')
+    return [
+        (l, f'Quadra {l}', rng.choice([10, 14, 22]), True,
+         timedelta(hours=rng.randint(6, 9)), timedelta(hours=rng.randint(20, 23)))
+        for l in range(1, n + 1)
+    ]
+
+
+def gerar_agenda(semente: int, locais: list, n_partidas: int, n_times: int, inicio: date,
+                 presencas_por_partida: int, corte: date):
+    """Gera, local a local, `(tabela, linha)` de exceções, agendamentos, partidas, times e presenças.
+
+    Cada local recebe uma fatia das partidas em horários de 1h, dia após
+    dia a partir de `inicio`; ~1 dia em 30 tem exceção (fechado ou horário
+    reduzido) e ~20% dos horários ficam livres. Partidas antes de `corte`
+    já têm placar.
+    """
+    rng = _rng(semente, 'agenda')
+    por_local, resto = divmod(n_partidas, len(locais))
+    id_partida = 0
+
+    for indice, (id_local, _, _, _, abertura, fechamento) in enumerate(locais):
+        restantes = por_local + (1 if indice < resto else 0)
+        dia = inicio
+        while restantes:
+            hora_ini, hora_fim = abertura, fechamento
+            if rng.random() < 1 / 30:
+                if rng.random() < 0.5:
+                    yield 'local_excecoes', (id_local, dia, 'Manutenção', None, None)
+                    dia += timedelta(days=1)
+                    continue
+                hora_ini, hora_fim = timedelta(hours=10), timedelta(hours=16)
+                yield 'local_excecoes', (id_local, dia, 'Horário reduzido', hora_ini, hora_fim)
+
+            hora = hora_ini
+            while hora + timedelta(hours=1) <= hora_fim and restantes:
+                if rng.random() < 0.8:
+                    id_partida += 1
+                    restantes -= 1
+                    dthr_ini = datetime.combine(dia, datetime.min.time()) + hora
+                    casa, visitante = rng.sample(range(1, n_times + 1), 2)
+                    # O placar é sorteado sempre, para que o corte não mude a sequência
+                    placar = (rng.randint(0, 6), rng.randint(0, 6))
+                    if dia >= corte:
+                        placar = (None, None)
+                    yield 'agendamento', (id_partida, dthr_ini, dthr_ini + timedelta(hours=1), id_local)
+                    yield 'partida', (id_partida, capitao_do_time(casa), id_partida, *placar)
+                    yield 'time_partida', (casa, id_partida, 'C')
+                    yield 'time_partida', (visitante, id_partida, 'V')
+
+                    jogadores = [capitao_do_time(t) + j for t in (casa, visitante) for j in range(JOGADORES_POR_TIME)]
+                    k = min(len(jogadores), rng.randint(0, 2 * presencas_por_partida))
+                    for id_usuario in sorted(rng.sample(jogadores, k)):
+                        status = rng.choices(STATUS_PRESENCA, weights=(6, 2, 2))[0]
+                        yield 'partida_presenca', (id_partida, id_usuario, status)
+                hora += timedelta(hours=1)
+            dia += timedelta(days=1)
+
+
+class BulkWriter:
+    """Acumula linhas por tabela e grava em blocos de `lote` com `executemany`.
+
+    Cada bloco é confirmado logo em seguida, para a carga não virar uma
+    única transação gigante.
+    """
+
+    def __init__(self, conn, lote: int):
+        self.conn = conn
+        self.lote = lote
+        self.buffers = {}
+        self.totais = {}
+
+    def add(self, tabela: str, linha: tuple) -> None:
+        buffer = self.buffers.setdefault(tabela, [])
+        buffer.append(linha)
+        if len(buffer) >= self.lote:
+            self.flush(tabela)
+
+    def add_all(self, tabela: str, linhas) -> None:
+        for linha in linhas:
+            self.add(tabela, linha)
+
+    def flush(self, tabela: str = None) -> None:
+        for nome in [tabela] if tabela else list(self.buffers):
+            linhas = self.buffers.get(nome)
+            if not linhas:
+                continue
+            colunas = COLUNAS[nome]
+            sql = f"INSERT INTO {nome} ({', '.join(colunas)}) VALUES ({', '.join(['%s'] * len(colunas))})"
+            self.conn.exec_driver_sql(sql, linhas)
+            self.conn.commit()
+            self.totais[nome] = self.totais.get(nome, 0) + len(linhas)
+            self.buffers[nome] = []
+
+
+def seed(engine, semente: int, escala: float, inicio: date, presencas_por_partida: int = 5,
+         lote: int = 5000, senha: str = SENHA_PADRAO, corte: date = None, echo=print) -> dict:
+    from passwords import hash_password
+    from resumos import rebuild_classificacao, rebuild_estatisticas, rebuild_presencas
+
+    n = tamanhos(escala)
+    hash_senha = hash_password(senha)
+    corte = corte or inicio + timedelta(days=CORTE_PADRAO_DIAS)
+
+    with engine.connect() as conn:
+        if conn.execute(text("SELECT 1 FROM usuario LIMIT 1")).fetchone():
+            raise click.ClickException('O banco já tem usuários; o seed precisa de um banco vazio.')
+
+        # Checagens desligadas só nesta sessão; se algo falhar, a conexão é
+        # descartada em vez de voltar ao pool sem FK/unicidade
+        try:
+            conn.exec_driver_sql('SET SESSION foreign_key_checks = 0')
+            conn.exec_driver_sql('SET SESSION unique_checks = 0')
+            writer = BulkWriter(conn, lote)
+
+            etapas = [
+                ('usuario', lambda: gerar_usuarios(semente, n['usuario'], hash_senha)),
+                ('time', lambda: gerar_times(semente, n['time'])),
+                ('time_membros', lambda: gerar_membros(n['time'])),
+            ]
+            for tabela, gerador in etapas:
+                t0 = _time.perf_counter()
+                writer.add_all(tabela, gerador())
+                writer.flush(tabela)
+                echo(f"{tabela}: {writer.totais.get(tabela, 0)} linhas em {_time.perf_counter() - t0:.1f}s")
+
+            locais = gerar_locais(semente, n['local'])
+            writer.add_all('local', locais)
+            writer.flush('local')
+
+            t0 = _time.perf_counter()
+            for tabela, linha in gerar_agenda(semente, locais, n['partida'], n['time'], inicio, presencas_por_partida, corte):
+                writer.add(tabela, linha)
+            writer.flush()
+            echo(f"agenda: {writer.totais} em {_time.perf_counter() - t0:.1f}s")
+
+            t0 = _time.perf_counter()
+            rebuild_presencas(conn, echo=echo)
+            rebuild_classificacao(conn, echo=echo)
+            rebuild_estatisticas(conn, echo=echo)
+            echo(f"resumos em {_time.perf_counter() - t0:.1f}s")
+
+            # ETags das listagens calculadas antes do seed deixam de valer
+            conn.execute(text("UPDATE tabela_versao SET versao = versao + 1"))
+            conn.exec_driver_sql('SET SESSION foreign_key_checks = 1')
+            conn.exec_driver_sql('SET SESSION unique_checks = 1')
+            conn.commit()
+        except BaseException:
+            conn.invalidate()
+            raise
+
+    return writer.totais
+
+
+@click.command('seed')
+@click.option('--semente', type=int, default=42, show_default=True, help='Semente do gerador.')
+@click.option('--escala', type=float, default=1.0, show_default=True,
+              help='Fator sobre 1M usuários / 50k times / 500 locais / 2M partidas.')
+@click.option('--inicio', type=click.DateTime(formats=['%Y-%m-%d']), default='2025-01-01', show_default=True,
+              help='Primeiro dia da agenda gerada.')
+@click.option('--corte', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+              help=f'Partidas antes deste dia já têm placar [padrão: --inicio + {CORTE_PADRAO_DIAS} dias].')
+@click.option('--presencas-por-partida', type=int, default=5, show_default=True, help='Média de respostas por partida.')
+@click.option('--lote', type=int, default=5000, show_default=True, help='Linhas por INSERT.')
+@click.option('--senha', default=SENHA_PADRAO, show_default=True, help='Senha de todos os usuários gerados.')
+def seed_command(semente, escala, inicio, corte, presencas_por_partida, lote, senha):
+    """Popula um banco vazio (já migrado) com dados sintéticos em volume de produção."""
+    from db import engine
+
+    t0 = _time.perf_counter()
+    totais = seed(
+        engine, semente, escala, inicio.date(), presencas_por_partida, lote, senha,
+        corte=corte.date() if corte else None, echo=click.echo,
+    )
+    click.echo(f'{sum(totais.values())} linhas em {_time.perf_counter() - t0:.1f}s.')
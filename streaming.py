@@ -0,0 +1,56 @@
+"""Respostas NDJSON em streaming para as listagens grandes.
+
+Ativado por `?stream=1` ou `Accept: application/x-ndjson`. O resultado é
+lido em páginas por keyset de `STREAM_BATCH_SIZE` linhas (as mesmas de
+`Page.keyset_sql`), cada uma numa conexão emprestada só durante a consulta:
+a memória não cresce com o resultado e um cliente lento não segura conexão
+do pool enquanto baixa. Cursor no servidor (`stream_results`) não serve
+aqui: o dialeto mysqlconnector não o suporta e carregaria tudo em memória.
+"""
+from flask import Response, current_app, request, stream_with_context
+
+from config import STREAM_BATCH_SIZE
+from pagination import Page
+from replicas import get_read_connection
+from repository import cached_text
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+
+def wants_stream() -> bool:
+    if request.args.get('stream', '').lower() in ('1', 'true'):
+        return True
+    return request.accept_mimetypes.best_match(['application/json', NDJSON_MIMETYPE]) == NDJSON_MIMETYPE
+
+
+def ndjson_response(page: Page, select_sql: str, where: list, params: dict, key_columns, key) -> Response:
+    """Transmite `select_sql` a partir de `page.after` (de `Page.for_stream`), um objeto JSON por linha.
+
+    `key_columns` e `key` são os mesmos da listagem paginada: a última linha
+    de cada página vira o cursor `after` da seguinte. As linhas vão direto
+    para o provider JSON do app (`ORJSONProvider`).
+    """
+    dumps = current_app.json.dumps
+
+    def generate():
+        after = page.after
+        while True:
+            pagina = Page(STREAM_BATCH_SIZE, after=after)
+            query, query_params = pagina.keyset_sql(select_sql, where, params, key_columns)
+            with get_read_connection() as conn:
+                rows = conn.execute(cached_text(query), query_params).all()
+
+            lote = rows[:STREAM_BATCH_SIZE]
+            if lote:
+                yield ''.join(dumps(row) + '\n' for row in lote)
+            if len(rows) <= STREAM_BATCH_SIZE:
+                return
+            after = key(lote[-1])
+
+    return Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
+
+
+def ndjson_rows(rows) -> Response:
+    """NDJSON de um resultado já carregado (listas de tamanho limitado, como a de presença)."""
+    dumps = current_app.json.dumps
+    return Response(''.join(dumps(row) + '\n' for row in rows), mimetype=NDJSON_MIMETYPE)
@@ -0,0 +1,77 @@
+"""Versões por tabela para ETags das listagens.
+
+Cada rota que escreve em uma tabela listada chama `bump_versions` na mesma
+transação da escrita; a versão fica no banco (`tabela_versao`, migração
+v004), então todos os workers enxergam o mesmo valor. As listagens usam
+`versioned_etag`: a ETag fraca é derivada das versões das tabelas que a
+consulta lê e da query string, e um `If-None-Match` que casa devolve 304
+sem executar a consulta principal.
+"""
+import hashlib
+from functools import wraps
+
+from flask import make_response, request
+from sqlalchemy import bindparam, text
+
+from replicas import get_read_connection
+
+_BUMP = text(
+    "UPDATE tabela_versao SET versao = versao + 1 WHERE tabela IN :tabelas"
+).bindparams(bindparam('tabelas', expanding=True))
+
+_READ = text(
+    "SELECT tabela, versao FROM tabela_versao WHERE tabela IN :tabelas"
+).bindparams(bindparam('tabelas', expanding=True))
+
+
+def bump_versions(conn, *tabelas) -> None:
+    """Invalida as ETags que dependem de `tabelas` (na transação de `conn`)."""
+    conn.execute(_BUMP, {'tabelas': list(tabelas)})
+
+
+def read_versions(conn, tabelas) -> dict:
+    return {row._mapping['tabela']: row._mapping['versao'] for row in conn.execute(_READ, {'tabelas': list(tabelas)})}
+
+
+def make_etag(versions: dict, variant: bytes) -> str:
+    digest = hashlib.blake2b(digest_size=12)
+    for tabela in sorted(versions):
+        digest.update(f'{tabela}={versions[tabela]};'.encode('utf-8'))
+    digest.update(variant)
+    return digest.hexdigest()
+
+
+def versioned_etag(*tabelas):
+    """Decorator para GETs de listagem cujo conteúdo depende só de `tabelas`.
+
+    A versão é lida antes da consulta principal: uma escrita concorrente no
+    máximo faz a resposta sair com uma ETag mais antiga que os dados, o que
+    só causa um novo download na próxima requisição.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                with get_read_connection() as conn:
+                    versions = read_versions(conn, tabelas)
+                # JSON e NDJSON (Accept) da mesma URL são representações distintas
+                variant = request.query_string + b'|' + request.headers.get('Accept', '').encode('latin-1')
+                etag = make_etag(versions, variant)
+            except Exception:
+                return view(*args, **kwargs)  # sem versão: resposta normal, sem ETag
+
+            if request.if_none_match.contains_weak(etag):
+                response = make_response('', 304)
+                response.set_etag(etag, weak=True)
+                response.vary.add('Accept')
+                return response
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                response.set_etag(etag, weak=True)
+                response.vary.add('Accept')
+            return response
+
+        return wrapper
+
+    return decorator
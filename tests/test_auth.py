@@ -6,7 +6,10 @@ from contextlib import contextmanager
 
 @pytest.fixture
 def client():
+    from auth import user_cache
+
     flask_app.config['TESTING'] = True
+    user_cache.clear()
     with flask_app.test_client() as client:
         yield client
 
@@ -15,7 +18,7 @@ def make_fake_get_connection():
     """Retorna um context manager que simula conexões/consultas ao banco.
 
     Ele responde para duas queries esperadas no fluxo de teste:
-    - login: SELECT id_usuario, nome, hash_senha FROM usuario WHERE email = :email
+    - login: SELECT id_usuario, nome, email, hash_senha FROM usuario WHERE email = :email
     - token lookup: SELECT * FROM usuario WHERE id_usuario = :id_usuario
     """
 
@@ -39,9 +42,9 @@ def make_fake_get_connection():
         def execute(self, query, params=None):
             q = str(query).lower()
             # Simula a query do endpoint /login
-            if 'select id_usuario, nome, hash_senha' in q or 'hash_senha' in q:
+            if 'select id_usuario, nome, email, hash_senha' in q or 'hash_senha' in q:
                 hashed = generate_password_hash('Test1234!')
-                row = FakeRow({'id_usuario': 1, 'nome': 'test_user', 'hash_senha': hashed})
+                row = FakeRow({'id_usuario': 1, 'nome': 'test_user', 'email': 'test_user@example.com', 'hash_senha': hashed})
                 return FakeResult(row)
 
             # Simula a query do decorador token_required (/profile)
@@ -98,3 +101,26 @@ def test_login_and_profile_flow_monkeypatched_db(client, monkeypatch):
     assert rv2.status_code == 200, f"Profile falhou: {rv2.data}"
     profile = rv2.get_json()
     assert 'email' in profile and profile['email'] == login_payload['email']
+
+
+def test_stateless_login_refresh_flow(client, monkeypatch):
+    """No modo sem estado o login devolve o par access/refresh e o refresh gera um novo par."""
+    fake_ctx = make_fake_get_connection()
+    monkeypatch.setattr('routes.auth.get_connection', fake_ctx)
+    monkeypatch.setattr('auth.get_connection', fake_ctx)
+    monkeypatch.setattr('revocation.get_connection', fake_ctx)
+    monkeypatch.setattr('auth.JWT_STATELESS', True)
+    monkeypatch.setattr('routes.auth.JWT_STATELESS', True)
+
+    rv = client.post('/login', json={"email": "test_user@example.com", "senha": "Test1234!"})
+    assert rv.status_code == 200, f"Login falhou: {rv.data}"
+    tokens = rv.get_json()
+    assert 'access_token' in tokens and 'refresh_token' in tokens
+
+    # O refresh token não autentica rotas protegidas
+    rv2 = client.get('/profile', headers={"Authorization": f"Bearer {tokens['refresh_token']}"})
+    assert rv2.status_code == 401
+
+    rv3 = client.post('/token/refresh', json={'refresh_token': tokens['refresh_token']})
+    assert rv3.status_code == 200, f"Refresh falhou: {rv3.data}"
+    assert 'access_token' in rv3.get_json()
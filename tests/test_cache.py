@@ -0,0 +1,43 @@
+from cache import TTLCache
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_cache_expira_entradas():
+    timer = FakeTimer()
+    cache = TTLCache(maxsize=10, ttl=5, timer=timer)
+
+    cache.set(1, 'a')
+    assert cache.get(1) == 'a'
+
+    timer.now = 6
+    assert cache.get(1) is None
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+
+def test_ttl_cache_despeja_o_menos_usado():
+    cache = TTLCache(maxsize=2, ttl=60)
+
+    cache.set(1, 'a')
+    cache.set(2, 'b')
+    cache.get(1)  # 2 passa a ser o menos usado
+    cache.set(3, 'c')
+
+    assert cache.get(2) is None
+    assert cache.get(1) == 'a'
+    assert cache.get(3) == 'c'
+    assert cache.stats()['evictions'] == 1
+
+
+def test_ttl_cache_invalidate():
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set(1, 'a')
+    cache.invalidate(1)
+    assert cache.get(1) is None
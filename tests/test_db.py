@@ -0,0 +1,46 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+from db import PoolMetrics
+
+
+@pytest.fixture
+def metrics(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=QueuePool,
+        pool_size=1,
+        max_overflow=1,
+        pool_timeout=0.05,
+    )
+    return PoolMetrics(engine)
+
+
+def test_pool_metrics_conta_checkouts_e_overflow(metrics):
+    primeira = metrics.checkout()
+    segunda = metrics.checkout()  # excede pool_size=1: usa overflow
+    assert primeira.execute(text('SELECT 1')).scalar() == 1
+
+    stats = metrics.snapshot()
+    assert stats['checkouts'] == 2
+    assert stats['overflow_checkouts'] == 1
+    assert stats['checked_out'] == 2
+    assert stats['connects'] == 2
+
+    primeira.close()
+    segunda.close()
+    assert metrics.snapshot()['checked_out'] == 0
+
+
+def test_pool_metrics_conta_timeout_e_invalidacao(metrics):
+    abertas = [metrics.checkout(), metrics.checkout()]
+    with pytest.raises(PoolTimeoutError):
+        metrics.checkout()
+    assert metrics.snapshot()['timeouts'] == 1
+
+    abertas[0].invalidate()
+    assert metrics.snapshot()['invalidations'] == 1
+    for conn in abertas:
+        conn.close()
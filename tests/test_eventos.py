@@ -0,0 +1,165 @@
+import subprocess
+import sys
+import textwrap
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+import pytest
+
+import eventos
+from app import app as flask_app
+from auth import generate_token_pair
+
+
+@pytest.fixture
+def hub(monkeypatch):
+    hub = eventos.EventHub(eventos.LocalTransport(), tamanho_fila=2, max_assinantes=3)
+    monkeypatch.setattr('eventos.hub', hub)
+    return hub
+
+
+def test_hub_entrega_a_todos_os_assinantes_do_topico(hub):
+    a, b = hub.assinar('partida:1'), hub.assinar('partida:1')
+    outra = hub.assinar('partida:2')
+
+    eventos.publicar_partida(1, 'placar', placar_time_casa=2, placar_time_visitante=1)
+
+    esperado = {'tipo': 'placar', 'id_partida': 1, 'placar_time_casa': 2, 'placar_time_visitante': 1}
+    assert a.proximo(0) == esperado and b.proximo(0) == esperado
+    assert outra.proximo(0) is None
+
+    with pytest.raises(eventos.HubLotado):
+        hub.assinar('partida:3')
+    hub.cancelar(a)
+    hub.cancelar(a)  # idempotente
+    assert (hub.assinantes(), hub.assinantes('partida:1')) == (2, 1)
+
+
+def test_assinante_lento_e_encerrado(hub):
+    lento = hub.assinar('partida:1')
+    for placar in range(3):
+        hub.publicar('partida:1', {'tipo': 'placar', 'placar_time_casa': placar})
+
+    assert lento.encerrada
+    assert hub.assinantes('partida:1') == 0
+
+
+def test_formatar_sse_quebra_linhas_em_campos_data():
+    assert eventos.formatar_sse('estado', '{"a":1}\n{"b":2}') == 'event: estado\ndata: {"a":1}\ndata: {"b":2}\n\n'
+
+
+def test_stream_envia_estado_e_eventos_publicados(hub, monkeypatch):
+    monkeypatch.setattr('auth.JWT_STATELESS', True)
+    monkeypatch.setattr('auth.revocation_list.might_be_revoked', lambda id_usuario: False)
+
+    @contextmanager
+    def fake_connection():
+        yield object()
+
+    monkeypatch.setattr('routes.partidas.get_read_connection', fake_connection)
+    monkeypatch.setattr('repository.partidas.detalhes', lambda conn, id_partida: {'id_partida': id_partida} if id_partida == 7 else None)
+    token = generate_token_pair(1, 'torcedor', 'torcedor@example.com')['access_token']
+    headers = {'Authorization': f'Bearer {token}'}
+
+    with flask_app.test_client() as client:
+        assert client.get('/partidas/8/eventos', headers=headers).status_code == 404
+        assert hub.assinantes() == 0
+
+        rv = client.get('/partidas/7/eventos', headers=headers, buffered=False)
+        assert rv.mimetype == 'text/event-stream'
+        corpo = iter(rv.response)
+        assert next(corpo).decode() == 'retry: 3000\nevent: estado\ndata: {"id_partida":7}\n\n'
+
+        eventos.publicar_partida(7, 'cancelada')
+        assert next(corpo).decode() == 'event: cancelada\ndata: {"tipo":"cancelada","id_partida":7}\n\n'
+        assert next(corpo, None) is None
+        rv.close()
+
+    assert hub.assinantes() == 0
+
+
+def test_ressincronizar_encerra_streams_do_processo(hub):
+    a, b = hub.assinar('partida:1'), hub.assinar('partida:2')
+    hub.encerrar_todos()
+
+    assert a.encerrada and b.encerrada and hub.assinantes() == 0
+    assert a.proximo(0) == {'tipo': 'ressincronizar'}
+
+
+class _PubSubFalso:
+    def __init__(self, mensagens):
+        self._mensagens = mensagens
+
+    def subscribe(self, canal):
+        pass
+
+    def listen(self):
+        item = self._mensagens.pop(0)
+        if isinstance(item, Exception):
+            raise item
+        yield {'data': item}
+        raise ConnectionError('fim do teste')
+
+    def close(self):
+        pass
+
+
+def test_redis_transport_reassina_apos_queda():
+    transporte = eventos.RedisTransport.__new__(eventos.RedisTransport)
+    transporte.canal, transporte.espera_inicial, transporte.espera_maxima = 'c', 0.01, 0.01
+    mensagens = [ConnectionError('redis caiu'), '{"topico": "partida:1", "evento": {"tipo": "placar"}}']
+    transporte._redis = type('RedisFalso', (), {'pubsub': lambda self, **kw: _PubSubFalso(mensagens)})()
+
+    recebidos, ressincronizado, pronto = [], [], threading.Event()
+
+    def entregar(topico, evento):
+        recebidos.append((topico, evento))
+        pronto.set()
+
+    threading.Thread(
+        target=transporte.escutar, args=(entregar, lambda: ressincronizado.append(True)), daemon=True
+    ).start()
+
+    assert pronto.wait(2)
+    assert recebidos == [('partida:1', {'tipo': 'placar'})]
+    assert ressincronizado == [True]
+
+
+def test_hub_e_hash_cooperativos_com_gevent():
+    pytest.importorskip('gevent')
+    # Processo separado: o monkey-patch precisa vir antes de qualquer import
+    script = textwrap.dedent("""
+        from gevent import monkey
+        monkey.patch_all()
+        import gevent
+        import eventos
+        from passwords import hash_password
+
+        hub = eventos.EventHub(eventos.LocalTransport())
+        ticks = []
+
+        def relogio():
+            while True:
+                ticks.append(1)
+                gevent.sleep(0.005)
+
+        def espectador():
+            assinatura = hub.assinar('partida:1')
+            return assinatura.proximo(timeout=5)
+
+        gevent.spawn(relogio)
+        espectadores = [gevent.spawn(espectador) for _ in range(500)]
+        gevent.sleep(0.1)
+        antes = len(ticks)
+        hash_password('segredo')
+        assert len(ticks) > antes, 'hash travou o loop'
+        hub.publicar('partida:1', {'tipo': 'placar'})
+        gevent.joinall(espectadores, timeout=5)
+        assert all(g.value == {'tipo': 'placar'} for g in espectadores)
+        assert len(ticks) > 10
+        print('ok')
+    """)
+    raiz = Path(__file__).resolve().parent.parent
+    saida = subprocess.run([sys.executable, '-c', script], cwd=raiz, capture_output=True, text=True, timeout=60)
+    assert saida.stdout.strip() == 'ok', saida.stderr
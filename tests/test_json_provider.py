@@ -0,0 +1,32 @@
+from datetime import date, datetime, time, timedelta
+
+from flask import Flask, jsonify
+from sqlalchemy import create_engine, text
+
+from json_provider import ORJSONProvider
+
+
+def test_serializa_linhas_e_tipos_de_data_do_banco():
+    app = Flask(__name__)
+    app.json = ORJSONProvider(app)
+    engine = create_engine('sqlite://')
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT 1 AS id, 'a' AS nome UNION ALL SELECT 2, 'b'")).all()
+
+    with app.app_context():
+        assert jsonify(rows).get_json() == [{'id': 1, 'nome': 'a'}, {'id': 2, 'nome': 'b'}]
+        assert jsonify(rows[0]).get_json() == {'id': 1, 'nome': 'a'}
+        assert jsonify(rows[0]._mapping).get_json() == {'id': 1, 'nome': 'a'}
+
+        dados = {
+            'dthr': datetime(2024, 5, 1, 18, 30),
+            'data': date(2024, 5, 1),
+            'hora': time(9, 0),
+            'abertura': timedelta(hours=8, minutes=15),
+        }
+        assert jsonify(dados).get_json() == {
+            'dthr': '2024-05-01T18:30:00',
+            'data': '2024-05-01',
+            'hora': '09:00:00',
+            'abertura': '08:15:00',
+        }
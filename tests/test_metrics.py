@@ -0,0 +1,51 @@
+from app import app as flask_app
+
+
+def test_metrics_exporta_requisicoes_por_blueprint():
+    client = flask_app.test_client()
+    client.get('/')
+    client.get('/rota-inexistente')
+
+    resposta = client.get('/metrics')
+    assert resposta.status_code == 200
+    corpo = resposta.get_data(as_text=True)
+
+    assert 'futplan_http_requests_total{blueprint="app",endpoint="hello_world",method="GET",status="200"}' in corpo
+    assert 'endpoint="nao_encontrado",method="GET",status="404"' in corpo
+    assert 'futplan_http_request_duration_seconds_bucket{blueprint="app",endpoint="hello_world",le="0.005"}' in corpo
+    assert 'futplan_http_requests_in_flight' in corpo
+    assert '# TYPE futplan_db_pool_checked_out gauge' in corpo
+    assert 'futplan_db_pool_checked_out{banco="primario"}' in corpo
+    # Acumulados do pool saem como Counter, não como Gauge
+    assert '# TYPE futplan_db_pool_checkouts_total counter' in corpo
+    assert 'futplan_db_pool_wait_seconds_total' in corpo
+    assert 'futplan_db_pool_checkouts gauge' not in corpo
+
+
+def test_contadores_do_pool_recebem_so_o_incremento_por_banco(monkeypatch):
+    from types import SimpleNamespace
+
+    from prometheus_client import REGISTRY
+
+    import metrics
+
+    def amostra(banco):
+        return REGISTRY.get_sample_value('futplan_db_pool_wait_seconds_total', {'banco': banco}) or 0.0
+
+    stats = {'checked_out': 1, 'wait_seconds_total': 1000.0}
+    replica = {'checked_out': 3, 'wait_seconds_total': 7.0}
+    monkeypatch.setattr('metrics.pools', {
+        'teste_primario': SimpleNamespace(snapshot=lambda: dict(stats)),
+        'teste_replica': SimpleNamespace(snapshot=lambda: dict(replica)),
+    })
+    monkeypatch.setattr('metrics._pool_exportado', {})
+    antes = amostra('teste_primario'), amostra('teste_replica')
+
+    metrics.update_pool_metrics()
+    stats['wait_seconds_total'] = 1002.5
+    metrics.update_pool_metrics()
+    metrics.update_pool_metrics()
+
+    assert amostra('teste_primario') - antes[0] == 1002.5
+    assert amostra('teste_replica') - antes[1] == 7.0
+    assert REGISTRY.get_sample_value('futplan_db_pool_checked_out', {'banco': 'teste_replica'}) == 3
@@ -0,0 +1,56 @@
+import pytest
+
+from migrations import create_index_if_missing, index_exists, load_migrations
+from migrations.explain import extract_queries, sample_value
+
+
+def test_migracoes_em_ordem_e_sem_lacunas():
+    versions = [m.VERSION for m in load_migrations()]
+    assert versions == list(range(1, len(versions) + 1))
+
+
+def test_extract_queries_encontra_consultas_das_rotas():
+    queries = extract_queries()
+    sqls = [sql for _, sql in queries]
+
+    assert any('FROM agendamento WHERE fk_local = :id_local' in sql for sql in sqls)
+    assert any(location.startswith('repository/partidas.py') for location, _ in queries)
+    # UPDATE montado com f-string não é extraído pela metade
+    assert not any(sql.strip() in ('UPDATE time SET', 'UPDATE usuario SET') for sql in sqls)
+
+
+def test_sample_value_por_nome():
+    assert sample_value('id_time') == 1
+    assert sample_value('status') == 'Confirmado'
+
+
+class _InformationSchema:
+    """Responde à consulta de `information_schema.statistics` com `linhas` e grava os CREATE."""
+
+    def __init__(self, linhas):
+        self.linhas = linhas
+        self.comandos = []
+
+    def execute(self, query, params=None):
+        if 'information_schema' in str(query):
+            return self.linhas
+        self.comandos.append(str(query))
+
+
+def test_indice_unico_exige_unique_com_as_mesmas_colunas():
+    # (index_name, column_name, non_unique)
+    conn = _InformationSchema([
+        ('idx_email', 'email', 1),
+        ('idx_presenca', 'fk_partida', 1), ('idx_presenca', 'fk_usuario', 1),
+        ('uq_largo', 'fk_local', 0), ('uq_largo', 'data_excecao', 0), ('uq_largo', 'motivo', 0),
+    ])
+
+    assert index_exists(conn, 'usuario', ['email'])
+    assert not index_exists(conn, 'usuario', ['email'], unique=True)
+    assert not index_exists(conn, 'local_excecoes', ['fk_local', 'data_excecao'], unique=True)
+
+    create_index_if_missing(conn, 'partida_presenca', 'uq_presenca', ['fk_partida', 'fk_usuario'], unique=True)
+    assert conn.comandos == ['CREATE UNIQUE INDEX uq_presenca ON `partida_presenca` (fk_partida, fk_usuario)']
+
+    with pytest.raises(RuntimeError, match='não é UNIQUE'):
+        create_index_if_missing(conn, 'usuario', 'idx_email', ['email'], unique=True)
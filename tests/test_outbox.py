@@ -0,0 +1,120 @@
+from contextlib import nullcontext
+from datetime import datetime
+from types import SimpleNamespace
+
+from click.testing import CliRunner
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+import outbox_worker
+from repository import outbox
+
+
+def _evento(id_evento, tipo, tentativas=0):
+    return SimpleNamespace(_mapping={
+        'id_evento': id_evento, 'tipo': tipo, 'payload': '{"id_partida": %d}' % id_evento,
+        'tentativas': tentativas, 'atraso': 0.5,
+    })
+
+
+def test_backoff_exponencial_limitado_com_jitter():
+    assert [outbox_worker.backoff(t, 5, 60, rand=lambda: 1.0) for t in (1, 2, 3, 5)] == [5, 10, 20, 60]
+    assert outbox_worker.backoff(2, 5, 60, rand=lambda: 0.0) == 5
+
+
+def test_processar_lote_entrega_e_reagenda_falhas(monkeypatch):
+    eventos = [_evento(1, 'partida_criada'), _evento(2, 'placar_registrado'), _evento(3, 'placar_registrado', 7), _evento(4, 'sem_handler')]
+    processados, reagendados, recebidos = [], [], []
+    monkeypatch.setattr('repository.outbox.reservar', lambda conn, lote: eventos)
+    monkeypatch.setattr('repository.outbox.marcar_processados', lambda conn, ids: processados.extend(ids))
+    monkeypatch.setattr(
+        'repository.outbox.reagendar',
+        lambda conn, id_evento, tentativas, espera, erro, desistir: reagendados.append((id_evento, tentativas, desistir)),
+    )
+
+    def falha(id_evento, payload):
+        raise RuntimeError('serviço fora do ar')
+
+    handlers = {
+        'partida_criada': [lambda id_evento, payload: recebidos.append((id_evento, payload))],
+        'placar_registrado': [falha],
+    }
+    conn = SimpleNamespace(begin=nullcontext)
+
+    assert outbox_worker.processar_lote(conn, handlers, lote=10, max_tentativas=8) == 4
+    assert recebidos == [(1, {'id_partida': 1})]
+    assert processados == [1, 4]
+    # A oitava falha esgota as tentativas
+    assert reagendados == [(2, 1, False), (3, 8, True)]
+
+
+def test_registrar_muitos_serializa_datas():
+    engine = create_engine('sqlite://')
+    with engine.begin() as conn:
+        conn.execute(text('CREATE TABLE outbox (id_evento INTEGER PRIMARY KEY, tipo TEXT, payload TEXT)'))
+        outbox.registrar_muitos(conn, outbox.PARTIDA_CRIADA, [
+            {'id_partida': 1, 'dthr_ini': datetime(2026, 5, 1, 20, 0)},
+            {'id_partida': 2, 'dthr_ini': datetime(2026, 5, 2, 20, 0)},
+        ])
+        linhas = conn.execute(text('SELECT id_evento, tipo, payload FROM outbox ORDER BY id_evento')).all()
+
+    assert [l.tipo for l in linhas] == ['partida_criada', 'partida_criada']
+    assert outbox.payload(linhas[1]) == {'id_partida': 2, 'dthr_ini': '2026-05-02T20:00:00'}
+
+
+def test_processar_atualiza_gauges_por_tempo_mesmo_com_lotes_cheios(monkeypatch):
+    relogio = [0.0]
+    lotes = []
+
+    def lote_cheio(conn, lote):
+        # Backlog: todo lote vem cheio; cada um leva 4s
+        if len(lotes) == 10:
+            raise KeyboardInterrupt
+        lotes.append(lote)
+        relogio[0] += 4
+        return lote
+
+    atualizacoes = []
+    monkeypatch.setattr('outbox_worker.get_connection', nullcontext)
+    monkeypatch.setattr('outbox_worker._time', SimpleNamespace(monotonic=lambda: relogio[0], sleep=lambda s: None))
+    monkeypatch.setattr('outbox_worker.OUTBOX_METRICAS_SECONDS', 15)
+    monkeypatch.setattr('outbox_worker.processar_lote', lote_cheio)
+    monkeypatch.setattr('outbox_worker.atualizar_fila', lambda conn: atualizacoes.append(relogio[0]))
+    monkeypatch.setattr('outbox_worker.signal.signal', lambda *args: None)
+
+    resultado = CliRunner().invoke(outbox_worker.processar_command, ['--lote', '50'])
+
+    assert resultado.exit_code == 0, resultado.output
+    assert '500 evento(s)' in resultado.output
+    assert atualizacoes == [4, 20, 36]
+
+
+def test_processar_sobrevive_a_falha_de_banco_com_nova_conexao(monkeypatch):
+    conexoes, esperas, chamadas = [], [], []
+
+    def get_connection():
+        conexoes.append(object())
+        return nullcontext(conexoes[-1])
+
+    def lote(conn, lote):
+        chamadas.append(conn)
+        if len(chamadas) <= 2:
+            raise OperationalError('SELECT ...', {}, Exception('Lost connection to MySQL server'))
+        if len(chamadas) == 4:
+            raise KeyboardInterrupt
+        return 3
+
+    monkeypatch.setattr('outbox_worker.get_connection', get_connection)
+    monkeypatch.setattr('outbox_worker._time', SimpleNamespace(monotonic=lambda: 0.0, sleep=esperas.append))
+    monkeypatch.setattr('outbox_worker.OUTBOX_INTERVALO_SECONDS', 1)
+    monkeypatch.setattr('outbox_worker.processar_lote', lote)
+    monkeypatch.setattr('outbox_worker.atualizar_fila', lambda conn: None)
+    monkeypatch.setattr('outbox_worker.signal.signal', lambda *args: None)
+
+    resultado = CliRunner().invoke(outbox_worker.processar_command, ['--lote', '50'])
+
+    assert resultado.exit_code == 0, resultado.output
+    assert '3 evento(s)' in resultado.output
+    # Backoff entre as falhas e uma conexão nova a cada lote
+    assert 0.5 <= esperas[0] <= 1 and 1 <= esperas[1] <= 2
+    assert len(set(map(id, chamadas))) == 4
@@ -0,0 +1,47 @@
+import pytest
+from sqlalchemy import create_engine, text
+
+from pagination import Page, PaginationError
+
+
+@pytest.fixture
+def conn():
+    engine = create_engine('sqlite://')
+    with engine.connect() as conn:
+        conn.execute(text('CREATE TABLE item (id INTEGER PRIMARY KEY, grupo INTEGER)'))
+        conn.execute(text('INSERT INTO item (id, grupo) VALUES ' + ', '.join(f'({i}, {i % 3})' for i in range(1, 11))))
+        yield conn
+
+
+def fetch(conn, args):
+    page = Page.from_request(args, key_types=(int, int))
+    query, params = page.keyset_sql('SELECT id, grupo FROM item', [], {}, ('grupo', 'id'))
+    rows = page.split(conn.execute(text(query), params), key=lambda r: (r.grupo, r.id))
+    return page, [(r.grupo, r.id) for r in rows]
+
+
+def test_keyset_percorre_todas_as_paginas_nos_dois_sentidos(conn):
+    todos = sorted((i % 3, i) for i in range(1, 11))
+
+    vistos = []
+    args = {'limit': '4'}
+    pages = []
+    while True:
+        page, rows = fetch(conn, args)
+        vistos.extend(rows)
+        pages.append(rows)
+        if not page.next_cursor:
+            break
+        args = {'limit': '4', 'after': page.next_cursor}
+    assert vistos == todos
+
+    # Volta uma página a partir da última
+    page, rows = fetch(conn, {'limit': '4', 'before': page.prev_cursor})
+    assert rows == pages[-2]
+
+
+def test_limit_invalido():
+    with pytest.raises(PaginationError):
+        Page.from_request({'limit': '0'}, key_types=(int,))
+    with pytest.raises(PaginationError):
+        Page.from_request({'after': 'lixo'}, key_types=(int,))
@@ -0,0 +1,24 @@
+import threading
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+import passwords
+
+
+def test_verify_e_needs_rehash():
+    atual = passwords.hash_password('segredo')
+    assert passwords.verify_password(atual, 'segredo')
+    assert not passwords.verify_password(atual, 'outra')
+    assert not passwords.needs_rehash(atual)
+
+    antigo = generate_password_hash('segredo', 'pbkdf2:sha256:1000')
+    assert passwords.needs_rehash(antigo)
+
+
+def test_pool_saturado_falha_rapido(monkeypatch):
+    monkeypatch.setattr(passwords, '_slots', threading.BoundedSemaphore(1))
+    passwords._slots.acquire()  # simula o pool ocupado
+
+    with pytest.raises(passwords.HashPoolSaturated):
+        passwords.hash_password('segredo')
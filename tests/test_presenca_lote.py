@@ -0,0 +1,85 @@
+from contextlib import contextmanager
+
+import pytest
+
+from app import app as flask_app
+from auth import generate_token_pair
+from routes.partidas import _validar_presencas
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # Token sem estado: o usuário vem dos claims, sem consultar o banco
+    monkeypatch.setattr('auth.JWT_STATELESS', True)
+    monkeypatch.setattr('auth.revocation_list.might_be_revoked', lambda id_usuario: False)
+
+    @contextmanager
+    def fake_transaction():
+        yield object()
+
+    monkeypatch.setattr('routes.partidas.get_transaction', fake_transaction)
+    flask_app.config['TESTING'] = True
+    with flask_app.test_client() as client:
+        yield client
+
+
+def _headers(id_usuario=1):
+    token = generate_token_pair(id_usuario, 'capitao', 'capitao@example.com')['access_token']
+    return {'Authorization': f'Bearer {token}'}
+
+
+def test_validar_presencas_rejeita_formato_e_repetidos():
+    resultados, validos = _validar_presencas([
+        {'id_usuario': 10, 'status': 'Confirmado'},
+        {'id_usuario': 'x', 'status': 'Confirmado'},
+        {'id_usuario': 11, 'status': 'Talvez'},
+        {'id_usuario': 10, 'status': 'Recusado'},
+    ])
+
+    assert validos == {10: (0, 'Confirmado')}
+    assert resultados[0] is None
+    assert [r['codigo'] for r in resultados[1:]] == [400, 400, 400]
+    assert resultados[3]['error'] == 'Usuário repetido no lote.'
+
+
+def test_lote_grava_so_jogadores_do_time_do_capitao(client, monkeypatch):
+    gravadas = {}
+    monkeypatch.setattr('repository.partidas.capitaes', lambda conn, id_partida: {1, 2})
+    monkeypatch.setattr(
+        'repository.partidas.times_dos_jogadores',
+        lambda conn, id_partida, ids: {10: {100: 1}, 11: {200: 2}},  # 11 é do time adversário; 12 não joga
+    )
+    monkeypatch.setattr(
+        'repository.partidas.registrar_presencas',
+        lambda conn, id_partida, presencas, times_por_jogador: gravadas.update(presencas) or True,
+    )
+    monkeypatch.setattr('repository.partidas.contadores', lambda conn, id_partida: {})
+    versoes = []
+    monkeypatch.setattr('routes.partidas.bump_versions', lambda conn, *tabelas: versoes.extend(tabelas))
+
+    rv = client.post('/partidas/7/presenca/lote', headers=_headers(), json={'presencas': [
+        {'id_usuario': 10, 'status': 'Confirmado'},
+        {'id_usuario': 11, 'status': 'Confirmado'},
+        {'id_usuario': 12, 'status': 'Duvida'},
+    ]})
+
+    assert rv.status_code == 200
+    assert gravadas == {10: 'Confirmado'}
+    # Só a versão dos contadores muda; a de 'partida' fica livre para agendamentos e placares
+    assert versoes == ['partida_presenca_resumo']
+    assert [r['resultado'] for r in rv.get_json()['resultados']] == ['atualizada', 'erro', 'erro']
+
+
+def test_lote_exige_capitao_da_partida(client, monkeypatch):
+    monkeypatch.setattr('repository.partidas.capitaes', lambda conn, id_partida: {2, 3})
+
+    rv = client.post('/partidas/7/presenca/lote', headers=_headers(), json={'presencas': [
+        {'id_usuario': 10, 'status': 'Confirmado'},
+    ]})
+    assert rv.status_code == 403
+
+    monkeypatch.setattr('repository.partidas.capitaes', lambda conn, id_partida: set())
+    rv = client.post('/partidas/7/presenca/lote', headers=_headers(), json={'presencas': [
+        {'id_usuario': 10, 'status': 'Confirmado'},
+    ]})
+    assert rv.status_code == 404
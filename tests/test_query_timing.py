@@ -0,0 +1,80 @@
+import logging
+
+from flask import Flask
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from query_timing import QueryTimer, redact
+
+
+def make_app(slow_query_ms):
+    engine = create_engine('sqlite://')
+    app = Flask(__name__)
+    QueryTimer([engine], slow_query_ms).install(app)
+
+    @app.route('/consulta')
+    def consulta():
+        with engine.connect() as conn:
+            conn.execute(text('SELECT 1'))
+            conn.execute(text('SELECT :email'), {'email': 'segredo@example.com'})
+        return 'ok'
+
+    @app.route('/sem-sql')
+    def sem_sql():
+        return 'ok'
+
+    return app
+
+
+def test_server_timing_conta_consultas_da_requisicao():
+    client = make_app(slow_query_ms=10_000).test_client()
+
+    header = client.get('/consulta').headers['Server-Timing']
+    assert header.startswith('db;desc="2 consulta(s)";dur=')
+    assert 'db-max;dur=' in header
+    assert 'Server-Timing' not in client.get('/sem-sql').headers
+
+
+def test_consulta_lenta_e_logada_sem_valores(caplog):
+    client = make_app(slow_query_ms=0).test_client()
+
+    with caplog.at_level(logging.WARNING, logger='futplan.slow_query'):
+        client.get('/consulta')
+
+    mensagens = [r.getMessage() for r in caplog.records]
+    # sqlite usa parâmetros posicionais; no MySQL (pyformat) os nomes são mantidos
+    assert any("SELECT ?" in m and "'<str>'" in m for m in mensagens)
+    assert not any('segredo@example.com' in m for m in mensagens)
+
+
+def test_redact_em_executemany():
+    assert redact([{'id': 1}, {'id': 2}]) == "2 linha(s), ex.: {'id': '<int>'}"
+
+
+def test_instrumenta_todas_as_engines():
+    primario, replica = create_engine('sqlite://'), create_engine('sqlite://')
+    app = Flask(__name__)
+    QueryTimer([primario, replica], slow_query_ms=10_000).install(app)
+
+    @app.route('/duas')
+    def duas():
+        for engine in (primario, replica):
+            with engine.connect() as conn:
+                conn.execute(text('SELECT 1'))
+        return 'ok'
+
+    assert app.test_client().get('/duas').headers['Server-Timing'].startswith('db;desc="2 consulta(s)"')
+
+
+def test_comando_com_erro_nao_deixa_estado_na_conexao():
+    engine = create_engine('sqlite://')
+    app = Flask(__name__)
+    QueryTimer([engine], slow_query_ms=10_000).install(app)
+
+    with app.test_request_context('/'), engine.connect() as conn:
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                conn.execute(text('SELECT * FROM tabela_inexistente'))
+        assert conn.execute(text('SELECT 1')).scalar() == 1
+        assert '_query_start' not in conn.info
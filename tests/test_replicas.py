@@ -0,0 +1,131 @@
+from contextlib import contextmanager
+
+import pytest
+from flask import Flask, g
+from sqlalchemy import create_engine, text
+
+import replicas
+from db import PoolMetrics
+from replicas import ReadRouter, get_read_connection
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class BrokenEngine:
+    def checkout(self):
+        raise ConnectionError('réplica fora do ar')
+
+
+def named_engine(nome):
+    engine = create_engine('sqlite://')
+    engine.nome = nome
+    return PoolMetrics(engine)
+
+
+@pytest.fixture
+def router(monkeypatch):
+    timer = FakeTimer()
+    router = ReadRouter([named_engine('r0'), BrokenEngine(), named_engine('r2')], 5, 30, timer=timer)
+    monkeypatch.setattr(replicas, 'read_router', router)
+
+    @contextmanager
+    def fake_primary():
+        yield 'primario'
+
+    monkeypatch.setattr(replicas, 'get_connection', fake_primary)
+    return router, timer
+
+
+def origem(conn):
+    return conn if conn == 'primario' else conn.engine.nome
+
+
+def test_rodizio_pula_replica_com_falha(router):
+    router, timer = router
+    app = Flask(__name__)
+    vistas = []
+    for _ in range(4):
+        with app.test_request_context('/'):
+            with get_read_connection() as conn:
+                vistas.append(origem(conn))
+    assert set(vistas) == {'r0', 'r2'}
+    assert not router.healthy(1)
+
+    timer.now += 31
+    assert router.healthy(1)  # volta a ser tentada após REPLICA_RETRY_SECONDS
+
+
+def test_replica_fixa_durante_a_requisicao(router):
+    app = Flask(__name__)
+    with app.test_request_context('/'):
+        with get_read_connection() as conn:
+            primeira = origem(conn)
+        for _ in range(3):
+            with get_read_connection() as conn:
+                assert origem(conn) == primeira
+
+
+def test_usuario_que_escreveu_le_do_primario(router):
+    router, timer = router
+    app = Flask(__name__)
+    router.pin(7)
+
+    with app.test_request_context('/'):
+        g.id_usuario = 7
+        with get_read_connection() as conn:
+            assert origem(conn) == 'primario'
+
+    with app.test_request_context('/'):
+        g.id_usuario = 8
+        with get_read_connection() as conn:
+            assert origem(conn) != 'primario'
+
+    # Cookie vale em outro worker (sem o pin local)
+    with app.test_request_context('/', headers={'Cookie': f'{replicas.STICKY_COOKIE}={timer.now + 2}'}):
+        with get_read_connection() as conn:
+            assert origem(conn) == 'primario'
+
+    timer.now += 6
+    with app.test_request_context('/'):
+        g.id_usuario = 7
+        with get_read_connection() as conn:
+            assert origem(conn) != 'primario'
+
+
+def test_sem_replica_saudavel_usa_o_primario(monkeypatch, router):
+    monkeypatch.setattr(replicas, 'read_router', ReadRouter([BrokenEngine()], 5, 30, timer=FakeTimer()))
+    app = Flask(__name__)
+    with app.test_request_context('/'):
+        with get_read_connection() as conn:
+            assert conn == 'primario'
+
+
+def test_escrita_fixa_usuario_no_primario(router):
+    router, _ = router
+    app = Flask(__name__)
+    replicas.install(app)
+
+    @app.route('/escrita', methods=['POST'])
+    def escrita():
+        g.id_usuario = 3
+        return 'ok', 201
+
+    resposta = app.test_client().post('/escrita')
+    assert replicas.STICKY_COOKIE in resposta.headers['Set-Cookie']
+    assert router.is_pinned(3)
+
+
+def test_checkout_da_replica_entra_nas_metricas_do_pool(router):
+    router, _ = router
+    app = Flask(__name__)
+    with app.test_request_context('/'):
+        with get_read_connection() as conn:
+            conn.execute(text('SELECT 1'))
+
+    assert sum(router.replicas[i].snapshot()['checkouts'] for i in (0, 2)) == 1
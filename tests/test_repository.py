@@ -0,0 +1,222 @@
+import pytest
+from sqlalchemy import create_engine, text
+
+from repository import cached_text, classificacao, estatisticas, partidas, times, usuarios
+
+
+@pytest.fixture
+def conn():
+    engine = create_engine('sqlite://')
+    with engine.begin() as conn:
+        conn.execute(text(
+            'CREATE TABLE usuario (id_usuario INTEGER PRIMARY KEY, nome TEXT, email TEXT, hash_senha TEXT, '
+            'genero TEXT, dt_nascimento TEXT, no_telefone TEXT)'
+        ))
+        conn.execute(text(
+            'CREATE TABLE time (id_time INTEGER PRIMARY KEY, nome_time TEXT, fk_responsavel_time INTEGER, cor_uniforme TEXT)'
+        ))
+        yield conn
+
+
+def test_atualizar_usuario_so_altera_campos_enviados(conn):
+    id_usuario = usuarios.inserir(conn, 'Ana', 'ana@example.com', 'hash', genero='F', dt_nascimento='1990-01-01')
+
+    usuarios.atualizar(conn, id_usuario, {'nome': 'Ana Lima', 'dt_nascimento': '1991-02-03'})
+
+    row = usuarios.buscar(conn, id_usuario)._mapping
+    assert (row['nome'], row['email'], row['genero'], row['dt_nascimento']) == ('Ana Lima', 'ana@example.com', 'F', '1991-02-03')
+
+
+def test_update_compilado_uma_vez_por_conjunto_de_colunas(conn):
+    id_time = times.inserir(conn, 'Azul FC', 1, 'Azul')
+
+    times.atualizar(conn, id_time, {'nome_time': 'Azul EC', 'cor_uniforme': 'Branco'})
+    times.atualizar(conn, id_time, {'cor_uniforme': 'Preto', 'nome_time': 'Azul SC'})
+
+    # A ordem das chaves não gera um novo comando
+    assert times._update_stmt.cache_info().currsize == 1
+    assert times.responsavel(conn, id_time) == 1
+    assert conn.execute(text('SELECT nome_time, cor_uniforme FROM time')).one() == ('Azul SC', 'Preto')
+    assert times.responsavel(conn, id_time + 1) is None
+
+
+def test_cached_text_reaproveita_o_mesmo_objeto():
+    assert cached_text('SELECT 1') is cached_text('SELECT 1')
+
+
+def test_deltas_resumo_move_contagem_entre_status():
+    times_por_jogador = {10: {100: 1}, 11: {100: 1, 200: 2}, 12: {200: 2}}
+    antigos = {10: 'Duvida', 12: 'Recusado'}
+    novos = {10: 'Confirmado', 11: 'Confirmado', 12: 'Recusado'}
+
+    assert partidas.deltas_resumo(antigos, novos, times_por_jogador) == {
+        100: {'confirmados': 2, 'duvidas': -1, 'recusados': 0},
+        200: {'confirmados': 1, 'duvidas': 0, 'recusados': 0},
+    }
+    # Reenviar o mesmo status não altera contador
+    assert partidas.deltas_resumo(novos, novos, times_por_jogador) == {}
+
+
+def test_recalcular_resumo_conta_por_time_da_partida(conn):
+    for ddl in (
+        'CREATE TABLE time_partida (fk_time INTEGER, fk_partida INTEGER, casa_visitante TEXT)',
+        'CREATE TABLE time_membros (fk_usuario INTEGER, fk_time INTEGER, numero_camisa INTEGER)',
+        'CREATE TABLE partida_presenca (fk_partida INTEGER, fk_usuario INTEGER, status TEXT)',
+        'CREATE TABLE partida_presenca_resumo (fk_partida INTEGER, fk_time INTEGER, confirmados INTEGER, '
+        'duvidas INTEGER, recusados INTEGER, PRIMARY KEY (fk_partida, fk_time))',
+    ):
+        conn.execute(text(ddl))
+    conn.execute(text("INSERT INTO time_partida VALUES (1, 7, 'C'), (2, 7, 'V')"))
+    conn.execute(text('INSERT INTO time_membros VALUES (10, 1, NULL), (11, 1, NULL), (20, 2, NULL)'))
+    conn.execute(text(
+        "INSERT INTO partida_presenca VALUES (7, 10, 'Confirmado'), (7, 11, 'Duvida'), (7, 20, 'Confirmado'), "
+        "(7, 99, 'Confirmado')"  # 99 não é membro de nenhum dos times
+    ))
+    conn.execute(text('INSERT INTO partida_presenca_resumo VALUES (7, 1, 50, 50, 50)'))
+
+    assert partidas.faixa_resumo(conn) == (7, 7)
+    partidas.recalcular_resumo(conn, 1, 10)
+
+    linhas = conn.execute(text('SELECT * FROM partida_presenca_resumo ORDER BY fk_time')).all()
+    assert [tuple(l) for l in linhas] == [(7, 1, 1, 1, 0), (7, 2, 1, 0, 0)]
+
+
+def test_deltas_classificacao_subtrai_placar_antigo():
+    # 2x1 para a casa vira 1x1: casa perde a vitória (-3 +1), visitante troca derrota por empate
+    assert classificacao.deltas(1, 2, (2, 1), (1, 1)) == {
+        1: {'jogos': 0, 'vitorias': -1, 'empates': 1, 'derrotas': 0, 'gols_pro': -1, 'gols_contra': 0, 'pontos': -2},
+        2: {'jogos': 0, 'vitorias': 0, 'empates': 1, 'derrotas': -1, 'gols_pro': 0, 'gols_contra': -1, 'pontos': 1},
+    }
+    # Cancelar desfaz exatamente o que o registro somou
+    registro = classificacao.deltas(1, 2, None, (0, 3))
+    cancelamento = classificacao.deltas(1, 2, (0, 3), None)
+    assert all(registro[t][c] == -cancelamento[t][c] for t in (1, 2) for c in classificacao.COLUNAS)
+    assert classificacao.deltas(1, 2, (1, 0), (1, 0)) == {}
+
+
+def test_recalcular_classificacao_e_divergencias(conn):
+    for ddl in (
+        'CREATE TABLE partida (id_partida INTEGER PRIMARY KEY, placar_time_casa INTEGER, placar_time_visitante INTEGER)',
+        'CREATE TABLE time_partida (fk_time INTEGER, fk_partida INTEGER, casa_visitante TEXT)',
+        'CREATE TABLE classificacao (fk_time INTEGER PRIMARY KEY, jogos INTEGER, vitorias INTEGER, empates INTEGER, '
+        'derrotas INTEGER, gols_pro INTEGER, gols_contra INTEGER, pontos INTEGER)',
+    ):
+        conn.execute(text(ddl))
+    for id_time in (1, 2, 3):
+        times.inserir(conn, f'Time {id_time}', 1, None)
+    conn.execute(text('INSERT INTO partida VALUES (1, 2, 0), (2, 1, 1), (3, NULL, NULL)'))
+    conn.execute(text(
+        "INSERT INTO time_partida VALUES (1, 1, 'C'), (2, 1, 'V'), (2, 2, 'C'), (3, 2, 'V'), (1, 3, 'C'), (3, 3, 'V')"
+    ))
+
+    classificacao.recalcular(conn)
+
+    tabela = {row._mapping['id_time']: row._mapping for row in classificacao.listar(conn)}
+    assert [row._mapping['id_time'] for row in classificacao.listar(conn)] == [1, 3, 2]
+    assert (tabela[1]['pontos'], tabela[1]['saldo']) == (3, 2)
+    assert (tabela[2]['jogos'], tabela[2]['empates'], tabela[2]['derrotas']) == (2, 1, 1)
+    assert classificacao.divergencias(conn) == []
+
+    conn.execute(text('UPDATE classificacao SET pontos = 0 WHERE fk_time = 1'))
+    [(id_time, materializada, calculada)] = classificacao.divergencias(conn)
+    assert (id_time, materializada['pontos'], calculada['pontos']) == (1, 0, 3)
+
+
+def test_deltas_estatisticas_contam_jogo_so_em_partida_encerrada():
+    times_por_jogador = {10: {1: 1}, 11: {1: 1, 2: 2}}
+    antigos = {10: 'Confirmado'}
+    novos = {10: 'Recusado', 11: 'Confirmado'}
+
+    assert estatisticas.deltas(antigos, novos, times_por_jogador, encerrada=False) == {
+        (1, 10): {'confirmados': -1, 'duvidas': 0, 'recusados': 1, 'jogos': 0},
+        (1, 11): {'confirmados': 1, 'duvidas': 0, 'recusados': 0, 'jogos': 0},
+        (2, 11): {'confirmados': 1, 'duvidas': 0, 'recusados': 0, 'jogos': 0},
+    }
+    encerrada = estatisticas.deltas(antigos, novos, times_por_jogador, encerrada=True)
+    assert (encerrada[(1, 10)]['jogos'], encerrada[(2, 11)]['jogos']) == (-1, 1)
+    assert estatisticas.deltas(novos, novos, times_por_jogador, encerrada=True) == {}
+    assert (estatisticas.participacao(2, 3), estatisticas.participacao(0, 0)) == (0.667, None)
+
+
+def test_recalcular_estatisticas_e_leitura_por_time_e_usuario(conn):
+    for ddl in (
+        'CREATE TABLE partida (id_partida INTEGER PRIMARY KEY, placar_time_casa INTEGER, placar_time_visitante INTEGER)',
+        'CREATE TABLE time_partida (fk_time INTEGER, fk_partida INTEGER, casa_visitante TEXT)',
+        'CREATE TABLE time_membros (fk_usuario INTEGER, fk_time INTEGER, numero_camisa INTEGER)',
+        'CREATE TABLE partida_presenca (fk_partida INTEGER, fk_usuario INTEGER, status TEXT)',
+        'CREATE TABLE classificacao (fk_time INTEGER PRIMARY KEY, jogos INTEGER, vitorias INTEGER, empates INTEGER, '
+        'derrotas INTEGER, gols_pro INTEGER, gols_contra INTEGER, pontos INTEGER)',
+        'CREATE TABLE estatistica_jogador (fk_time INTEGER, fk_usuario INTEGER, confirmados INTEGER, '
+        'duvidas INTEGER, recusados INTEGER, jogos INTEGER, PRIMARY KEY (fk_time, fk_usuario))',
+    ):
+        conn.execute(text(ddl))
+    conn.execute(text("INSERT INTO usuario (id_usuario, nome) VALUES (10, 'Ana'), (11, 'Bia'), (12, 'Caio')"))
+    times.inserir(conn, 'Time 1', 10, None)
+    times.inserir(conn, 'Time 2', 12, None)
+    conn.execute(text('INSERT INTO time_membros VALUES (10, 1, 9), (11, 1, NULL), (12, 2, NULL)'))
+    # Partida 1 com placar, partida 2 ainda sem
+    conn.execute(text('INSERT INTO partida VALUES (1, 2, 0), (2, NULL, NULL)'))
+    conn.execute(text("INSERT INTO time_partida VALUES (1, 1, 'C'), (2, 1, 'V'), (1, 2, 'C'), (2, 2, 'V')"))
+    conn.execute(text(
+        "INSERT INTO partida_presenca VALUES (1, 10, 'Confirmado'), (1, 11, 'Recusado'), (2, 10, 'Confirmado'), "
+        "(2, 11, 'Duvida'), (1, 12, 'Confirmado')"
+    ))
+    conn.execute(text('INSERT INTO estatistica_jogador VALUES (1, 10, 50, 50, 50, 50)'))
+    classificacao.recalcular(conn)
+
+    assert estatisticas.faixa(conn) == (1, 2)
+    estatisticas.recalcular(conn, 1, 2)
+
+    resumo, membros = estatisticas.do_time(conn, 1)
+    assert (resumo._mapping['jogos'], resumo._mapping['vitorias']) == (1, 1)
+    assert [tuple(m) for m in membros] == [(10, 'Ana', 9, 2, 0, 0, 1), (11, 'Bia', None, 0, 1, 1, 0)]
+    assert estatisticas.do_time(conn, 99) == (None, [])
+
+    [linha] = estatisticas.do_usuario(conn, 12)
+    assert (linha._mapping['id_time'], linha._mapping['jogos'], linha._mapping['jogos_time']) == (2, 1, 1)
+
+
+@pytest.mark.parametrize('consecutivos', [True, False])
+def test_inserir_lote_mapeia_ids_gerados_e_responsavel_por_item(conn, monkeypatch, consecutivos):
+    from datetime import datetime
+
+    import db
+
+    def insert_many_mysql(conn, table, columns, rows, suffix='', chunk_size=2):
+        # SQLite devolve o id da última linha; o MySQL, o da primeira
+        return [(ultimo - linhas + 1, linhas) for ultimo, linhas in db.insert_many(conn, table, columns, rows, suffix, chunk_size)]
+
+    monkeypatch.setattr('repository.partidas.insert_many', insert_many_mysql)
+    # SQLite não tem @@auto_increment_increment; sem ids consecutivos grava item a item
+    monkeypatch.setattr('repository.partidas.ids_consecutivos', lambda conn: consecutivos)
+    for ddl in (
+        'CREATE TABLE agendamento (id_agendamento INTEGER PRIMARY KEY, dthr_ini TEXT, dthr_fim TEXT, fk_local INTEGER)',
+        'CREATE TABLE partida (id_partida INTEGER PRIMARY KEY, fk_responsavel_partida INTEGER, fk_agendamento INTEGER)',
+        'CREATE TABLE time_partida (fk_time INTEGER, fk_partida INTEGER, casa_visitante TEXT)',
+    ):
+        conn.execute(text(ddl))
+    # Partida já existente: os ids do lote não começam em 1
+    conn.execute(text("INSERT INTO agendamento VALUES (40, '2026-02-01 09:00:00', '2026-02-01 10:00:00', 5)"))
+    conn.execute(text('INSERT INTO partida VALUES (70, 1, 40)'))
+    itens = [
+        {'id_time_casa': 1, 'id_time_visitante': 2, 'id_local': 5, 'id_responsavel': 10,
+         'dthr_ini': datetime(2026, 3, 1, 9), 'dthr_fim': datetime(2026, 3, 1, 10)},
+        {'id_time_casa': 2, 'id_time_visitante': 1, 'id_local': 5, 'id_responsavel': 20,
+         'dthr_ini': datetime(2026, 3, 1, 10), 'dthr_fim': datetime(2026, 3, 1, 11)},
+        {'id_time_casa': 1, 'id_time_visitante': 3, 'id_local': 6,
+         'dthr_ini': datetime(2026, 3, 1, 9), 'dthr_fim': datetime(2026, 3, 1, 10)},
+    ]
+
+    ids = partidas.inserir_lote(conn, 99, itens)
+
+    linhas = conn.execute(text(
+        'SELECT p.id_partida, p.fk_responsavel_partida, a.fk_local, a.dthr_ini, tp.fk_time FROM partida AS p '
+        "JOIN agendamento AS a ON a.id_agendamento = p.fk_agendamento "
+        "JOIN time_partida AS tp ON tp.fk_partida = p.id_partida AND tp.casa_visitante = 'C' "
+        'WHERE p.id_partida > 70 ORDER BY p.id_partida'
+    )).all()
+    assert ids == [71, 72, 73]
+    assert [(l[0], l[1], l[2], str(l[3])[:16], l[4]) for l in linhas] == [
+        (71, 10, 5, '2026-03-01 09:00', 1), (72, 20, 5, '2026-03-01 10:00', 2), (73, 99, 6, '2026-03-01 09:00', 1),
+    ]
+    assert partidas._ids_gerados([(101, 2), (5001, 1)]) == [101, 102, 5001]
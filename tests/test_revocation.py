@@ -0,0 +1,37 @@
+from contextlib import contextmanager
+
+from sqlalchemy import create_engine, text
+
+from revocation import BloomFilter, RevocationList
+
+
+def test_bloom_filter_sem_falsos_negativos():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    for i in range(1000):
+        bloom.add(i)
+
+    assert all(i in bloom for i in range(1000))
+
+    falsos_positivos = sum(1 for i in range(1000, 11000) if i in bloom)
+    assert falsos_positivos < 300  # ~1% esperado, folga para variação
+
+
+def test_token_emitido_no_mesmo_segundo_apos_revogacao_continua_valido(monkeypatch):
+    engine = create_engine('sqlite://')
+    with engine.begin() as conn:
+        conn.execute(text('CREATE TABLE token_revogacao (fk_usuario INTEGER, revogado_em BIGINT)'))
+
+    @contextmanager
+    def fake_connection():
+        with engine.begin() as conn:
+            yield conn
+
+    monkeypatch.setattr('revocation.get_connection', fake_connection)
+    monkeypatch.setattr('revocation.time.time', lambda: 1_750_000_000.250)
+    lista = RevocationList(refresh_seconds=60, window_seconds=3600)
+    with fake_connection() as conn:
+        lista.revoke(conn, 1)
+
+    assert lista.is_revoked(1, 1_750_000_000_100)
+    assert not lista.is_revoked(1, 1_750_000_000_900)
+    assert not lista.is_revoked(2, 1_750_000_000_100)
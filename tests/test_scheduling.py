@@ -0,0 +1,52 @@
+from datetime import date, datetime, timedelta
+
+from scheduling import (
+    dentro_do_horario,
+    horario_do_dia,
+    intervalos_livres,
+    janela_do_dia,
+    mesclar_intervalos,
+    varrer_conflitos,
+)
+
+
+def dt(h, m=0, dia=1):
+    return datetime(2024, 5, dia, h, m)
+
+
+def test_horario_do_dia_com_excecao():
+    abertura, fechamento = timedelta(hours=8), timedelta(hours=22)
+
+    fechado = horario_do_dia(abertura, fechamento, {'motivo': 'Feriado', 'horario_abertura_excecao': None, 'horario_fechamento_excecao': None})
+    assert fechado.fechado and fechado.motivo == 'Feriado'
+
+    reduzido = horario_do_dia(abertura, fechamento, {'motivo': None, 'horario_abertura_excecao': timedelta(hours=10), 'horario_fechamento_excecao': timedelta(hours=14)})
+    assert not dentro_do_horario(reduzido, dt(9), dt(10))
+    assert dentro_do_horario(reduzido, dt(10), dt(14))
+
+
+def test_intervalos_livres_varre_ocupados():
+    dia = horario_do_dia(timedelta(hours=8), timedelta(hours=22))
+    inicio, fim = janela_do_dia(dia, date(2024, 5, 1))
+    ocupados = mesclar_intervalos([
+        (dt(10), dt(11)),
+        (dt(10, 30), dt(12)),  # sobreposto ao anterior
+        (dt(12, 30), dt(13)),
+        (dt(21, 30), dt(23)),  # passa do fechamento
+    ])
+
+    livres = intervalos_livres(inicio, fim, ocupados, timedelta(hours=1))
+
+    assert livres == [(dt(8), dt(10)), (dt(13), dt(21, 30))]
+
+
+def test_varrer_conflitos_existentes_e_do_lote():
+    ocupados = mesclar_intervalos([(dt(10), dt(11))])
+    candidatos = [
+        (dt(8), dt(9), 'a'),
+        (dt(8, 30), dt(9, 30), 'b'),   # conflita com 'a'
+        (dt(10, 30), dt(11, 30), 'c'),  # conflita com o existente
+        (dt(11), dt(12), 'd'),          # encosta no existente: ok
+    ]
+
+    assert varrer_conflitos(ocupados, candidatos) == {'b': 'lote', 'c': 'existente'}
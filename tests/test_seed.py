@@ -0,0 +1,89 @@
+from collections import defaultdict
+from contextlib import nullcontext
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from seed import JOGADORES_POR_TIME, gerar_agenda, gerar_locais, gerar_membros, gerar_usuarios, seed, tamanhos
+
+
+def agenda(semente=7):
+    locais = gerar_locais(semente, 3)
+    linhas = list(gerar_agenda(semente, locais, 200, 10, date(2025, 1, 1), 5, corte=date(2025, 1, 5)))
+    return locais, linhas
+
+
+def test_geracao_deterministica():
+    assert list(gerar_usuarios(1, 50, 'h')) == list(gerar_usuarios(1, 50, 'h'))
+    assert agenda() == agenda()
+    assert agenda(semente=8) != agenda()
+
+
+def test_agenda_coerente():
+    locais, linhas = agenda()
+    por_tabela = defaultdict(list)
+    for tabela, linha in linhas:
+        por_tabela[tabela].append(linha)
+
+    assert len(por_tabela['partida']) == 200
+    assert len(por_tabela['time_partida']) == 400
+
+    # Sem sobreposição por local, dentro do horário do local ou da exceção do dia
+    horario = {l[0]: (l[4], l[5]) for l in locais}
+    excecoes = {(e[0], e[1]): e for e in por_tabela['local_excecoes']}
+    ocupados = defaultdict(list)
+    for _, ini, fim, id_local in por_tabela['agendamento']:
+        excecao = excecoes.get((id_local, ini.date()))
+        assert not excecao or excecao[3] is not None  # nada em dia fechado
+        abertura, fechamento = (excecao[3], excecao[4]) if excecao else horario[id_local]
+        inicio_dia = datetime.combine(ini.date(), datetime.min.time())
+        assert inicio_dia + abertura <= ini and fim <= inicio_dia + fechamento
+        ocupados[id_local].append((ini, fim))
+    for intervalos in ocupados.values():
+        intervalos.sort()
+        assert all(a[1] <= b[0] for a, b in zip(intervalos, intervalos[1:]))
+
+    # Presença só de jogadores dos dois times; placar só em partidas passadas
+    times = defaultdict(set)
+    for id_time, id_partida, _ in por_tabela['time_partida']:
+        times[id_partida].add(id_time)
+    membros = {u: t for u, t, _ in gerar_membros(10)}
+    for id_partida, id_usuario, _ in por_tabela['partida_presenca']:
+        assert membros[id_usuario] in times[id_partida]
+
+    datas = {a[0]: a[1] for a in por_tabela['agendamento']}
+    for id_partida, _, _, placar_casa, _ in por_tabela['partida']:
+        assert (placar_casa is None) == (datas[id_partida].date() >= date(2025, 1, 5))
+
+
+def test_tamanhos_por_escala():
+    assert tamanhos(1) == {'usuario': 1_000_000, 'time': 50_000, 'local': 500, 'partida': 2_000_000}
+    pequeno = tamanhos(0.0001)
+    assert pequeno['time'] * JOGADORES_POR_TIME <= pequeno['usuario']
+
+
+def test_erro_no_meio_da_carga_descarta_a_conexao(monkeypatch):
+    class ConexaoFalsa:
+        invalidada = False
+
+        def execute(self, *args):
+            return SimpleNamespace(fetchone=lambda: None)
+
+        def exec_driver_sql(self, sql, *args):
+            if sql.startswith('INSERT INTO time '):
+                raise RuntimeError('falha no INSERT')
+
+        def commit(self):
+            pass
+
+        def invalidate(self):
+            self.invalidada = True
+
+    conn = ConexaoFalsa()
+    monkeypatch.setattr('passwords.hash_password', lambda senha: 'hash')
+
+    with pytest.raises(RuntimeError):
+        seed(SimpleNamespace(connect=lambda: nullcontext(conn)), 1, 0.0001, date(2025, 1, 1), echo=lambda msg: None)
+    # Não volta ao pool com foreign_key_checks/unique_checks desligados
+    assert conn.invalidada
@@ -0,0 +1,88 @@
+import json
+from contextlib import contextmanager
+
+import pytest
+from flask import Flask, request
+from sqlalchemy import create_engine, text
+
+import streaming
+from json_provider import ORJSONProvider
+from pagination import Page, PaginationError, encode_cursor
+from streaming import ndjson_response, wants_stream
+
+
+@pytest.fixture
+def app(monkeypatch):
+    engine = create_engine('sqlite://')
+    with engine.begin() as conn:
+        conn.execute(text('CREATE TABLE item (id INTEGER PRIMARY KEY, nome TEXT)'))
+        conn.execute(text('INSERT INTO item (id, nome) VALUES ' + ', '.join(f"({i}, 'n{i}')" for i in range(1, 1201))))
+
+    consultas = []
+
+    @contextmanager
+    def fake_get_connection():
+        with engine.connect() as conn:
+            consultas.append([])
+            yield _Gravador(conn, consultas[-1])
+
+    monkeypatch.setattr(streaming, 'get_read_connection', fake_get_connection)
+    monkeypatch.setattr(streaming, 'STREAM_BATCH_SIZE', 500)
+
+    app = Flask(__name__)
+    app.json = ORJSONProvider(app)
+
+    @app.route('/itens')
+    def itens():
+        if not wants_stream():
+            return 'json'
+        page = Page.for_stream(request.args, key_types=(int,))
+        return ndjson_response(page, 'SELECT id, nome FROM item', [], {}, ('id',), key=lambda row: (row._mapping['id'],))
+
+    app.consultas = consultas
+    return app
+
+
+class _Gravador:
+    """Conexão que registra o SQL de cada execução."""
+
+    def __init__(self, conn, registro):
+        self._conn = conn
+        self._registro = registro
+
+    def execute(self, query, params=None):
+        self._registro.append(str(query))
+        return self._conn.execute(query, params)
+
+
+def test_ndjson_transmite_todas_as_linhas_a_partir_do_cursor(app):
+    client = app.test_client()
+
+    resposta = client.get('/itens?stream=1')
+    assert resposta.mimetype == 'application/x-ndjson'
+    linhas = resposta.get_data(as_text=True).splitlines()
+    assert len(linhas) == 1200
+    assert json.loads(linhas[0]) == {'id': 1, 'nome': 'n1'}
+
+    resposta = client.get(f'/itens?after={encode_cursor([1000])}', headers={'Accept': 'application/x-ndjson'})
+    ids = [json.loads(l)['id'] for l in resposta.get_data(as_text=True).splitlines()]
+    assert ids == list(range(1001, 1201))
+
+
+def test_sem_opt_in_mantem_json(app):
+    assert app.test_client().get('/itens').get_data(as_text=True) == 'json'
+
+
+def test_stream_nao_aceita_before():
+    with pytest.raises(PaginationError):
+        Page.for_stream({'before': 'x'}, (int,))
+
+
+def test_ndjson_le_em_paginas_limitadas_com_uma_conexao_por_pagina(app):
+    linhas = app.test_client().get('/itens?stream=1').get_data(as_text=True).splitlines()
+
+    assert len(linhas) == 1200
+    # 1200 linhas em páginas de 500: três consultas, cada uma na sua conexão
+    assert [len(c) for c in app.consultas] == [1, 1, 1]
+    assert all('LIMIT 501' in c[0] for c in app.consultas)
+    assert ':_k0' not in app.consultas[0][0] and ':_k0' in app.consultas[1][0]
@@ -0,0 +1,68 @@
+from contextlib import contextmanager
+
+import pytest
+from flask import Flask, jsonify
+from sqlalchemy import create_engine, text
+
+import table_versions
+from table_versions import bump_versions, versioned_etag
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    engine = create_engine('sqlite://')
+    with engine.begin() as conn:
+        conn.execute(text('CREATE TABLE tabela_versao (tabela VARCHAR(64) PRIMARY KEY, versao BIGINT NOT NULL DEFAULT 0)'))
+        conn.execute(text("INSERT INTO tabela_versao (tabela) VALUES ('time'), ('local')"))
+
+    @contextmanager
+    def fake_get_connection():
+        with engine.connect() as conn:
+            yield conn
+
+    monkeypatch.setattr(table_versions, 'get_read_connection', fake_get_connection)
+    return engine
+
+
+def test_if_none_match_devolve_304_ate_a_proxima_escrita(engine):
+    app = Flask(__name__)
+    chamadas = []
+
+    @app.route('/times')
+    @versioned_etag('time')
+    def listar():
+        chamadas.append(1)
+        return jsonify([])
+
+    client = app.test_client()
+    etag = client.get('/times').headers['ETag']
+    assert etag.startswith('W/')
+
+    resposta = client.get('/times', headers={'If-None-Match': etag})
+    assert resposta.status_code == 304
+    assert len(chamadas) == 1  # a consulta principal não rodou
+
+    # Query string diferente, ETag diferente
+    assert client.get('/times?limit=5').headers['ETag'] != etag
+
+    with engine.begin() as conn:
+        bump_versions(conn, 'time')
+
+    resposta = client.get('/times', headers={'If-None-Match': etag})
+    assert resposta.status_code == 200
+    assert resposta.headers['ETag'] != etag
+
+
+def test_escrita_em_outra_tabela_nao_muda_etag(engine):
+    app = Flask(__name__)
+
+    @app.route('/times')
+    @versioned_etag('time')
+    def listar():
+        return jsonify([])
+
+    client = app.test_client()
+    etag = client.get('/times').headers['ETag']
+    with engine.begin() as conn:
+        bump_versions(conn, 'local')
+    assert client.get('/times', headers={'If-None-Match': etag}).status_code == 304
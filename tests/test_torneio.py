@@ -0,0 +1,52 @@
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+from scheduling import gerar_slots
+from torneio import alocar_partidas, rodadas_round_robin
+
+
+def test_round_robin_turno_unico_e_ida_e_volta():
+    times = list(range(1, 8))  # ímpar: um time folga por rodada
+    rodadas = rodadas_round_robin(times)
+
+    confrontos = Counter(frozenset(par) for rodada in rodadas for par in rodada)
+    assert len(confrontos) == 7 * 6 // 2
+    assert set(confrontos.values()) == {1}
+    for rodada in rodadas:
+        jogando = [t for par in rodada for t in par]
+        assert len(jogando) == len(set(jogando))
+
+    ida_e_volta = rodadas_round_robin(times, ida_e_volta=True)
+    mandos = Counter(par for rodada in ida_e_volta for par in rodada)
+    assert len(mandos) == 7 * 6 and set(mandos.values()) == {1}
+
+
+def test_alocacao_40_times_ida_e_volta_rapida_e_sem_dois_jogos_no_dia():
+    times = list(range(1, 41))
+    duracao = timedelta(minutes=90)
+    slots_por_dia = {}
+    for offset in range(200):
+        dia = date(2025, 1, 1) + timedelta(days=offset)
+        for id_local in (1, 2, 3):
+            inicio = datetime.combine(dia, datetime.min.time()) + timedelta(hours=8)
+            slots_por_dia.setdefault(dia, []).extend(
+                (id_local, ini, fim) for ini, fim in gerar_slots(inicio, inicio + timedelta(hours=14), [], duracao)
+            )
+
+    t0 = time.perf_counter()
+    rodadas = rodadas_round_robin(times, ida_e_volta=True)
+    alocadas, nao_alocadas = alocar_partidas(rodadas, slots_por_dia)
+    assert time.perf_counter() - t0 < 1.0
+
+    assert not nao_alocadas
+    assert len(alocadas) == 40 * 39
+
+    por_dia = Counter()
+    slots_usados = set()
+    for _, casa, visitante, id_local, ini, _ in alocadas:
+        por_dia[(ini.date(), casa)] += 1
+        por_dia[(ini.date(), visitante)] += 1
+        slots_usados.add((id_local, ini))
+    assert max(por_dia.values()) == 1
+    assert len(slots_usados) == len(alocadas)
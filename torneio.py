@@ -0,0 +1,74 @@
+"""Geração de tabelas de pontos corridos (round-robin) e alocação em horários livres."""
+
+
+def rodadas_round_robin(times: list, ida_e_volta: bool = False) -> list:
+    """Método do círculo: cada time enfrenta todos os outros uma vez por turno.
+
+    Retorna uma lista de rodadas, cada uma com pares `(casa, visitante)` em
+    que nenhum time aparece duas vezes. Com número ímpar de times, um deles
+    folga a cada rodada. No returno os mandos são invertidos.
+    """
+    equipes = list(times)
+    if len(equipes) % 2:
+        equipes.append(None)  # folga
+
+    n = len(equipes)
+    rodadas = []
+    for r in range(n - 1):
+        rodada = []
+        for i in range(n // 2):
+            a, b = equipes[i], equipes[n - 1 - i]
+            if a is None or b is None:
+                continue
+            # alterna o mando entre rodadas para equilibrar casa/fora
+            inverter = (r % 2 == 1) if i == 0 else (i % 2 == 1)
+            rodada.append((b, a) if inverter else (a, b))
+        rodadas.append(rodada)
+        equipes = [equipes[0], equipes[-1]] + equipes[1:-1]
+
+    if ida_e_volta:
+        rodadas += [[(visitante, casa) for casa, visitante in rodada] for rodada in rodadas]
+    return rodadas
+
+
+def alocar_partidas(rodadas: list, slots_por_dia: dict) -> tuple:
+    """Distribui as partidas, em ordem de rodada, nos horários livres mais cedo possíveis.
+
+    `slots_por_dia` mapeia data -> lista de `(id_local, dthr_ini, dthr_fim)`.
+    Nenhum time recebe duas partidas no mesmo dia. Retorna `(alocadas,
+    nao_alocadas)`, onde cada alocada é `(rodada, casa, visitante, id_local,
+    dthr_ini, dthr_fim)`.
+    """
+    dias = sorted(slots_por_dia)
+    slots = {dia: sorted(slots_por_dia[dia], key=lambda s: (s[1], s[0])) for dia in dias}
+    proximo_slot = {dia: 0 for dia in dias}
+    times_no_dia = {dia: set() for dia in dias}
+    primeiro_dia = 0
+
+    alocadas = []
+    nao_alocadas = []
+    for numero, rodada in enumerate(rodadas, start=1):
+        for casa, visitante in rodada:
+            d = primeiro_dia
+            while d < len(dias):
+                dia = dias[d]
+                if (
+                    proximo_slot[dia] < len(slots[dia])
+                    and casa not in times_no_dia[dia]
+                    and visitante not in times_no_dia[dia]
+                ):
+                    break
+                d += 1
+            else:
+                nao_alocadas.append((numero, casa, visitante))
+                continue
+
+            id_local, dthr_ini, dthr_fim = slots[dia][proximo_slot[dia]]
+            proximo_slot[dia] += 1
+            times_no_dia[dia].update((casa, visitante))
+            alocadas.append((numero, casa, visitante, id_local, dthr_ini, dthr_fim))
+
+            while primeiro_dia < len(dias) and proximo_slot[dias[primeiro_dia]] >= len(slots[dias[primeiro_dia]]):
+                primeiro_dia += 1
+
+    return alocadas, nao_alocadas